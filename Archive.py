@@ -0,0 +1,438 @@
+import argparse
+import bisect
+import lzma
+import os
+import struct
+import zlib
+from array import array
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+import Storage
+
+ARCHIVE_MAGIC = b"TKAR"
+ARCHIVE_FORMAT_VERSION = 1
+# magic, format version, codec, record count
+SEGMENT_HEADER = struct.Struct("<4sHBxI")
+# block table offset, block count, order index entries, customer index entries
+SEGMENT_FOOTER = struct.Struct("<QIII")
+# block offset, compressed length
+BLOCK_ENTRY = struct.Struct("<QI")
+# key hash, block number
+SEGMENT_INDEX_ENTRY = struct.Struct("<QI")
+BLOCK_RECORDS = 256
+BLOCK_CACHE_SIZE = 16
+ARCHIVE_AFTER_DAYS = 90
+# Orders held in memory per month (or written to the hot log at once) while archiving
+ARCHIVE_BATCH = 65536
+
+CODECS = {
+    "zlib": (1, lambda data: zlib.compress(data, 6), zlib.decompress),
+    "lzma": (2, lzma.compress, lzma.decompress),
+}
+_DECOMPRESSORS = {codec_id: decompress for codec_id, _, decompress in CODECS.values()}
+
+
+def _decode_block(data: bytes):
+    """
+    Yields (order_id, order) pairs from one decompressed block of log records.
+    """
+    offset = 0
+    while offset < len(data):
+        length, version, checksum = Storage.RECORD_HEADER.unpack_from(data, offset)
+        start = offset + Storage.RECORD_HEADER.size
+        if zlib.crc32(data[start:start + length]) != checksum:
+            raise Storage.SnapshotError("Archived order record is corrupt.")
+        record = Storage.SCHEMAS.upgrade("orders", version, Storage.SCHEMAS.get("orders", version).unpack_inline(data, start))
+        offset = start + length
+        yield record.pop("order_id"), record
+
+
+def write_segment(file_path: str, orders: list, codec: str = "zlib"):
+    """
+    Writes an immutable archive segment of (order_id, order) pairs.
+
+    Orders are packed in blocks of BLOCK_RECORDS log records, and each block
+    is compressed on its own, so a lookup only decompresses one block. The
+    segment ends with a block table and two small sorted indexes, by order
+    ID hash and by customer hash, that map keys to block numbers.
+    """
+    codec_id, compress, _ = CODECS[codec]
+    chunks = [SEGMENT_HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_FORMAT_VERSION, codec_id, len(orders))]
+    offset = SEGMENT_HEADER.size
+    blocks = []
+    order_entries = []
+    customer_entries = []
+    for block, start in enumerate(range(0, len(orders), BLOCK_RECORDS)):
+        payload = bytearray()
+        for order_id, order in orders[start:start + BLOCK_RECORDS]:
+            payload += Storage.encode_log_record("orders", dict(order, order_id=order_id))
+            order_entries.append((Storage.key_hash(order_id), block))
+            customer_entries.append((Storage.key_hash(order["customer"]), block))
+        compressed = compress(bytes(payload))
+        chunks.append(compressed)
+        blocks.append((offset, len(compressed)))
+        offset += len(compressed)
+
+    table_offset = offset
+    chunks.append(b"".join(BLOCK_ENTRY.pack(*entry) for entry in blocks))
+    # A customer with several orders in one block needs only one entry
+    for entries in (sorted(order_entries), sorted(set(customer_entries))):
+        chunks.append(b"".join(SEGMENT_INDEX_ENTRY.pack(*entry) for entry in entries))
+    chunks.append(SEGMENT_FOOTER.pack(table_offset, len(blocks), len(order_entries), len(set(customer_entries))))
+    Storage.atomic_write(file_path, chunks, generations=1)
+
+
+class ArchiveSegment:
+    """
+    Read access to one compressed archive segment.
+
+    The block table and key indexes are loaded into arrays when the segment
+    is opened; blocks are read and decompressed on demand, and the most
+    recently used ones are kept in a small cache.
+    """
+
+    def __init__(self, file_path: str):
+        """
+        Opens an archive segment.
+
+        Raises:
+            SnapshotError: If the file is not a complete archive segment.
+        """
+        self.__file_path = file_path
+        self.__file = open(file_path, "rb")
+        size = os.fstat(self.__file.fileno()).st_size
+        self.__file.seek(max(size - Storage.TRAILER.size, 0))
+        trailer = self.__file.read(Storage.TRAILER.size)
+        magic, _, length, _ = Storage.TRAILER.unpack(trailer) if len(trailer) == Storage.TRAILER.size else (b"", 0, 0, 0)
+        self.__file.seek(0)
+        header = self.__file.read(SEGMENT_HEADER.size)
+        if magic != Storage.TRAILER_MAGIC or length != size - Storage.TRAILER.size or len(header) < SEGMENT_HEADER.size:
+            self.__file.close()
+            raise Storage.SnapshotError(f"{file_path} is not a complete archive segment.")
+        archive_magic, format_version, codec_id, self.__count = SEGMENT_HEADER.unpack(header)
+        if archive_magic != ARCHIVE_MAGIC or format_version != ARCHIVE_FORMAT_VERSION or codec_id not in _DECOMPRESSORS:
+            self.__file.close()
+            raise Storage.SnapshotError(f"{file_path} is not a version {ARCHIVE_FORMAT_VERSION} archive segment.")
+        self.__decompress = _DECOMPRESSORS[codec_id]
+
+        self.__file.seek(length - SEGMENT_FOOTER.size)
+        table_offset, block_count, order_count, customer_count = SEGMENT_FOOTER.unpack(self.__file.read(SEGMENT_FOOTER.size))
+        self.__file.seek(table_offset)
+        self.__blocks = [BLOCK_ENTRY.unpack_from(entry) for entry in self.__read_entries(BLOCK_ENTRY, block_count)]
+        self.__order_hashes, self.__order_blocks = self.__read_index(order_count)
+        self.__customer_hashes, self.__customer_blocks = self.__read_index(customer_count)
+        self.__cache = OrderedDict()
+
+    # Internal helpers
+    def __read_entries(self, layout: struct.Struct, count: int) -> list:
+        data = self.__file.read(layout.size * count)
+        return [data[position:position + layout.size] for position in range(0, len(data), layout.size)]
+
+    def __read_index(self, count: int) -> tuple:
+        hashes = array("Q")
+        blocks = array("I")
+        for entry in self.__read_entries(SEGMENT_INDEX_ENTRY, count):
+            hashed, block = SEGMENT_INDEX_ENTRY.unpack(entry)
+            hashes.append(hashed)
+            blocks.append(block)
+        return hashes, blocks
+
+    def __block(self, block: int) -> list:
+        records = self.__cache.get(block)
+        if records is not None:
+            self.__cache.move_to_end(block)
+            return records
+        offset, length = self.__blocks[block]
+        self.__file.seek(offset)
+        records = list(_decode_block(self.__decompress(self.__file.read(length))))
+        self.__cache[block] = records
+        if len(self.__cache) > BLOCK_CACHE_SIZE:
+            self.__cache.popitem(last=False)
+        return records
+
+    @staticmethod
+    def __lookup(hashes: array, blocks: array, hashed: int) -> list:
+        position = bisect.bisect_left(hashes, hashed)
+        found = []
+        while position < len(hashes) and hashes[position] == hashed:
+            if blocks[position] not in found:
+                found.append(blocks[position])
+            position += 1
+        return sorted(found)
+
+    # Getters
+    def get_file_path(self) -> str:
+        return self.__file_path
+
+    def __len__(self):
+        return self.__count
+
+    # Behavioral Methods
+    def get(self, order_id: str, default=None):
+        for block in self.__lookup(self.__order_hashes, self.__order_blocks, Storage.key_hash(order_id)):
+            for found_id, order in self.__block(block):
+                if found_id == order_id:
+                    return order
+        return default
+
+    def customer_orders(self, customer: str):
+        for block in self.__lookup(self.__customer_hashes, self.__customer_blocks, Storage.key_hash(customer)):
+            for order_id, order in self.__block(block):
+                if order["customer"] == customer:
+                    yield order_id, order
+
+    def items(self):
+        for block in range(len(self.__blocks)):
+            offset, length = self.__blocks[block]
+            self.__file.seek(offset)
+            yield from _decode_block(self.__decompress(self.__file.read(length)))
+
+    def close(self):
+        self.__file.close()
+
+
+class OrderArchive:
+    """
+    The cold tier of the order store: a directory of monthly archive segments.
+
+    Segments are named "orders-YYYY-MM-NNN.seg" and never modified once
+    written; archiving a month again adds another segment for it.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Opens (or creates) an archive directory.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.__directory = directory
+        self.__segments = [ArchiveSegment(path) for path in self.list_segments(directory)]
+
+    @staticmethod
+    def list_segments(directory: str) -> list:
+        """
+        Returns the paths of the segments in an archive directory, oldest month first, without opening them.
+        """
+        if not os.path.isdir(directory):
+            return []
+        return [os.path.join(directory, name) for name in sorted(os.listdir(directory)) if name.startswith("orders-") and name.endswith(".seg")]
+
+    # Getters
+    def get_directory(self) -> str:
+        return self.__directory
+
+    def get_segment_paths(self) -> list:
+        return [segment.get_file_path() for segment in self.__segments]
+
+    def __len__(self):
+        return sum(len(segment) for segment in self.__segments)
+
+    # Behavioral Methods
+    def get(self, order_id: str, default=None):
+        # Recent months are the likeliest to be looked up
+        for segment in reversed(self.__segments):
+            order = segment.get(order_id)
+            if order is not None:
+                return order
+        return default
+
+    def customer_orders(self, customer: str):
+        for segment in self.__segments:
+            yield from segment.customer_orders(customer)
+
+    def items(self):
+        for segment in self.__segments:
+            yield from segment.items()
+
+    def add_month(self, month: str, orders: list, codec: str = "zlib") -> str:
+        """
+        Writes the orders of one month ("YYYY-MM") as a new segment.
+
+        Returns:
+            str: Path of the new segment.
+        """
+        sequence = sum(1 for segment in self.__segments if os.path.basename(segment.get_file_path()).startswith(f"orders-{month}-")) + 1
+        file_path = os.path.join(self.__directory, f"orders-{month}-{sequence:03d}.seg")
+        write_segment(file_path, orders, codec)
+        self.__segments.append(ArchiveSegment(file_path))
+        self.__segments.sort(key=lambda segment: os.path.basename(segment.get_file_path()))
+        return file_path
+
+    def close(self):
+        for segment in self.__segments:
+            segment.close()
+        self.__segments = []
+
+
+def segment_in_range(segment_path: str, date_from: str = None, date_to: str = None) -> bool:
+    """
+    Returns whether a segment's month overlaps a date range, judging by its name alone.
+    """
+    # Segments are named "orders-YYYY-MM-NNN.seg" after the month they hold
+    month = os.path.basename(segment_path)[len("orders-"):len("orders-YYYY-MM")]
+    return (not date_from or month >= date_from[:7]) and (not date_to or month <= date_to[:7])
+
+
+def archive_orders(log_path: str, archive_dir: str, cutoff: str, codec: str = "zlib") -> int:
+    """
+    Moves orders placed before a cutoff date from the order log into monthly segments.
+
+    The log is streamed once: hot orders go straight to a new log, and old
+    orders are collected per month and written as a segment whenever a
+    month has ARCHIVE_BATCH of them. The new log is swapped in only after
+    every segment is written, so a crash in between can leave an order in
+    both tiers but never in neither. Orders already in the archive are not
+    archived again, so running it again after such a crash just finishes
+    the swap.
+
+    The whole job holds the log's file lock, so other processes cannot
+    append to the log while it is copied; their open logs notice the swap
+    and reopen the new file on their next lookup or append.
+
+    Args:
+        log_path (str): Path to the order log.
+        archive_dir (str): Directory of the archive segments.
+        cutoff (str): First order date ("YYYY-MM-DD") that stays in the log.
+        codec (str): "zlib" or "lzma".
+
+    Returns:
+        int: Number of orders archived.
+    """
+    with Storage.file_lock(log_path + ".lock"):
+        return _archive_orders(log_path, archive_dir, cutoff, codec)
+
+
+def _archive_orders(log_path: str, archive_dir: str, cutoff: str, codec: str) -> int:
+    temp_log = log_path + ".hot"
+    temp_index = temp_log + ".idx"
+    for path in (temp_log, temp_index):
+        if os.path.exists(path):
+            os.remove(path)
+    archive = OrderArchive(archive_dir)
+    months = {}
+    hot = []
+    moved = 0
+    try:
+        with Storage.OrderLog(temp_log, temp_index) as hot_log:
+            for order_id, order in Storage.read_order_log_range(log_path):
+                if order["order_date"] >= cutoff:
+                    hot.append((order_id, order))
+                    if len(hot) >= ARCHIVE_BATCH:
+                        hot_log.append_batch(hot)
+                        hot_log.flush_index()
+                        hot = []
+                    continue
+                moved += 1
+                if archive.get(order_id) is not None:
+                    # Left in the log by an earlier run that stopped before the swap
+                    continue
+                orders = months.setdefault(order["order_date"][:7], [])
+                orders.append((order_id, order))
+                if len(orders) >= ARCHIVE_BATCH:
+                    archive.add_month(order["order_date"][:7], months.pop(order["order_date"][:7]), codec)
+            hot_log.append_batch(hot)
+            for month, orders in sorted(months.items()):
+                archive.add_month(month, orders, codec)
+    finally:
+        archive.close()
+        if os.path.exists(temp_log + ".lock"):
+            os.remove(temp_log + ".lock")
+    if not moved:
+        os.remove(temp_log)
+        os.remove(temp_index)
+        return 0
+
+    # The old index must not outlive the old log, or its offsets would point into the new one
+    index_path = os.path.splitext(log_path)[0] + ".idx"
+    if os.path.exists(index_path):
+        os.remove(index_path)
+    os.replace(temp_log, log_path)
+    os.replace(temp_index, index_path)
+    return moved
+
+
+def cutoff_date(max_age_days: int = ARCHIVE_AFTER_DAYS, today: date = None) -> str:
+    """
+    Returns the first order date that stays hot for a given maximum age.
+    """
+    return ((today if today else date.today()) - timedelta(days=max_age_days)).isoformat()
+
+
+class TieredOrders:
+    """
+    The order store seen as one: the hot order log backed by the archive.
+
+    New orders go to the hot log. Lookups try the hot log first and fall
+    through to the archive segments, so callers do not need to know which
+    tier an order lives in.
+    """
+
+    def __init__(self, order_log: Storage.OrderLog, archive: OrderArchive):
+        """
+        Initializes a new TieredOrders store.
+
+        Args:
+            order_log (OrderLog): The hot tier.
+            archive (OrderArchive): The cold tier.
+        """
+        self.__order_log = order_log
+        self.__archive = archive
+
+    # Getters
+    def get_order_log(self) -> Storage.OrderLog:
+        return self.__order_log
+
+    def get_archive(self) -> OrderArchive:
+        return self.__archive
+
+    # Dictionary-like access
+    def __len__(self):
+        return len(self.__order_log) + len(self.__archive)
+
+    def __contains__(self, order_id):
+        return self.get(order_id) is not None
+
+    def __getitem__(self, order_id):
+        order = self.get(order_id)
+        if order is None:
+            raise KeyError(order_id)
+        return order
+
+    def __setitem__(self, order_id, order):
+        self.__order_log[order_id] = order
+
+    def get(self, order_id: str, default=None):
+        order = self.__order_log.get(order_id)
+        if order is None:
+            order = self.__archive.get(order_id)
+        return default if order is None else order
+
+    def customer_orders(self, customer: str):
+        """
+        Yields (order_id, order) pairs for one customer, archived orders first.
+        """
+        yield from self.__archive.customer_orders(customer)
+        yield from self.__order_log.customer_orders(customer)
+
+    def items(self):
+        yield from self.__archive.items()
+        yield from self.__order_log.items()
+
+    # Behavioral Methods
+    def flush_index(self):
+        self.__order_log.flush_index()
+
+    def close(self):
+        self.__order_log.close()
+        self.__archive.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move old orders from the order log into compressed monthly archive segments.")
+    parser.add_argument("--log", default="orders.log")
+    parser.add_argument("--archive-dir", default="archive")
+    parser.add_argument("--max-age-days", type=int, default=ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--codec", choices=sorted(CODECS), default="zlib")
+    args = parser.parse_args()
+    cutoff = cutoff_date(args.max_age_days)
+    archived = archive_orders(args.log, args.archive_dir, cutoff, args.codec)
+    print(f"Archived {archived} orders placed before {cutoff} into {args.archive_dir}.")
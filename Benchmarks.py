@@ -0,0 +1,349 @@
+import os
+import pickle
+import tempfile
+import time
+import Archive
+import Forecast
+import Occupancy
+import Permissions
+import Pricing
+import Rendering
+import Reports
+import RideCatalog
+import Schedule
+import Search
+import Storage
+
+
+def best_time(function, repeat=5) -> float:
+    """
+    Runs a function several times and returns the fastest run in milliseconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def sample_orders(count: int) -> dict:
+    return {
+        f"ORDER-{number}": {
+            "customer": f"customer{number % 500}",
+            "ticket": ("Single-Day Pass", "Multi-Day Pass", "Group Pass")[number % 3],
+            "quantity": number % 10 + 1,
+            "total_price": float((number % 10 + 1) * 50),
+            "order_date": f"2024-12-{number % 28 + 1:02d}",
+        }
+        for number in range(1, count + 1)
+    }
+
+
+work_dir = tempfile.mkdtemp()
+
+# Atomic Write Benchmark
+print("--- Atomic Write Benchmark ---")
+for size in (1, 1000, 100000):
+    orders = sample_orders(size)
+    pickle_path = os.path.join(work_dir, f"orders{size}.pkl")
+    snapshot_path = os.path.join(work_dir, f"orders{size}.snap")
+
+    def write_pickle():
+        with open(pickle_path, "wb") as f:
+            pickle.dump(orders, f)
+
+    pickle_ms = best_time(write_pickle)
+    snapshot_ms = best_time(lambda: Storage.write_snapshot(snapshot_path, "orders", orders))
+    print(f"{size} orders: in-place pickle {pickle_ms:.2f} ms, atomic snapshot {snapshot_ms:.2f} ms")
+
+# Receipt Rendering Benchmark
+print("--- Receipt Rendering Benchmark ---")
+from Main import Customer, Order, Ticket
+
+customer = Customer("bench", "pw", "bench@example.com", "30", "Active", "Bench Customer", "N/A", "000", "0000", 0)
+group_orders = [
+    Order(customer, [Ticket("Group Pass", "Access for up to 5 people", 200.0, "1 Day", 0.0, "None", "2024-12-01") for _ in range(20)], 20, 4000.0, 4000.0, "CARD", "2024-12-01", f"ORDER-{number}")
+    for number in range(1000)
+]
+
+
+def render_with_joins():
+    return "\n".join(order.get_order_summary() for order in group_orders)
+
+
+print(f"1000 group orders, joined summaries: {best_time(render_with_joins):.2f} ms")
+print(f"1000 group orders, batch render: {best_time(lambda: Rendering.render_orders(group_orders)):.2f} ms")
+
+# Occupancy Benchmark
+print("--- Occupancy Benchmark ---")
+import threading
+
+gate_events = [(1733050800.0 + number / 100, Occupancy.ENTRY if number % 3 else Occupancy.EXIT, None if number % 2 else "Roller Coaster") for number in range(100000)]
+
+
+def record_events(counter, threads):
+    share = len(gate_events) // threads
+
+    def gate(events):
+        for timestamp, kind, ride in events:
+            counter.record(kind, ride, timestamp)
+
+    workers = [threading.Thread(target=gate, args=(gate_events[number * share:(number + 1) * share],)) for number in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+for threads in (1, 4):
+    events_ms = best_time(lambda: record_events(Occupancy.OccupancyCounter(), threads), repeat=3)
+    print(f"{len(gate_events)} events, {threads} gate threads: {events_ms:.0f} ms ({len(gate_events) / events_ms * 1000:,.0f} events/s)")
+batch_ms = best_time(lambda: Occupancy.OccupancyCounter().process(gate_events), repeat=3)
+print(f"{len(gate_events)} events, batched: {batch_ms:.0f} ms ({len(gate_events) / batch_ms * 1000:,.0f} events/s)")
+
+# Ride Eligibility Benchmark
+print("--- Ride Eligibility Benchmark ---")
+from Main import Ride
+
+catalog_rides = [Ride(f"Ride {number}", "Thrill", f"{30 + number % 30} inches", f"{60 + number % 25} inches" if number % 4 else "None", "2 minutes", 20, "Open") for number in range(200)]
+guest_heights = [36 + number % 40 for number in range(10000)]
+
+
+def scan_and_parse():
+    # What callers had to do before: parse every ride's strings for every guest
+    return [
+        [ride for ride in catalog_rides if ride.get_status() == "Open"
+         and float(ride.get_min_height().split()[0]) <= height
+         and (ride.get_max_height() == "None" or height <= float(ride.get_max_height().split()[0]))]
+        for height in guest_heights
+    ]
+
+
+ride_catalog = RideCatalog.RideCatalog(catalog_rides)
+print(f"200 rides, 10000 guests: scan and parse {best_time(scan_and_parse, repeat=3):.0f} ms, "
+      f"bisection {best_time(lambda: [ride_catalog.eligible_rides(height) for height in guest_heights]):.1f} ms, "
+      f"bulk {best_time(lambda: ride_catalog.eligible_rides_bulk(guest_heights)):.1f} ms")
+
+# Order Archive Benchmark
+print("--- Order Archive Benchmark ---")
+archive_orders = sample_orders(100000)
+archive_log_path = os.path.join(work_dir, "archive_orders.log")
+with Storage.OrderLog(archive_log_path) as order_log:
+    order_log.append_batch(archive_orders.items())
+archive_dir = os.path.join(work_dir, "archive")
+for codec in ("zlib", "lzma"):
+    start = time.perf_counter()
+    segment_path = Archive.OrderArchive(os.path.join(archive_dir, codec)).add_month("2024-12", list(archive_orders.items()), codec)
+    print(f"{codec}: segment written in {(time.perf_counter() - start) * 1000:.0f} ms, "
+          f"{os.path.getsize(segment_path) / 1024:.0f} KB vs {os.path.getsize(archive_log_path) / 1024:.0f} KB log")
+lookup_ids = [f"ORDER-{number}" for number in range(1, 100001, 1001)]
+with Storage.OrderLog(archive_log_path) as order_log:
+    hot_ms = best_time(lambda: [order_log.get(order_id) for order_id in lookup_ids]) / len(lookup_ids)
+segment = Archive.ArchiveSegment(os.path.join(archive_dir, "zlib", "orders-2024-12-001.seg"))
+start = time.perf_counter()
+for order_id in lookup_ids:
+    segment.get(order_id)
+cold_ms = (time.perf_counter() - start) * 1000 / len(lookup_ids)
+warm_ms = best_time(lambda: segment.get(lookup_ids[0]))
+segment.close()
+print(f"per lookup: hot log {hot_ms * 1000:.0f} us, archive cold block {cold_ms * 1000:.0f} us, archive cached block {warm_ms * 1000:.0f} us")
+
+# Shared Price Table Benchmark
+print("--- Shared Price Table Benchmark ---")
+catalog_path = os.path.join(work_dir, "catalog.pkl")
+with open(catalog_path, "wb") as f:
+    pickle.dump({"tickets": Pricing.DEFAULT_TICKETS, "discounts": {"Group Pass": 10.0}}, f)
+
+
+def reload_catalog():
+    # What a kiosk would need to do to see another kiosk's discount without shared memory
+    with open(catalog_path, "rb") as f:
+        catalog = pickle.load(f)
+    ticket = next(ticket for ticket in catalog["tickets"] if ticket["type"] == "Group Pass")
+    return ticket["price"] * (1 - catalog["discounts"].get("Group Pass", 0) / 100)
+
+
+writer_table = Pricing.PriceTable(os.path.join(work_dir, "prices.tbl"))
+reader_table = Pricing.PriceTable(os.path.join(work_dir, "prices.tbl"))
+reload_us = best_time(lambda: [reload_catalog() for _ in range(1000)])
+shared_us = best_time(lambda: [reader_table.get_price("Group Pass") for _ in range(1000)])
+write_ms = best_time(lambda: writer_table.set_discount("Group Pass", 10.0))
+start = time.perf_counter()
+writer_table.set_discount("Group Pass", 20.0)
+while reader_table.get_discount("Group Pass") != 20.0:
+    pass
+print(f"per price read: reload file {reload_us:.1f} us, shared table {shared_us:.2f} us; "
+      f"discount write {write_ms:.3f} ms, visible to another reader after {(time.perf_counter() - start) * 1000:.3f} ms")
+writer_table.close()
+reader_table.close()
+
+# Permission Check Benchmark
+print("--- Permission Check Benchmark ---")
+from Main import Admin
+
+bench_admin = Admin("bench", "pw", "bench@example.com", "40", "Active", 0, ["view_sales", "View Reports", "export_data"], "Manager", "Ops", 3, False)
+actions = list(Permissions.ACTIONS) * 1000
+access = Permissions.AccessControl()
+
+
+def check_by_list():
+    # What a check costs when the permission list and clearance are consulted on every action
+    return [action in [name.lower().replace(" ", "_") for name in bench_admin.get_permission_list()]
+            and Permissions.ACTIONS[action][1] <= bench_admin.get_security_clearance_level() for action in actions]
+
+
+mask = access.compile_admin(bench_admin)
+list_ms = best_time(check_by_list)
+mask_ms = best_time(lambda: [Permissions.AccessControl.allows(mask, action) for action in actions])
+compile_us = best_time(lambda: access.compile_admin(bench_admin)) * 1000
+print(f"{len(actions)} checks: permission list {list_ms:.2f} ms, bitmask {mask_ms:.2f} ms; cached login compile {compile_us:.1f} us")
+
+audit_path = os.path.join(work_dir, "audit.log")
+for batch_size in (1, 100):
+    audit = Permissions.AuditLog(audit_path, batch_size)
+    start = time.perf_counter()
+    for _ in range(500):
+        audit.record("bench", "search_records", 3)
+    audit.close()
+    print(f"500 audited actions, batch of {batch_size}: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+# Park Schedule Benchmark
+print("--- Park Schedule Benchmark ---")
+import random
+from datetime import datetime, timedelta
+
+random.seed(7)
+day_start = datetime(2025, 7, 1, 8, 0)
+bench_schedule = Schedule.ParkSchedule()
+scheduled = []
+for number in range(20000):
+    start = day_start + timedelta(days=random.randrange(90), minutes=random.randrange(0, 14 * 60, 15))
+    scheduled.append(bench_schedule.add_slot(f"Attraction {number % 400}-{number}", start, start + timedelta(minutes=random.choice((15, 30, 45, 60)))))
+moments = [day_start + timedelta(days=random.randrange(90), minutes=random.randrange(14 * 60)) for _ in range(1000)]
+scan_ms = best_time(lambda: [[entry for entry in scheduled if entry.get_start() <= moment < entry.get_end()] for moment in moments], repeat=3)
+tree_ms = best_time(lambda: [bench_schedule.running(moment) for moment in moments])
+print(f"{len(moments)} 'running now' queries over {len(scheduled)} slots: linear scan {scan_ms:.0f} ms, interval tree {tree_ms:.1f} ms")
+
+# Demand Forecast Benchmark
+print("--- Demand Forecast Benchmark ---")
+from datetime import date
+
+forecast_start = date(2022, 1, 1)
+sales_history = {
+    (forecast_start + timedelta(days=offset)).isoformat(): {f"Ticket {number}": random.randrange(20, 400) for number in range(20)}
+    for offset in range(3 * 365)
+}
+closing_days = sorted(sales_history)[-30:]
+closed_before = {day: quantities for day, quantities in sales_history.items() if day < closing_days[0]}
+fit_ms = best_time(lambda: Forecast.DemandForecast.fit(sales_history, "2025-01-01"), repeat=3)
+
+
+def refit_each_day():
+    # What closing a day costs when the forecast is refitted from the whole history
+    history = dict(closed_before)
+    for day in closing_days:
+        history[day] = sales_history[day]
+        Forecast.DemandForecast.fit(history, date.fromisoformat(day) + timedelta(days=1)).forecast(days=30)
+
+
+def close_each_day():
+    demand = Forecast.DemandForecast.fit(closed_before, closing_days[0])
+    demand.forecast(days=30)
+    start = time.perf_counter()
+    for day in closing_days:
+        demand.close_day(day, sales_history[day])
+        demand.forecast(days=30)
+    return (time.perf_counter() - start) * 1000
+
+
+refit_ms = best_time(refit_each_day, repeat=1)
+incremental_ms = min(close_each_day() for _ in range(3))
+cached_demand = Forecast.DemandForecast.fit(sales_history, "2025-01-01")
+cached_demand.forecast(days=30)
+read_us = best_time(lambda: cached_demand.forecast(days=30)) * 1000
+print(f"{len(sales_history)} days x 20 tickets fitted in {fit_ms:.0f} ms; closing 30 days: refit {refit_ms:.0f} ms, "
+      f"incremental {incremental_ms:.1f} ms; cached 30-day forecast {read_us:.0f} us")
+
+# Parallel Report Benchmark
+if __name__ == "__main__":
+    print("--- Parallel Report Benchmark ---")
+    log_path = os.path.join(work_dir, "report_orders.log")
+    with Storage.OrderLog(log_path) as order_log:
+        for order_id, order in sample_orders(200000).items():
+            order_log.append(order_id, order)
+    prices = {"Single-Day Pass": 50.0, "Multi-Day Pass": 120.0, "Group Pass": 200.0}
+    reference = Reports.build_report(Storage.read_order_log_range(log_path), prices)
+    single_ms = best_time(lambda: Reports.build_report(Storage.read_order_log_range(log_path), prices), repeat=1)
+    print(f"reference: {single_ms:.0f} ms")
+    for workers in (1, 2, 4, 8):
+        parallel_ms = best_time(lambda: Reports.build_report_parallel(log_path, prices, workers=workers), repeat=1)
+        matches = Reports.build_report_parallel(log_path, prices, workers=workers) == reference
+        print(f"{workers} workers: {parallel_ms:.0f} ms (matches reference: {matches})")
+
+    print("--- Screen Navigation Benchmark ---")
+    import tkinter as tk
+    import GUI
+    import Screens
+
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        root = None
+        print("skipped (no display)")
+    if root is not None:
+        os.chdir(work_dir)
+        app = GUI.AccountAndTicketApp(root)
+        app.current_user, app.current_role = "bench", "Admin"
+        app.permissions = app.access.compile("Admin")
+        route = ["dashboard", "admin_dashboard", "ticket_sales", "admin_dashboard", "discounts", "admin_dashboard", "export", "dashboard", "login"]
+
+        def cached_route():
+            for name in route:
+                app.screens.show(name)
+
+        cached_route()
+        widgets_before = Screens.count_widgets(root)
+        cached_ms = best_time(cached_route, repeat=20) / len(route)
+        print(f"widgets after first round: {widgets_before}, after 20 more rounds: {Screens.count_widgets(root)}")
+        for name, stats in sorted(app.screens.get_stats().items()):
+            print(f"  {name}: {stats['shows']} shows, {stats['average_ms']:.2f} ms average")
+
+        # The old behavior, on a second app: every navigation builds a fresh widget tree
+        baseline = GUI.AccountAndTicketApp(root)
+        baseline.current_user, baseline.current_role = "bench", "Admin"
+        baseline.permissions = baseline.access.compile("Admin")
+        screens = {
+            "dashboard": (baseline.build_dashboard, baseline.refresh_dashboard),
+            "admin_dashboard": (baseline.build_admin_dashboard, baseline.refresh_admin_dashboard),
+            "ticket_sales": (baseline.build_ticket_sales, baseline.refresh_ticket_sales),
+            "discounts": (baseline.build_discounts, baseline.refresh_discounts),
+            "export": (baseline.build_export, None),
+            "login": (baseline.build_login_page, baseline.refresh_login_page),
+        }
+
+        def rebuild_route():
+            for name in route:
+                build, refresh = screens[name]
+                frame = tk.Frame(root)
+                build(frame)
+                if refresh is not None:
+                    refresh()
+                frame.pack()
+                root.update_idletasks()
+                frame.destroy()
+
+        rebuild_ms = best_time(rebuild_route, repeat=20) / len(route)
+        print(f"per navigation: rebuild {rebuild_ms:.2f} ms, cached screens {cached_ms:.2f} ms")
+        root.destroy()
+
+    print("--- Search Index Benchmark ---")
+    start = time.perf_counter()
+    search_index = Search.SearchIndex()
+    for number in range(500000):
+        Search.index_account(search_index, f"customer{number}", {"role": "Customer", "name": f"Guest {number % 9000}", "email": f"customer{number}@example.com", "phone": f"555-{number:07d}"})
+    for order_id, order in sample_orders(500000).items():
+        Search.index_order(search_index, order_id, order)
+    print(f"1M records indexed in {time.perf_counter() - start:.1f} s")
+    for query in ("c", "customer12", "customer123@ex", "555-00012", "group 2024-12-0", "guest 42", "ORDER-99"):
+        print(f"{query!r}: {best_time(lambda: search_index.search(query)):.2f} ms")
@@ -0,0 +1,292 @@
+import argparse
+import csv
+import json
+import os
+import time
+from datetime import datetime
+import Archive
+import Storage
+
+BATCH_SIZE = 5000
+ROLES = ("Admin", "Customer")
+
+
+class ImportValidationError(Exception):
+    """
+    Raised when an imported record fails validation.
+    """
+
+
+def read_records(file_path: str):
+    """
+    Streams records from a CSV (with a header row) or JSONL file.
+
+    A JSONL line that is not valid JSON is yielded as an
+    ImportValidationError in place of the record, so the importer rejects
+    it with its line number and carries on.
+
+    Yields:
+        tuple: (line number, record dict) for every data row.
+    """
+    with open(file_path, newline="", encoding="utf-8") as f:
+        if file_path.lower().endswith((".jsonl", ".json")):
+            for line_number, line in enumerate(f, start=1):
+                if line.strip():
+                    try:
+                        yield line_number, json.loads(line)
+                    except ValueError as error:
+                        yield line_number, ImportValidationError(f"malformed JSON: {error}")
+        else:
+            for line_number, row in enumerate(csv.DictReader(f), start=2):
+                yield line_number, row
+
+
+def _check_record(record):
+    if isinstance(record, ImportValidationError):
+        raise record
+    if not isinstance(record, dict):
+        raise ImportValidationError(f"expected an object, got {type(record).__name__}")
+
+
+def validate_order(record: dict) -> tuple:
+    """
+    Validates and normalizes one imported order.
+
+    Returns:
+        tuple: (order_id, order) ready to append to the order log.
+
+    Raises:
+        ImportValidationError: If the record is not an object or a field is missing or malformed.
+    """
+    _check_record(record)
+    for field in ("order_id", "customer", "ticket", "quantity", "total_price", "order_date"):
+        if record.get(field) in (None, ""):
+            raise ImportValidationError(f"missing {field}")
+    try:
+        quantity = int(record["quantity"])
+        total_price = float(record["total_price"])
+        datetime.strptime(record["order_date"], "%Y-%m-%d")
+        visit_date = record.get("visit_date") or record["order_date"]
+        datetime.strptime(visit_date, "%Y-%m-%d")
+    except (ValueError, TypeError) as error:
+        raise ImportValidationError(str(error))
+    if quantity <= 0 or total_price < 0:
+        raise ImportValidationError("quantity must be positive and total_price not negative")
+    return str(record["order_id"]), {
+        "customer": str(record["customer"]),
+        "ticket": str(record["ticket"]),
+        "quantity": quantity,
+        "total_price": total_price,
+        "order_date": record["order_date"],
+        "visit_date": visit_date,
+    }
+
+
+def validate_account(record: dict) -> tuple:
+    """
+    Validates and normalizes one imported account.
+
+    Returns:
+        tuple: (username, account) ready to store in the accounts store.
+
+    Raises:
+        ImportValidationError: If the record is not an object, a field is missing or the role is unknown.
+    """
+    _check_record(record)
+    for field in ("username", "password", "role"):
+        if not record.get(field):
+            raise ImportValidationError(f"missing {field}")
+    if record["role"] not in ROLES:
+        raise ImportValidationError(f"unknown role {record['role']!r}")
+    return str(record["username"]), {"password": str(record["password"]), "role": record["role"]}
+
+
+class ProgressReporter:
+    """
+    Prints import progress and throughput at a fixed record interval.
+    """
+
+    def __init__(self, every: int = 100000, output=print):
+        """
+        Initializes a new ProgressReporter.
+
+        Args:
+            every (int): Number of records between progress lines.
+            output (callable): Function used to print progress lines.
+        """
+        self.__every = every
+        self.__output = output
+        self.__start = time.perf_counter()
+        self.__next = every
+
+    def update(self, processed: int, imported: int, rejected: int):
+        if processed >= self.__next:
+            self.__next += self.__every
+            self.report(processed, imported, rejected)
+
+    def report(self, processed: int, imported: int, rejected: int):
+        elapsed = max(time.perf_counter() - self.__start, 1e-9)
+        self.__output(f"{processed} records read, {imported} imported, {rejected} rejected ({processed / elapsed:,.0f} records/s)")
+
+
+class BulkImporter:
+    """
+    Streams historical orders and accounts into the stores in batches.
+
+    Orders are appended to the order log one batch per write and fsync. The
+    daily sales rollup and the accounts snapshot are each written once, in
+    finish(), instead of after every record.
+
+    The rollup of every order date in the input is recounted from the order
+    log and archive rather than added to, so re-running an import that
+    crashed after appending some batches repairs the rollup even though
+    those orders are now rejected as duplicates.
+    """
+
+    def __init__(self, orders_file="orders.log", sales_file="sales.snap", accounts_file="accounts.snap", batch_size=BATCH_SIZE, progress=None, archive_dir=None):
+        """
+        Opens the stores that will receive imported records.
+
+        Args:
+            orders_file (str): Path to the order log.
+            sales_file (str): Path to the sales snapshot.
+            accounts_file (str): Path to the accounts snapshot.
+            batch_size (int): Number of orders appended per write.
+            progress (ProgressReporter): Optional progress reporter.
+            archive_dir (str): Directory of the log's archive segments; defaults to "archive" next to the log.
+        """
+        self.__orders_file = orders_file
+        self.__archive_dir = archive_dir if archive_dir else os.path.join(os.path.dirname(orders_file), "archive")
+        # Orders archived since an earlier import are duplicates too
+        self.__orders = Archive.TieredOrders(Storage.OrderLog(orders_file), Archive.OrderArchive(self.__archive_dir))
+        self.__sales_file = sales_file
+        self.__accounts_file = accounts_file
+        self.__sales = Storage.load_store(sales_file, "sales")
+        self.__accounts = Storage.load_store(accounts_file, "accounts")
+        self.__batch_size = batch_size
+        self.__progress = progress if progress else ProgressReporter()
+        self.__processed = 0
+        self.__imported = 0
+        self.__rejected = []
+        self.__accounts_changed = False
+        self.__sales_dates = set()
+
+    # Getters
+    def get_imported(self) -> int:
+        return self.__imported
+
+    def get_rejected(self) -> list:
+        return self.__rejected
+
+    # Internal helpers
+    def __reject(self, source, line_number, reason):
+        self.__rejected.append((source, line_number, reason))
+
+    def __recount_sales(self):
+        """
+        Recounts the rollup of every imported order date from the order log and archive.
+        """
+        rollup = {day: {} for day in self.__sales_dates}
+        for path in Archive.OrderArchive.list_segments(self.__archive_dir):
+            if Archive.segment_in_range(path, min(rollup), max(rollup)):
+                segment = Archive.ArchiveSegment(path)
+                try:
+                    self.__add_to_rollup(rollup, segment.items())
+                finally:
+                    segment.close()
+        self.__add_to_rollup(rollup, Storage.read_order_log_range(self.__orders_file))
+        for day, daily in rollup.items():
+            if daily:
+                self.__sales[day] = daily
+
+    @staticmethod
+    def __add_to_rollup(rollup: dict, orders):
+        for _, order in orders:
+            daily = rollup.get(order["order_date"])
+            if daily is not None:
+                daily[order["ticket"]] = daily.get(order["ticket"], 0) + order["quantity"]
+
+    # Behavioral Methods
+    def import_orders(self, records, source: str = ""):
+        """
+        Imports (line number, record) pairs as orders.
+
+        Orders whose ID already exists in the log or archive are rejected, but their
+        dates are still recounted in finish().
+        """
+        batch = []
+        seen = set()
+        for line_number, record in records:
+            self.__processed += 1
+            try:
+                order_id, order = validate_order(record)
+                self.__sales_dates.add(order["order_date"])
+                if order_id in seen or order_id in self.__orders:
+                    raise ImportValidationError(f"duplicate order ID {order_id}")
+            except ImportValidationError as error:
+                self.__reject(source, line_number, str(error))
+            else:
+                seen.add(order_id)
+                batch.append((order_id, order))
+                if len(batch) >= self.__batch_size:
+                    # Once appended, the log's tail index catches later duplicates
+                    self.__imported += self.__orders.get_order_log().append_batch(batch)
+                    batch = []
+                    seen = set()
+            self.__progress.update(self.__processed, self.__imported + len(batch), len(self.__rejected))
+        if batch:
+            self.__imported += self.__orders.get_order_log().append_batch(batch)
+
+    def import_accounts(self, records, source: str = ""):
+        """
+        Imports (line number, record) pairs as accounts.
+
+        Usernames that already exist are rejected, matching create_account.
+        """
+        for line_number, record in records:
+            self.__processed += 1
+            try:
+                username, account = validate_account(record)
+                if username in self.__accounts:
+                    raise ImportValidationError(f"username {username} already exists")
+            except ImportValidationError as error:
+                self.__reject(source, line_number, str(error))
+            else:
+                self.__accounts[username] = account
+                self.__accounts_changed = True
+                self.__imported += 1
+            self.__progress.update(self.__processed, self.__imported, len(self.__rejected))
+
+    def finish(self):
+        """
+        Rebuilds the order index, recounts the imported dates' sales and writes the sales and accounts stores once.
+        """
+        self.__orders.close()
+        if self.__sales_dates:
+            self.__recount_sales()
+            Storage.write_snapshot(self.__sales_file, "sales", self.__sales)
+        if self.__accounts_changed:
+            Storage.write_snapshot(self.__accounts_file, "accounts", self.__accounts)
+        self.__progress.report(self.__processed, self.__imported, len(self.__rejected))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import historical orders or accounts from CSV or JSONL files.")
+    parser.add_argument("kind", choices=["orders", "accounts"])
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--orders-file", default="orders.log")
+    parser.add_argument("--sales-file", default="sales.snap")
+    parser.add_argument("--accounts-file", default="accounts.snap")
+    parser.add_argument("--archive-dir", help="Archive directory of the order log; defaults to \"archive\" next to it")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    importer = BulkImporter(args.orders_file, args.sales_file, args.accounts_file, args.batch_size, archive_dir=args.archive_dir)
+    for file_path in args.files:
+        if args.kind == "orders":
+            importer.import_orders(read_records(file_path), file_path)
+        else:
+            importer.import_accounts(read_records(file_path), file_path)
+    importer.finish()
+    for source, line_number, reason in importer.get_rejected()[:20]:
+        print(f"Rejected {source}:{line_number}: {reason}")
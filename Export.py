@@ -0,0 +1,248 @@
+import argparse
+import csv
+import os
+import struct
+import zlib
+from array import array
+import Archive
+import Storage
+
+COLUMNAR_MAGIC = b"TKCL"
+COLUMNAR_VERSION = 1
+# magic, format version, column count
+COLUMNAR_HEADER = struct.Struct("<4sHH")
+# row count, column block count
+ROW_GROUP_HEADER = struct.Struct("<II")
+# row group count, total rows, offset of the row group table
+COLUMNAR_FOOTER = struct.Struct("<IQQ")
+LENGTH = struct.Struct("<I")
+CHUNK_SIZE = 10000
+
+
+def _in_range(value: str, date_from: str, date_to: str) -> bool:
+    return (date_from is None or value >= date_from) and (date_to is None or value <= date_to)
+
+
+def iter_orders(log_path: str, date_from: str = None, date_to: str = None, archive_dir: str = None):
+    """
+    Streams order rows from the archive and the order log, optionally filtered by order date.
+
+    Archive segments whose month lies outside the date range are skipped
+    without being opened.
+
+    Args:
+        archive_dir (str): Optional directory of the log's archive segments.
+
+    Yields:
+        tuple: One row per order, in the column order of the orders schema.
+    """
+    names = [name for name, _ in Storage.SCHEMAS.get("orders").get_fields()]
+    segment_paths = Archive.OrderArchive.list_segments(archive_dir) if archive_dir else []
+    for segment_path in segment_paths:
+        if not Archive.segment_in_range(segment_path, date_from, date_to):
+            continue
+        segment = Archive.ArchiveSegment(segment_path)
+        try:
+            for order_id, order in segment.items():
+                if _in_range(order["order_date"], date_from, date_to):
+                    order["order_id"] = order_id
+                    yield tuple(order[name] for name in names)
+        finally:
+            segment.close()
+    for order_id, order in Storage.read_order_log_range(log_path):
+        if _in_range(order["order_date"], date_from, date_to):
+            order["order_id"] = order_id
+            yield tuple(order[name] for name in names)
+
+
+def iter_sales(snapshot_path: str, date_from: str = None, date_to: str = None):
+    """
+    Streams daily sales rows from the sales snapshot, optionally filtered by date.
+
+    Yields:
+        tuple: One (date, ticket, quantity) row per day and ticket type.
+    """
+    names = [name for name, _ in Storage.SCHEMAS.get("sales").get_fields()]
+    if Storage.find_latest_generation(snapshot_path) is None and not os.path.exists(snapshot_path):
+        return
+    with Storage.SnapshotReader(snapshot_path) as reader:
+        for record in reader.iter_records():
+            if _in_range(record["date"], date_from, date_to):
+                yield tuple(record[name] for name in names)
+
+
+def chunked(rows, chunk_size: int = CHUNK_SIZE):
+    """
+    Groups a stream of rows into lists of at most chunk_size rows.
+    """
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def export_csv(rows, columns: list, file_path: str, chunk_size: int = CHUNK_SIZE) -> int:
+    """
+    Writes a stream of rows to a CSV file one chunk at a time.
+
+    Args:
+        rows (iterable[tuple]): Rows to export.
+        columns (list[tuple]): (name, kind) pairs describing the rows.
+        file_path (str): Destination CSV file.
+        chunk_size (int): Number of rows held in memory at once.
+
+    Returns:
+        int: Number of rows written.
+    """
+    count = 0
+    with open(file_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow([name for name, _ in columns])
+        for chunk in chunked(rows, chunk_size):
+            writer.writerows(chunk)
+            count += len(chunk)
+    return count
+
+
+def _encode_column(values: list, kind: str) -> bytes:
+    if kind == "str":
+        out = bytearray()
+        for value in values:
+            encoded = str(value).encode("utf-8")
+            out += LENGTH.pack(len(encoded)) + encoded
+        return bytes(out)
+    return struct.pack(f"<{len(values)}{'I' if kind == 'u32' else 'd'}", *values)
+
+
+def _decode_column(data: bytes, kind: str, count: int) -> list:
+    if kind == "str":
+        values = []
+        offset = 0
+        for _ in range(count):
+            (length,) = LENGTH.unpack_from(data, offset)
+            offset += LENGTH.size
+            values.append(data[offset:offset + length].decode("utf-8"))
+            offset += length
+        return values
+    return list(struct.unpack(f"<{count}{'I' if kind == 'u32' else 'd'}", data))
+
+
+def export_columnar(rows, columns: list, file_path: str, chunk_size: int = CHUNK_SIZE) -> int:
+    """
+    Writes a stream of rows to a compressed columnar file.
+
+    Every chunk of rows becomes a row group in which each column is stored
+    as one contiguous, zlib-compressed block. A table of row group offsets
+    is written at the end, so readers can fetch single columns or row
+    groups without scanning the whole file.
+
+    Args:
+        rows (iterable[tuple]): Rows to export.
+        columns (list[tuple]): (name, kind) pairs describing the rows.
+        file_path (str): Destination file.
+        chunk_size (int): Number of rows per row group.
+
+    Returns:
+        int: Number of rows written.
+    """
+    group_offsets = array("Q")
+    count = 0
+    with open(file_path, "wb") as f:
+        f.write(COLUMNAR_HEADER.pack(COLUMNAR_MAGIC, COLUMNAR_VERSION, len(columns)))
+        for name, kind in columns:
+            encoded = name.encode("utf-8")
+            f.write(LENGTH.pack(len(encoded)) + encoded + kind.encode("ascii").ljust(3))
+        for chunk in chunked(rows, chunk_size):
+            group_offsets.append(f.tell())
+            f.write(ROW_GROUP_HEADER.pack(len(chunk), len(columns)))
+            for position, (_, kind) in enumerate(columns):
+                block = zlib.compress(_encode_column([row[position] for row in chunk], kind))
+                f.write(LENGTH.pack(len(block)) + block)
+            count += len(chunk)
+        table_offset = f.tell()
+        f.write(struct.pack(f"<{len(group_offsets)}Q", *group_offsets))
+        f.write(COLUMNAR_FOOTER.pack(len(group_offsets), count, table_offset))
+    return count
+
+
+def read_columnar(file_path: str, names: list = None):
+    """
+    Streams rows back out of a columnar file, one row group at a time.
+
+    Args:
+        file_path (str): The columnar file.
+        names (list[str]): Optional subset of columns to read; other column
+            blocks are skipped without being decompressed.
+
+    Yields:
+        tuple: One row per record, containing the requested columns.
+    """
+    with open(file_path, "rb") as f:
+        magic, version, column_count = COLUMNAR_HEADER.unpack(f.read(COLUMNAR_HEADER.size))
+        if magic != COLUMNAR_MAGIC or version != COLUMNAR_VERSION:
+            raise Storage.SnapshotError(f"{file_path} is not a version {COLUMNAR_VERSION} columnar export.")
+        columns = []
+        for _ in range(column_count):
+            (length,) = LENGTH.unpack(f.read(LENGTH.size))
+            columns.append((f.read(length).decode("utf-8"), f.read(3).decode("ascii").strip()))
+        wanted = [position for position, (name, _) in enumerate(columns) if names is None or name in names]
+
+        f.seek(-COLUMNAR_FOOTER.size, 2)
+        group_count, _, table_offset = COLUMNAR_FOOTER.unpack(f.read(COLUMNAR_FOOTER.size))
+        f.seek(table_offset)
+        group_offsets = struct.unpack(f"<{group_count}Q", f.read(group_count * 8))
+
+        for group_offset in group_offsets:
+            f.seek(group_offset)
+            row_count, _ = ROW_GROUP_HEADER.unpack(f.read(ROW_GROUP_HEADER.size))
+            decoded = {}
+            for position, (_, kind) in enumerate(columns):
+                (length,) = LENGTH.unpack(f.read(LENGTH.size))
+                if position in wanted:
+                    decoded[position] = _decode_column(zlib.decompress(f.read(length)), kind, row_count)
+                else:
+                    f.seek(length, 1)
+            yield from zip(*(decoded[position] for position in wanted))
+
+
+def export_store(store: str, source_path: str, file_path: str, file_format: str = "csv", date_from: str = None, date_to: str = None, archive_dir: str = None) -> int:
+    """
+    Exports the orders or sales store to a CSV or columnar file.
+
+    Args:
+        store (str): "orders" or "sales".
+        source_path (str): The order log or sales snapshot to read.
+        file_path (str): Destination file.
+        file_format (str): "csv" or "columnar".
+        date_from (str): Optional first date to include ("YYYY-MM-DD").
+        date_to (str): Optional last date to include ("YYYY-MM-DD").
+        archive_dir (str): Archive segments to include with the order log.
+
+    Returns:
+        int: Number of rows written.
+    """
+    rows = iter_orders(source_path, date_from, date_to, archive_dir) if store == "orders" else iter_sales(source_path, date_from, date_to)
+    columns = Storage.SCHEMAS.get(store).get_fields()
+    if file_format == "columnar":
+        return export_columnar(rows, columns, file_path)
+    return export_csv(rows, columns, file_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export orders or daily sales to CSV or a columnar file.")
+    parser.add_argument("store", choices=["orders", "sales"])
+    parser.add_argument("output")
+    parser.add_argument("--format", choices=["csv", "columnar"], default="csv")
+    parser.add_argument("--source", help="Order log or sales snapshot (defaults to orders.log / sales.snap).")
+    parser.add_argument("--from", dest="date_from", help="First date to include (YYYY-MM-DD).")
+    parser.add_argument("--to", dest="date_to", help="Last date to include (YYYY-MM-DD).")
+    parser.add_argument("--archive-dir", default="archive", help="Archived orders to include (default: archive).")
+    args = parser.parse_args()
+    source = args.source or ("orders.log" if args.store == "orders" else "sales.snap")
+    archive_dir = args.archive_dir if args.store == "orders" and os.path.isdir(args.archive_dir) else None
+    written = export_store(args.store, source, args.output, args.format, args.date_from, args.date_to, archive_dir)
+    print(f"Exported {written} {args.store} rows to {args.output}")
@@ -0,0 +1,292 @@
+import argparse
+import math
+from array import array
+from datetime import date, timedelta
+import RideCatalog
+import Schedule
+import Storage
+
+FORECAST_DAYS = 30
+# Weight of the newest closed day in a baseline once it has this many days of history
+SMOOTHING = 0.2
+# Fixed-date holidays ("MM-DD") whose demand is modeled separately from the weekday baseline
+HOLIDAYS = ("01-01", "02-14", "07-04", "10-31", "12-24", "12-25", "12-26", "12-31")
+# Guests admitted per ticket, for tickets that admit more than one
+GUESTS_PER_TICKET = {"Group Pass": 5}
+RIDES_PER_GUEST = 6
+GUESTS_PER_STAFF = 50
+
+
+def _to_date(value) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+class TicketModel:
+    """
+    Seasonal baseline of one ticket type's daily sales.
+
+    Each weekday has its own baseline, a running mean that turns into an
+    exponentially weighted mean once the weekday has enough history, so one
+    closed day is folded in with a constant amount of work. Holidays are
+    kept out of the weekday baselines and tracked as a ratio to them.
+
+    Attributes:
+        baselines (array): Expected sales per weekday, Monday first.
+        observations (array): Closed days seen per weekday.
+        holiday_ratio (float): Holiday sales relative to the weekday baseline.
+        holidays_seen (int): Holidays with a baseline to compare against.
+    """
+
+    __slots__ = ("__baselines", "__observations", "__holiday_ratio", "__holidays_seen")
+
+    def __init__(self):
+        self.__baselines = array("d", [0.0]) * 7
+        self.__observations = array("L", [0] * 7)
+        self.__holiday_ratio = 1.0
+        self.__holidays_seen = 0
+
+    # Getters
+    def get_baselines(self) -> array:
+        return self.__baselines
+
+    def get_holiday_ratio(self) -> float:
+        return self.__holiday_ratio
+
+    # Behavioral Methods
+    def observe(self, weekday: int, quantity: float, holiday: bool = False):
+        """
+        Folds one closed day's sales into the model.
+        """
+        if holiday:
+            baseline = self.__baselines[weekday]
+            if baseline > 0:
+                self.__holidays_seen += 1
+                weight = max(SMOOTHING, 1 / self.__holidays_seen)
+                self.__holiday_ratio += weight * (quantity / baseline - self.__holiday_ratio)
+            return
+        self.__observations[weekday] += 1
+        weight = max(SMOOTHING, 1 / self.__observations[weekday])
+        self.__baselines[weekday] += weight * (quantity - self.__baselines[weekday])
+
+    def predict(self, weekday: int, holiday: bool = False) -> float:
+        return self.__baselines[weekday] * (self.__holiday_ratio if holiday else 1.0)
+
+
+class DemandForecast:
+    """
+    Expected daily ticket sales per ticket type, fitted from a park's sales rollup.
+
+    History is loaded into one array per ticket type, covering every day
+    from the first to the last closed day, and the models are fitted from
+    those arrays in one pass. After that, only newly closed days are folded
+    in by update(). Forecast days are cached. Closing a day recomputes only
+    the cached days that share its weekday, or the holidays when a holiday
+    closes. Days on which the park is closed are forecast at zero.
+    """
+
+    def __init__(self, holidays=HOLIDAYS, operating_hours: Schedule.OperatingHours = None):
+        """
+        Initializes an empty forecast.
+
+        Args:
+            holidays (iterable): Holidays as "MM-DD" (every year) or "YYYY-MM-DD".
+            operating_hours (Schedule.OperatingHours): The park's hours; defaults to always open.
+        """
+        self.__holidays = set(holidays)
+        self.__hours = operating_hours if operating_hours else Schedule.OperatingHours()
+        self.__models = {}
+        self.__last_closed = None
+        self.__cache = {}
+
+    @classmethod
+    def fit(cls, sales: dict, today=None, **options):
+        """
+        Builds a forecast from a sales rollup, using every day before today.
+
+        Args:
+            sales (dict): Quantity per ticket type per "YYYY-MM-DD" date.
+            today (date | str): The first day whose rollup is still open; defaults to today.
+        """
+        forecast = cls(**options)
+        forecast.update(sales, today)
+        return forecast
+
+    # Internal helpers
+    def __is_holiday(self, day: date) -> bool:
+        iso = day.isoformat()
+        return iso[5:] in self.__holidays or iso in self.__holidays
+
+    def __predict(self, day: date) -> dict:
+        if not self.__hours.is_open_on(day):
+            return {ticket: 0.0 for ticket in self.__models}
+        weekday, holiday = day.weekday(), self.__is_holiday(day)
+        return {ticket: model.predict(weekday, holiday) for ticket, model in self.__models.items()}
+
+    # Getters
+    def get_ticket_types(self) -> list:
+        return list(self.__models)
+
+    def get_model(self, ticket_type: str) -> TicketModel:
+        return self.__models[ticket_type]
+
+    def get_last_closed(self) -> date:
+        return self.__last_closed
+
+    # Behavioral Methods
+    def update(self, sales: dict, today=None) -> int:
+        """
+        Folds every day before today that has closed since the last update into the models.
+
+        Days with no rollup in between closed days count as days without
+        sales, unless the park was closed on them.
+
+        Returns:
+            int: Number of days folded in.
+        """
+        today = _to_date(today) if today else date.today()
+        dates = sorted(_to_date(day) for day in sales)
+        first = self.__last_closed + timedelta(days=1) if self.__last_closed else (dates[0] if dates else today)
+        closing = [day for day in dates if first <= day < today]
+        if not closing:
+            return 0
+        span = (closing[-1] - first).days + 1
+        # One column of daily quantities per ticket type, covering the whole span
+        history = {}
+        for day in closing:
+            for ticket, quantity in sales[day.isoformat()].items():
+                history.setdefault(ticket, array("d", [0.0]) * span)[(day - first).days] = quantity
+        for ticket in history:
+            self.__models.setdefault(ticket, TicketModel())
+        closed_weekdays, holiday_closed = set(), False
+        for offset in range(span):
+            day = first + timedelta(days=offset)
+            if not self.__hours.is_open_on(day):
+                continue
+            weekday, holiday = day.weekday(), self.__is_holiday(day)
+            for ticket, model in self.__models.items():
+                column = history.get(ticket)
+                model.observe(weekday, column[offset] if column else 0.0, holiday)
+            holiday_closed = holiday_closed or holiday
+            if not holiday:
+                closed_weekdays.add(weekday)
+        self.__last_closed = closing[-1]
+        for day in list(self.__cache):
+            if day <= self.__last_closed:
+                del self.__cache[day]
+            elif self.__is_holiday(day) and holiday_closed or day.weekday() in closed_weekdays or len(self.__cache[day]) != len(self.__models):
+                self.__cache[day] = self.__predict(day)
+        return span
+
+    def close_day(self, day, quantities: dict):
+        """
+        Folds one day's final rollup into the models.
+
+        Args:
+            day (date | str): The day that closed; it must follow the last closed day.
+            quantities (dict): Quantity per ticket type sold that day.
+
+        Raises:
+            ValueError: If the day is not after the last closed day.
+        """
+        day = _to_date(day)
+        if self.__last_closed and day <= self.__last_closed:
+            raise ValueError(f"{day.isoformat()} is already closed.")
+        self.update({day.isoformat(): quantities}, day + timedelta(days=1))
+
+    def forecast(self, start=None, days: int = FORECAST_DAYS) -> list:
+        """
+        Returns expected sales for a run of days.
+
+        Args:
+            start (date | str): First day to forecast; defaults to today.
+            days (int): Number of days.
+
+        Returns:
+            list[tuple]: (date, {ticket type: expected quantity}) per day.
+        """
+        start = _to_date(start) if start else date.today()
+        result = []
+        for offset in range(days):
+            day = start + timedelta(days=offset)
+            expected = self.__cache.get(day)
+            if expected is None:
+                expected = self.__cache[day] = self.__predict(day)
+            result.append((day, expected))
+        return result
+
+    def expected_demand(self, start=None, days: int = FORECAST_DAYS) -> dict:
+        """
+        Returns total expected sales per ticket type over a run of days.
+        """
+        totals = dict.fromkeys(self.__models, 0.0)
+        for _, expected in self.forecast(start, days):
+            for ticket, quantity in expected.items():
+                totals[ticket] += quantity
+        return totals
+
+
+def capacity_shortfalls(forecast: list, capacities: dict) -> list:
+    """
+    Returns the forecast days on which expected sales exceed a ticket type's daily capacity.
+
+    Args:
+        forecast (list): Output of DemandForecast.forecast().
+        capacities (dict): Daily capacity per ticket type.
+
+    Returns:
+        list[tuple]: (date, ticket type, expected quantity, capacity).
+    """
+    return [
+        (day, ticket, quantity, capacities[ticket])
+        for day, expected in forecast
+        for ticket, quantity in expected.items()
+        if ticket in capacities and quantity > capacities[ticket]
+    ]
+
+
+def staffing_plan(forecast: list, park=None, guests_per_staff: int = GUESTS_PER_STAFF) -> list:
+    """
+    Turns forecast ticket sales into expected guests, ride load and staff per day.
+
+    Expected ride demand is shared across the park's open rides in
+    proportion to their hourly throughput, and compared with what the rides
+    can carry during the day's operating hours.
+
+    Args:
+        forecast (list): Output of DemandForecast.forecast().
+        park (Park): The park whose rides and hours to plan for, if known.
+        guests_per_staff (int): Guests one staff member can serve in a day.
+
+    Returns:
+        list[dict]: date, guests, staff, ride_utilization (0 when there are
+            no rides) and rides (expected riders per ride).
+    """
+    specs = [spec for spec in RideCatalog.RideCatalog.from_park(park).get_specs() if spec.is_open()] if park else []
+    hours = park.get_parsed_hours() if park else None
+    throughput = sum(spec.get_hourly_throughput() for spec in specs)
+    plan = []
+    for day, expected in forecast:
+        guests = sum(quantity * GUESTS_PER_TICKET.get(ticket, 1) for ticket, quantity in expected.items())
+        open_hours = sum((closing - opening).total_seconds() for opening, closing in hours.hours_on(day)) / 3600 if hours else 24
+        riders = guests * RIDES_PER_GUEST
+        plan.append({
+            "date": day,
+            "guests": round(guests),
+            "staff": math.ceil(guests / guests_per_staff) if guests else 0,
+            "ride_utilization": riders / (throughput * open_hours) if throughput and open_hours else 0.0,
+            "rides": {spec.get_name(): round(riders * spec.get_hourly_throughput() / throughput) for spec in specs} if throughput else {},
+        })
+    return plan
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Forecast ticket sales from a park's sales rollup.")
+    parser.add_argument("--sales", default="sales.snap")
+    parser.add_argument("--days", type=int, default=FORECAST_DAYS)
+    parser.add_argument("--hours", help="Operating hours, e.g. \"Mon-Fri 10am-6pm; Sat, Sun 9am-10pm\"")
+    args = parser.parse_args()
+    demand = DemandForecast.fit(Storage.load_store(args.sales, "sales"), operating_hours=Schedule.OperatingHours(args.hours))
+    tickets = demand.get_ticket_types()
+    print("Date        " + "".join(f"{ticket:>18}" for ticket in tickets))
+    for forecast_day, expected_sales in demand.forecast(days=args.days):
+        print(f"{forecast_day.isoformat()}  " + "".join(f"{expected_sales[ticket]:18.1f}" for ticket in tickets))
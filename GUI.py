@@ -1,8 +1,29 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-import pickle
+from tkinter import ttk, messagebox, filedialog
 import os
-from datetime import datetime
+import queue
+import threading
+from datetime import datetime, timedelta
+from functools import partial
+import Export
+import Forecast
+import Loyalty
+import Occupancy
+import Parks
+import Permissions
+import Pricing
+import Rendering
+import Reports
+import Reservations
+import Schedule
+import Screens
+import Search
+import Storage
+import Sync
+
+PRICE_POLL_MS = 250
+SYNC_POLL_MS = 100
+SYNC_CLOSE_TIMEOUT_S = 5.0
 
 
 class AccountAndTicketApp:
@@ -12,85 +33,195 @@ class AccountAndTicketApp:
         self.current_user = None
         self.current_role = None
 
-        # Initialize storage
-        self.accounts_file = "accounts.pkl"
-        self.orders_file = "orders.pkl"
-        self.sales_file = "sales.pkl"
-        self.accounts = self.load_data(self.accounts_file)
-        self.orders = self.load_data(self.orders_file)
-        self.sales = self.load_data(self.sales_file)
-
-        # Ticket Data
-        self.tickets = [
-            {"type": "Single-Day Pass", "price": 50.0, "validity": "1 Day", "features": "Access to all rides"},
-            {"type": "Multi-Day Pass", "price": 120.0, "validity": "3 Days", "features": "Access to all rides"},
-            {"type": "Group Pass", "price": 200.0, "validity": "1 Day", "features": "Access for up to 5 people"},
-        ]
-
-        # Discounts
-        self.discounts = {"Single-Day Pass": 0, "Multi-Day Pass": 0, "Group Pass": 0}
+        # Initialize storage; orders, sales and reservations are kept per park (see select_park)
+        self.accounts_file = "accounts.snap"
+        self.accounts = self.load_data(self.accounts_file, "accounts")
+        self.loyalty = Loyalty.LoyaltyLedger("loyalty.log")
+        self.occupancy = Occupancy.OccupancyCounter()
+        self.gate_feed = Occupancy.GateFeed("gate_events.csv", self.occupancy)
+        self.search_index = None  # Built on first use, then kept up to date
+
+        # Admin authorization: profiles compiled to permission bitmasks at login, actions audited in batches
+        self.access = Permissions.AccessControl()
+        self.admin_profiles = Storage.load_store("admins.snap", "admins")
+        self.audit = Permissions.AuditLog("audit.log")
+        self.permissions = 0
+
+        # Ticket catalog and discounts, shared with every kiosk process on this machine
+        self.prices = Pricing.PriceTable("prices.tbl", Pricing.DEFAULT_TICKETS)
+
+        # Daily capacity per ticket type, tracked per visit date
+        self.daily_capacity = {"Single-Day Pass": 500, "Multi-Day Pass": 200, "Group Pass": 50}
+
+        # Kiosk mode: local writes are queued in an outbox and synced whenever the central store is reachable
+        self.sync_config = Sync.load_sync_config("sync.json")
+
+        # One data shard per park; kiosks that sync add their name to their order IDs
+        self.parks = Parks.ParkRouter(Parks.load_park_directories("parks.json"), self.daily_capacity,
+                                      self.sync_config["kiosk"] if self.sync_config is not None else None)
+        # Each park's rides and operating hours, which its schedule and staffing plan are built from
+        self.parks.load_parks()
+        self.select_park(self.parks.get_park_ids()[0])
+
+        self.outbox = None
+        self.sync_worker = None
+        if self.sync_config is not None:
+            self.outbox = Sync.Outbox("outbox.log", self.sync_config["kiosk"])
+            # Sync rounds run on a worker thread and hand their results to the Tk thread through queues
+            self.pulled_accounts = queue.Queue()
+            self.sync_results = queue.Queue()
+            self.sync_engine = Sync.SyncEngine(self.outbox, self.sync_config["central"],
+                                               on_account=lambda username, record: self.pulled_accounts.put((username, record)))
+            # Renames saved before the last shutdown may not have reached the order log yet
+            self.apply_renames()
+            self.root.after(0, self.run_sync)
+
+        # Screens are built once, on first use, and refreshed each time they are shown
+        self.screens = Screens.ScreenManager(root)
+        for name, build, refresh in (
+            ("login", self.build_login_page, self.refresh_login_page),
+            ("create_account", self.build_create_account_page, self.refresh_create_account_page),
+            ("dashboard", self.build_dashboard, self.refresh_dashboard),
+            ("admin_dashboard", self.build_admin_dashboard, self.refresh_admin_dashboard),
+            ("ticket_sales", self.build_ticket_sales, self.refresh_ticket_sales),
+            ("sales_report", self.build_sales_report, self.refresh_sales_report),
+            ("forecast", self.build_forecast, self.refresh_forecast),
+            ("occupancy", self.build_occupancy, self.refresh_occupancy),
+            ("search", self.build_search, self.refresh_search),
+            ("export", self.build_export, None),
+            ("discounts", self.build_discounts, self.refresh_discounts),
+            ("buy_tickets", self.build_buy_tickets, self.refresh_buy_tickets),
+            ("payment", self.build_payment_page, self.refresh_payment_page),
+            ("customer_orders", self.build_customer_orders, self.refresh_customer_orders),
+        ):
+            self.screens.register(name, build, refresh)
+
+        self.root.after(PRICE_POLL_MS, self.watch_prices)
+
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
 
         # Login Page
         self.show_login_page()
 
-    def load_data(self, file_path):
-        """Loads data from a pickle file."""
-        if os.path.exists(file_path):
-            with open(file_path, "rb") as f:
-                return pickle.load(f)
-        return {}
-
-    def save_data(self, file_path, data):
-        """Saves data to a pickle file."""
-        with open(file_path, "wb") as f:
-            pickle.dump(data, f)
-
-    def clear_frame(self):
-        """Clears all widgets from the current frame."""
-        for widget in self.root.winfo_children():
-            widget.destroy()
+    def load_data(self, file_path, store):
+        """Loads a store from its snapshot file, migrating the legacy .pkl file if needed."""
+        legacy_path = os.path.splitext(file_path)[0] + ".pkl"
+        return Storage.load_store(file_path, store, legacy_path)
+
+    def save_data(self, file_path, store, data):
+        """Saves a store to its snapshot file."""
+        Storage.write_snapshot(file_path, store, data)
+
+    def run_sync(self):
+        """Starts a sync round on a worker thread, so a slow or unreachable central store never blocks the window."""
+        self.sync_worker = threading.Thread(target=lambda: self.sync_results.put(self.sync_engine.sync()), daemon=True)
+        self.sync_worker.start()
+        self.root.after(SYNC_POLL_MS, self.finish_sync)
+
+    def finish_sync(self):
+        """Applies the pulled accounts and renamed orders of a finished sync round and schedules the next one."""
+        try:
+            summary = self.sync_results.get_nowait()
+        except queue.Empty:
+            self.root.after(SYNC_POLL_MS, self.finish_sync)
+            return
+        pulled = False
+        while not self.pulled_accounts.empty():
+            self.receive_account(*self.pulled_accounts.get_nowait())
+            pulled = True
+        if pulled:
+            self.save_data(self.accounts_file, "accounts", self.accounts)
+        if summary is not None and summary["renamed"]:
+            self.apply_renames()
+        status = "online" if summary is not None else f"offline, {self.outbox.pending_count()} queued"
+        self.root.title(f"Account and Ticket Management System ({status})")
+        self.root.after(self.sync_config["interval_ms"], self.run_sync)
+
+    def apply_renames(self):
+        """Gives this kiosk's orders the IDs the central store assigned them in conflicts."""
+        renames = self.sync_engine.get_pending_renames()
+        if not renames:
+            return
+        if self.parks.rename_orders(renames):
+            # The renamed shard was reopened, and the search index still lists the old IDs
+            self.select_park(self.current_park)
+            self.search_index = None
+        self.sync_engine.confirm_renames(renames)
+
+    def receive_account(self, username, record):
+        """Applies an account from the central store, including the winner of a username conflict."""
+        if self.accounts.get(username) == record:
+            return
+        self.accounts[username] = record
+        if self.search_index is not None:
+            Search.index_account(self.search_index, username, record)
+
+    def select_park(self, park_id):
+        """Switches the orders, sales and reservations in use to one park's shard."""
+        shard = self.parks.shard(park_id)
+        self.current_park = park_id
+        self.orders = shard.get_orders()
+        self.orders_file = shard.get_orders_file()
+        self.sales = shard.get_sales()
+        self.sales_file = shard.get_sales_file()
+        self.reservations = shard.get_reservations()
+        self.schedule = shard.get_schedule()
 
     def show_login_page(self):
         """Displays the login page."""
-        self.clear_frame()
+        self.screens.show("login")
 
-        tk.Label(self.root, text="Login", font=("Arial", 16)).pack(pady=10)
-        tk.Label(self.root, text="Username:").pack(pady=5)
-        self.username_entry = tk.Entry(self.root)
+    def build_login_page(self, frame):
+        tk.Label(frame, text="Login", font=("Arial", 16)).pack(pady=10)
+        tk.Label(frame, text="Username:").pack(pady=5)
+        self.username_entry = tk.Entry(frame)
         self.username_entry.pack(pady=5)
 
-        tk.Label(self.root, text="Password:").pack(pady=5)
-        self.password_entry = tk.Entry(self.root, show="*")
+        tk.Label(frame, text="Password:").pack(pady=5)
+        self.password_entry = tk.Entry(frame, show="*")
         self.password_entry.pack(pady=5)
 
-        tk.Button(self.root, text="Login", command=self.login).pack(pady=10)
-        tk.Button(self.root, text="Create Account", command=self.show_create_account_page).pack(pady=5)
+        tk.Button(frame, text="Login", command=self.login).pack(pady=10)
+        tk.Button(frame, text="Create Account", command=self.show_create_account_page).pack(pady=5)
+
+    def refresh_login_page(self):
+        self.username_entry.delete(0, "end")
+        self.password_entry.delete(0, "end")
 
     def show_create_account_page(self):
         """Displays the account creation page."""
-        self.clear_frame()
+        self.screens.show("create_account")
 
-        tk.Label(self.root, text="Create Account", font=("Arial", 16)).pack(pady=10)
-        tk.Label(self.root, text="Username:").pack(pady=5)
-        self.new_username_entry = tk.Entry(self.root)
+    def build_create_account_page(self, frame):
+        tk.Label(frame, text="Create Account", font=("Arial", 16)).pack(pady=10)
+        tk.Label(frame, text="Username:").pack(pady=5)
+        self.new_username_entry = tk.Entry(frame)
         self.new_username_entry.pack(pady=5)
 
-        tk.Label(self.root, text="Password:").pack(pady=5)
-        self.new_password_entry = tk.Entry(self.root, show="*")
+        tk.Label(frame, text="Password:").pack(pady=5)
+        self.new_password_entry = tk.Entry(frame, show="*")
         self.new_password_entry.pack(pady=5)
 
-        tk.Label(self.root, text="Role:").pack(pady=5)
+        tk.Label(frame, text="Role:").pack(pady=5)
         self.role_var = tk.StringVar(value="Customer")
-        tk.OptionMenu(self.root, self.role_var, "Admin", "Customer").pack(pady=5)
+        tk.OptionMenu(frame, self.role_var, "Admin", "Customer").pack(pady=5)
+
+        tk.Button(frame, text="Submit", command=self.create_account).pack(pady=10)
+        tk.Button(frame, text="Back to Login", command=self.show_login_page).pack(pady=5)
 
-        tk.Button(self.root, text="Submit", command=self.create_account).pack(pady=10)
-        tk.Button(self.root, text="Back to Login", command=self.show_login_page).pack(pady=5)
+    def refresh_create_account_page(self):
+        self.new_username_entry.delete(0, "end")
+        self.new_password_entry.delete(0, "end")
+        self.role_var.set("Customer")
 
     def create_account(self):
         """Handles account creation."""
         username = self.new_username_entry.get()
         password = self.new_password_entry.get()
         role = self.role_var.get()
+        if role == "Admin":
+            # Self-registered admins only get the restricted role until an admin profile grants more
+            role = Permissions.SELF_REGISTERED_ADMIN
 
         if not username or not password:
             messagebox.showerror("Error", "Both fields are required!")
@@ -100,7 +231,11 @@ class AccountAndTicketApp:
             messagebox.showerror("Error", "Username already exists!")
         else:
             self.accounts[username] = {"password": password, "role": role}
-            self.save_data(self.accounts_file, self.accounts)
+            self.save_data(self.accounts_file, "accounts", self.accounts)
+            if self.outbox is not None:
+                self.outbox.append(Sync.ACCOUNT, username, self.accounts[username])
+            if self.search_index is not None:
+                Search.index_account(self.search_index, username, self.accounts[username])
             messagebox.showinfo("Success", "Account created successfully!")
             self.show_login_page()
 
@@ -112,6 +247,7 @@ class AccountAndTicketApp:
         if username in self.accounts and self.accounts[username]["password"] == password:
             self.current_user = username
             self.current_role = self.accounts[username]["role"]
+            self.permissions = self.access.compile_account(self.accounts[username], self.admin_profiles.get(username))
             messagebox.showinfo("Login Successful", f"Welcome, {username}! Role: {self.current_role}")
             self.show_dashboard()
         else:
@@ -119,98 +255,422 @@ class AccountAndTicketApp:
 
     def show_dashboard(self):
         """Displays the dashboard based on the user's role."""
-        self.clear_frame()
+        self.screens.show("dashboard")
+
+    def build_dashboard(self, frame):
+        self.welcome_label = tk.Label(frame, font=("Arial", 16))
+        self.welcome_label.pack(pady=10)
+
+        tk.Label(frame, text="Park:").pack()
+        self.park_var = tk.StringVar()
+        park_combobox = ttk.Combobox(frame, textvariable=self.park_var, values=self.parks.get_park_ids(), state="readonly")
+        park_combobox.bind("<<ComboboxSelected>>", self.on_park_selected)
+        park_combobox.pack(pady=5)
+
+        # Both role panels are built once; refresh_dashboard packs the right one
+        self.admin_panel = tk.Frame(frame)
+        tk.Button(self.admin_panel, text="Admin Dashboard", command=self.admin_dashboard).pack(pady=5)
+
+        self.customer_panel = tk.Frame(frame)
+        self.loyalty_label = tk.Label(self.customer_panel)
+        self.loyalty_label.pack(pady=5)
+        tk.Button(self.customer_panel, text="Buy Tickets", command=self.buy_tickets).pack(pady=5)
+        tk.Button(self.customer_panel, text="My Orders", command=self.view_customer_orders).pack(pady=5)
+
+        self.logout_button = tk.Button(frame, text="Logout", command=self.logout)
+        self.logout_button.pack(pady=5)
+
+    def refresh_dashboard(self):
+        self.welcome_label.config(text=f"Welcome, {self.current_user}")
+        self.park_var.set(self.current_park)
+        self.admin_panel.pack_forget()
+        self.customer_panel.pack_forget()
+        if self.permissions:
+            self.admin_panel.pack(before=self.logout_button)
+        elif self.current_role == "Customer":
+            # Pick up points the nightly promotion job has added since
+            self.loyalty.refresh()
+            self.loyalty_label.config(text=f"Loyalty Points: {self.loyalty.get_balance(self.current_user):.0f}")
+            self.customer_panel.pack(before=self.logout_button)
 
-        tk.Label(self.root, text=f"Welcome, {self.current_user}", font=("Arial", 16)).pack(pady=10)
+    def on_park_selected(self, event=None):
+        self.select_park(self.park_var.get())
 
-        if self.current_role == "Admin":
-            tk.Button(self.root, text="Admin Dashboard", command=self.admin_dashboard).pack(pady=5)
-        elif self.current_role == "Customer":
-            tk.Button(self.root, text="Buy Tickets", command=self.buy_tickets).pack(pady=5)
-            tk.Button(self.root, text="My Orders", command=self.view_customer_orders).pack(pady=5)
+    def logout(self):
+        """Logs the current user out, writing any buffered audit entries."""
+        self.audit.flush()
+        self.current_user = None
+        self.current_role = None
+        self.permissions = 0
+        self.show_login_page()
 
-        tk.Button(self.root, text="Logout", command=self.show_login_page).pack(pady=5)
+    def close(self):
+        """Writes buffered audit entries and the loyalty checkpoint before the window closes."""
+        sync_running = False
+        if self.sync_worker is not None:
+            # A sync round in flight gets a moment to finish, so its acknowledgements and renames are saved
+            self.sync_worker.join(timeout=SYNC_CLOSE_TIMEOUT_S)
+            sync_running = self.sync_worker.is_alive()
+        if self.outbox is not None and not sync_running:
+            # A stuck round still uses the outbox; its unacknowledged entries are resent on the next start
+            self.outbox.close()
+        self.parks.close()
+        self.audit.close()
+        self.loyalty.close()
+        self.root.destroy()
+
+    def authorize(self, action):
+        """
+        Checks the current user's permission for an admin action and adds it to the audit log.
+
+        Screens that expose accounts record how many once they are shown (see show_search_results).
+        """
+        try:
+            Permissions.AccessControl.check(self.permissions, action)
+        except Permissions.AccessDenied as error:
+            messagebox.showerror("Access Denied", str(error))
+            return False
+        self.audit.record(self.current_user, action)
+        return True
 
     def admin_dashboard(self):
         """Displays the admin dashboard."""
-        self.clear_frame()
-
-        tk.Label(self.root, text="Admin Dashboard", font=("Arial", 16)).pack(pady=10)
-
-        tk.Button(self.root, text="View Ticket Sales", command=self.view_ticket_sales).pack(pady=5)
-        tk.Button(self.root, text="Modify Discounts", command=self.modify_discounts).pack(pady=5)
-        tk.Button(self.root, text="Back to Dashboard", command=self.show_dashboard).pack(pady=10)
+        if not self.permissions:
+            messagebox.showerror("Access Denied", "Not authorized to use the admin dashboard.")
+            return
+        self.screens.show("admin_dashboard")
+
+    def build_admin_dashboard(self, frame):
+        tk.Label(frame, text="Admin Dashboard", font=("Arial", 16)).pack(pady=10)
+
+        self.admin_buttons = []
+        for action, text, command in (
+            ("view_sales", "View Ticket Sales", self.view_ticket_sales),
+            ("modify_discounts", "Modify Discounts", self.modify_discounts),
+            ("view_reports", "Sales Report", self.view_sales_report),
+            ("view_reports", "Demand Forecast", self.view_forecast),
+            ("export_data", "Export Data", self.export_data),
+            ("view_occupancy", "Live Occupancy", self.view_occupancy),
+            ("search_records", "Search", self.search_records),
+        ):
+            button = tk.Button(frame, text=text, command=command)
+            button.pack(pady=5)
+            self.admin_buttons.append((action, button))
+        tk.Button(frame, text="Back to Dashboard", command=self.show_dashboard).pack(pady=10)
+
+    def refresh_admin_dashboard(self):
+        for action, button in self.admin_buttons:
+            button.config(state="normal" if self.access.allows(self.permissions, action) else "disabled")
 
     def view_ticket_sales(self):
         """Displays ticket sales data."""
-        self.clear_frame()
+        if self.authorize("view_sales"):
+            self.screens.show("ticket_sales")
+
+    def build_ticket_sales(self, frame):
+        tk.Label(frame, text="Ticket Sales", font=("Arial", 16)).pack(pady=10)
+        self.sales_park_label = tk.Label(frame)
+        self.sales_park_label.pack()
 
-        tk.Label(self.root, text="Ticket Sales", font=("Arial", 16)).pack(pady=10)
+        self.sales_table = ttk.Treeview(frame, columns=("Date", "Ticket", "Quantity"), show="headings")
+        self.sales_table.heading("Date", text="Date")
+        self.sales_table.heading("Ticket", text="Ticket")
+        self.sales_table.heading("Quantity", text="Quantity")
+        self.sales_table.pack(padx=10, pady=10)
 
-        sales_table = ttk.Treeview(self.root, columns=("Date", "Ticket", "Quantity"), show="headings")
-        sales_table.heading("Date", text="Date")
-        sales_table.heading("Ticket", text="Ticket")
-        sales_table.heading("Quantity", text="Quantity")
-        sales_table.pack(padx=10, pady=10)
+        tk.Button(frame, text="Back to Admin Dashboard", command=self.admin_dashboard).pack(pady=10)
 
+    def refresh_ticket_sales(self):
+        self.sales_park_label.config(text=f"Park: {self.current_park}")
+        self.sales_table.delete(*self.sales_table.get_children())
         for date, daily_sales in self.sales.items():
             for ticket, quantity in daily_sales.items():
-                sales_table.insert("", "end", values=(date, ticket, quantity))
+                self.sales_table.insert("", "end", values=(date, ticket, quantity))
+
+    def view_sales_report(self):
+        """Displays the end-of-day sales report built from the order log."""
+        if self.authorize("view_reports"):
+            self.screens.show("sales_report")
+
+    def build_sales_report(self, frame):
+        tk.Label(frame, text="Sales Report", font=("Arial", 16)).pack(pady=10)
+
+        self.report_text = tk.Text(frame, width=60, height=20)
+        self.report_text.pack(padx=10, pady=10)
+
+        tk.Button(frame, text="Back to Admin Dashboard", command=self.admin_dashboard).pack(pady=10)
+
+    def refresh_sales_report(self):
+        prices = self.prices.get_list_prices()
+        park_reports = self.parks.build_reports(prices)
+        report = Reports.ReportTotals()
+        for park_report in park_reports.values():
+            report.merge(park_report)
+
+        self.report_text.config(state="normal")
+        self.report_text.delete("1.0", "end")
+        self.report_text.insert("end", "All Parks\n" + report.generate_report())
+        if len(park_reports) > 1:
+            self.report_text.insert("end", "\nBy Park:\n")
+            for park_id, park_report in park_reports.items():
+                self.report_text.insert("end", f"  {park_id}: {park_report.get_order_count()} orders, ${park_report.get_total_revenue():.2f}\n")
+        self.report_text.config(state="disabled")
+
+    def view_forecast(self):
+        """Displays expected ticket sales and staffing for the next 30 days."""
+        if self.authorize("view_reports"):
+            self.screens.show("forecast")
+
+    def build_forecast(self, frame):
+        tk.Label(frame, text="Demand Forecast", font=("Arial", 16)).pack(pady=10)
+        self.forecast_label = tk.Label(frame, justify="left")
+        self.forecast_label.pack()
+
+        self.forecast_table = ttk.Treeview(frame, columns=("Date", "Tickets", "Guests", "Staff", "Ride Load"), show="headings", height=15)
+        for column in ("Date", "Tickets", "Guests", "Staff", "Ride Load"):
+            self.forecast_table.heading(column, text=column)
+            self.forecast_table.column(column, width=100)
+        self.forecast_table.pack(padx=10, pady=10)
+
+        tk.Button(frame, text="Back to Admin Dashboard", command=self.admin_dashboard).pack(pady=10)
+
+    def refresh_forecast(self):
+        demand = self.parks.shard(self.current_park).get_forecast()
+        forecast = demand.forecast(days=Forecast.FORECAST_DAYS)
+        shortfalls = Forecast.capacity_shortfalls(forecast, self.daily_capacity)
+        lines = [f"Park: {self.current_park}"]
+        lines += [f"{ticket}: {quantity:.0f} expected" for ticket, quantity in demand.expected_demand(days=Forecast.FORECAST_DAYS).items()]
+        if shortfalls:
+            lines.append(f"Over capacity on {len({day for day, _, _, _ in shortfalls})} days, first {shortfalls[0][0]:%a %Y-%m-%d} ({shortfalls[0][1]})")
+        self.forecast_label.config(text="\n".join(lines))
+
+        self.forecast_table.delete(*self.forecast_table.get_children())
+        plan = Forecast.staffing_plan(forecast, self.parks.get_park(self.current_park))
+        for (day, expected), day_plan in zip(forecast, plan):
+            self.forecast_table.insert("", "end", values=(
+                day.strftime("%a %Y-%m-%d"),
+                f"{sum(expected.values()):.0f}",
+                day_plan["guests"],
+                day_plan["staff"],
+                f"{day_plan['ride_utilization']:.0%}" if day_plan["rides"] else "-",
+            ))
 
-        tk.Button(self.root, text="Back to Admin Dashboard", command=self.admin_dashboard).pack(pady=10)
+    def view_occupancy(self):
+        """Displays live park and ride occupancy from the gate event feed."""
+        if self.authorize("view_occupancy"):
+            self.screens.show("occupancy")
+
+    def build_occupancy(self, frame):
+        tk.Label(frame, text="Live Occupancy", font=("Arial", 16)).pack(pady=10)
+        self.visitors_label = tk.Label(frame)
+        self.visitors_label.pack(pady=5)
+        self.ride_counts_label = tk.Label(frame, justify="left")
+        self.ride_counts_label.pack()
+
+        self.history_table = ttk.Treeview(frame, columns=("Time", "Entries", "Exits", "Visitors"), show="headings", height=12)
+        for column in ("Time", "Entries", "Exits", "Visitors"):
+            self.history_table.heading(column, text=column)
+            self.history_table.column(column, width=90)
+        self.history_table.pack(padx=10, pady=10)
+
+        tk.Button(frame, text="Refresh", command=self.view_occupancy).pack(pady=5)
+        tk.Button(frame, text="Back to Admin Dashboard", command=self.admin_dashboard).pack(pady=10)
+
+    def refresh_occupancy(self):
+        self.gate_feed.poll()
+        self.visitors_label.config(text=f"Current Visitors: {self.occupancy.get_current_visitors()}")
+        self.ride_counts_label.config(text="\n".join(f"{ride}: {count}" for ride, count in sorted(self.occupancy.get_ride_counts().items())))
+
+        self.history_table.delete(*self.history_table.get_children())
+        for bucket in self.occupancy.history(12):
+            self.history_table.insert("", "end", values=(bucket["start"].strftime("%H:%M"), bucket["entries"], bucket["exits"], bucket["visitors"]))
+
+    def search_records(self):
+        """Lets the admin search customers and orders as they type."""
+        if self.authorize("search_records"):
+            self.screens.show("search")
+
+    def build_search(self, frame):
+        tk.Label(frame, text="Search Customers and Orders", font=("Arial", 16)).pack(pady=10)
+        self.query_var = tk.StringVar()
+        self.query_entry = tk.Entry(frame, textvariable=self.query_var, width=40)
+        self.query_entry.pack(pady=5)
+
+        self.results_table = ttk.Treeview(frame, columns=("Type", "Key", "Details"), show="headings")
+        self.results_table.heading("Type", text="Type")
+        self.results_table.heading("Key", text="Username / Order ID")
+        self.results_table.heading("Details", text="Details")
+        self.results_table.column("Details", width=300)
+        self.results_table.pack(padx=10, pady=10)
+
+        # Search once typing pauses rather than on every keystroke
+        self.query_var.trace_add("write", Screens.Debouncer(frame, 150, self.show_search_results).trigger)
+
+        tk.Button(frame, text="Back to Admin Dashboard", command=self.admin_dashboard).pack(pady=10)
+
+    def refresh_search(self):
+        if self.search_index is None:
+            self.search_index = Search.build_index(self.accounts, self.parks.items())
+        self.show_search_results()
+        self.query_entry.focus_set()
+
+    def show_search_results(self):
+        self.results_table.delete(*self.results_table.get_children())
+        accounts_shown = 0
+        for kind, key in self.search_index.search(self.query_var.get()):
+            if kind == Search.CUSTOMER:
+                accounts_shown += 1
+                details = f"Role: {self.accounts.get(key, {}).get('role', '')}"
+            else:
+                order = self.parks.find_order(key, (None, {}))[1]
+                details = f"{order.get('customer')} - {order.get('ticket')} x{order.get('quantity')} on {order.get('order_date')}"
+            self.results_table.insert("", "end", values=(kind.title(), key, details))
+        if accounts_shown:
+            self.audit.record(self.current_user, "search_records", accounts_shown)
+
+    def export_data(self):
+        """Allows the admin to export orders or daily sales to a file."""
+        if self.authorize("export_data"):
+            self.screens.show("export")
+
+    def build_export(self, frame):
+        tk.Label(frame, text="Export Data", font=("Arial", 16)).pack(pady=10)
+        tk.Label(frame, text="From Date (YYYY-MM-DD, optional):").pack(pady=5)
+        self.date_from_entry = tk.Entry(frame)
+        self.date_from_entry.pack(pady=5)
+        tk.Label(frame, text="To Date (YYYY-MM-DD, optional):").pack(pady=5)
+        self.date_to_entry = tk.Entry(frame)
+        self.date_to_entry.pack(pady=5)
+
+        tk.Label(frame, text="Format:").pack(pady=5)
+        self.format_var = tk.StringVar(value="csv")
+        tk.OptionMenu(frame, self.format_var, "csv", "columnar").pack(pady=5)
+
+        tk.Button(frame, text="Export Orders", command=partial(self.run_export, "orders")).pack(pady=5)
+        tk.Button(frame, text="Export Sales", command=partial(self.run_export, "sales")).pack(pady=5)
+        tk.Button(frame, text="Back to Admin Dashboard", command=self.admin_dashboard).pack(pady=10)
+
+    def run_export(self, store):
+        """Exports one store of the current park in the chosen format and date range."""
+        if not self.authorize("export_data"):
+            return
+        source_path = self.orders_file if store == "orders" else self.sales_file
+        file_format = self.format_var.get()
+        extension = ".csv" if file_format == "csv" else ".col"
+        file_path = filedialog.asksaveasfilename(defaultextension=extension, initialfile=store + extension)
+        if not file_path:
+            return
+        if store == "orders":
+            self.orders.flush_index()
+        archive_dir = self.parks.shard(self.current_park).get_archive_dir() if store == "orders" else None
+        written = Export.export_store(store, source_path, file_path, file_format, self.date_from_entry.get() or None, self.date_to_entry.get() or None, archive_dir)
+        messagebox.showinfo("Success", f"Exported {written} rows to {file_path}")
 
     def modify_discounts(self):
         """Allows the admin to modify discounts for tickets."""
-        self.clear_frame()
+        if self.authorize("modify_discounts"):
+            self.screens.show("discounts")
 
-        tk.Label(self.root, text="Modify Discounts", font=("Arial", 16)).pack(pady=10)
+    def build_discounts(self, frame):
+        tk.Label(frame, text="Modify Discounts", font=("Arial", 16)).pack(pady=10)
 
-        for ticket in self.tickets:
+        self.discount_vars = {}
+        for ticket in self.prices.get_tickets():
             ticket_type = ticket["type"]
-            tk.Label(self.root, text=f"{ticket_type} Discount (%):").pack(pady=5)
-            discount_var = tk.StringVar(value=str(self.discounts[ticket_type]))
-            discount_entry = tk.Entry(self.root, textvariable=discount_var)
-            discount_entry.pack(pady=5)
+            tk.Label(frame, text=f"{ticket_type} Discount (%):").pack(pady=5)
+            self.discount_vars[ticket_type] = tk.StringVar()
+            tk.Entry(frame, textvariable=self.discount_vars[ticket_type]).pack(pady=5)
+            tk.Button(frame, text=f"Save {ticket_type} Discount", command=partial(self.save_discount, ticket_type)).pack(pady=5)
 
-            def save_discount(t_type=ticket_type, d_var=discount_var):
-                try:
-                    self.discounts[t_type] = max(0, min(100, float(d_var.get())))
-                    messagebox.showinfo("Success", f"Discount updated for {t_type}")
-                except ValueError:
-                    messagebox.showerror("Error", "Invalid discount value!")
+        tk.Button(frame, text="Back to Admin Dashboard", command=self.admin_dashboard).pack(pady=10)
 
-            tk.Button(self.root, text=f"Save {ticket_type} Discount", command=save_discount).pack(pady=5)
+    def refresh_discounts(self):
+        for ticket_type, discount_var in self.discount_vars.items():
+            discount_var.set(f"{self.prices.get_discount(ticket_type):g}")
 
-        tk.Button(self.root, text="Back to Admin Dashboard", command=self.admin_dashboard).pack(pady=10)
+    def save_discount(self, ticket_type):
+        """Saves the discount entered for one ticket type."""
+        if not self.authorize("modify_discounts"):
+            return
+        try:
+            self.prices.set_discount(ticket_type, max(0, min(100, float(self.discount_vars[ticket_type].get()))))
+            messagebox.showinfo("Success", f"Discount updated for {ticket_type}")
+        except ValueError:
+            messagebox.showerror("Error", "Invalid discount value!")
 
     def buy_tickets(self):
         """Displays the ticket purchasing page."""
-        self.clear_frame()
+        self.screens.show("buy_tickets")
 
-        tk.Label(self.root, text="Buy Tickets", font=("Arial", 16)).pack(pady=10)
+    def build_buy_tickets(self, frame):
+        tk.Label(frame, text="Buy Tickets", font=("Arial", 16)).pack(pady=10)
 
-        self.ticket_table = ttk.Treeview(self.root, columns=("Type", "Price", "Validity", "Features"), show="headings")
+        self.ticket_table = ttk.Treeview(frame, columns=("Type", "Price", "Validity", "Features"), show="headings")
         self.ticket_table.heading("Type", text="Type")
         self.ticket_table.heading("Price", text="Price ($)")
         self.ticket_table.heading("Validity", text="Validity")
         self.ticket_table.heading("Features", text="Features")
         self.ticket_table.pack(padx=10, pady=10)
 
-        for ticket in self.tickets:
-            discounted_price = ticket["price"] * (1 - self.discounts[ticket["type"]] / 100)
-            self.ticket_table.insert("", "end", values=(
+        tk.Label(frame, text="Select Quantity:").pack(pady=5)
+        self.quantity_spinbox = tk.Spinbox(frame, from_=1, to=10, width=5)
+        self.quantity_spinbox.pack(pady=5)
+
+        tk.Label(frame, text="Visit Date:").pack(pady=5)
+        self.visit_date_var = tk.StringVar()
+        self.visit_date_combobox = ttk.Combobox(frame, textvariable=self.visit_date_var)
+        self.visit_date_combobox.pack(pady=5)
+
+        self.sold_out_label = tk.Label(frame, fg="red", justify="left")
+        self.sold_out_label.pack()
+
+        tk.Button(frame, text="Proceed to Payment", command=self.show_payment_page).pack(pady=10)
+        tk.Button(frame, text="Back to Dashboard", command=self.show_dashboard).pack(pady=5)
+
+    def refresh_buy_tickets(self):
+        self.reservations.refresh()
+        self.fill_ticket_table()
+
+        self.quantity_spinbox.delete(0, "end")
+        self.quantity_spinbox.insert(0, "1")
+
+        # Only offer dates the park is open on
+        start = self.reservations.get_start_date()
+        hours = self.schedule.get_operating_hours()
+        visit_dates = [(start + timedelta(days=day)).isoformat() for day in range(60) if hours.is_open_on(start + timedelta(days=day))]
+        self.visit_date_combobox.config(values=visit_dates)
+        self.visit_date_var.set(visit_dates[0] if visit_dates else "")
+
+        sold_out_lines = []
+        for ticket in self.prices.get_tickets():
+            sold_out = self.reservations.sold_out_dates(ticket["type"])
+            if sold_out:
+                more = f" (+{len(sold_out) - 5} more)" if len(sold_out) > 5 else ""
+                sold_out_lines.append(f"{ticket['type']} sold out on: {', '.join(sold_out[:5])}{more}")
+        self.sold_out_label.config(text="\n".join(sold_out_lines))
+
+    def fill_ticket_table(self):
+        """Lists every ticket at its current price from the shared price table, keeping the selection."""
+        focused = self.ticket_table.focus()
+        selected_type = self.ticket_table.item(focused)["values"][0] if focused else None
+        self.ticket_table.delete(*self.ticket_table.get_children())
+        for ticket in self.prices.get_tickets():
+            item = self.ticket_table.insert("", "end", values=(
                 ticket["type"],
-                f"${discounted_price:.2f}",
+                f"${self.prices.get_price(ticket['type']):.2f}",
                 ticket["validity"],
                 ticket["features"]
             ))
+            if ticket["type"] == selected_type:
+                self.ticket_table.focus(item)
+                self.ticket_table.selection_set(item)
+        self.shown_price_generation = self.prices.get_generation()
 
-        tk.Label(self.root, text="Select Quantity:").pack(pady=5)
-        self.quantity_spinbox = tk.Spinbox(self.root, from_=1, to=10, width=5)
-        self.quantity_spinbox.pack(pady=5)
-
-        tk.Button(self.root, text="Proceed to Payment", command=self.show_payment_page).pack(pady=10)
-        tk.Button(self.root, text="Back to Dashboard", command=self.show_dashboard).pack(pady=5)
+    def watch_prices(self):
+        """Re-lists the tickets when another kiosk changes a price while they are on screen."""
+        if self.screens.get_current() == "buy_tickets" and self.prices.get_generation() != self.shown_price_generation:
+            self.fill_ticket_table()
+        self.root.after(PRICE_POLL_MS, self.watch_prices)
 
     def show_payment_page(self):
         """Displays the payment page."""
@@ -226,28 +686,59 @@ class AccountAndTicketApp:
 
         self.selected_ticket = selected_ticket
         self.selected_quantity = int(self.quantity_spinbox.get())
-        self.total_price = self.selected_quantity * float(self.selected_ticket[1].replace('$', ''))
-
-        self.clear_frame()
-
-        tk.Label(self.root, text="Payment Page", font=("Arial", 16)).pack(pady=10)
-        tk.Label(self.root, text=f"Ticket: {self.selected_ticket[0]}").pack(pady=5)
-        tk.Label(self.root, text=f"Quantity: {self.selected_quantity}").pack(pady=5)
-        tk.Label(self.root, text=f"Total Price: ${self.total_price:.2f}").pack(pady=5)
+        self.selected_visit_date = self.visit_date_var.get()
+        # Priced from the shared table, so a discount saved since the list was shown applies
+        self.total_price = self.selected_quantity * self.prices.get_price(self.selected_ticket[0])
+
+        try:
+            self.reservations.refresh()
+            remaining = self.reservations.get_remaining(self.selected_ticket[0], self.selected_visit_date)
+        except ValueError:
+            messagebox.showerror("Error", "Please choose a valid visit date (YYYY-MM-DD).")
+            return
+        try:
+            self.schedule.check_visit(self.selected_visit_date)
+        except Schedule.ParkClosedError as error:
+            messagebox.showerror("Park Closed", str(error))
+            return
+        if remaining < self.selected_quantity:
+            messagebox.showerror("Sold Out", f"Only {max(remaining, 0)} {self.selected_ticket[0]} tickets left for {self.selected_visit_date}.")
+            return
 
-        tk.Label(self.root, text="Card Number:").pack(pady=5)
-        self.card_number_entry = tk.Entry(self.root)
+        self.screens.show("payment")
+
+    def build_payment_page(self, frame):
+        tk.Label(frame, text="Payment Page", font=("Arial", 16)).pack(pady=10)
+        self.payment_ticket_label = tk.Label(frame)
+        self.payment_ticket_label.pack(pady=5)
+        self.payment_quantity_label = tk.Label(frame)
+        self.payment_quantity_label.pack(pady=5)
+        self.payment_visit_date_label = tk.Label(frame)
+        self.payment_visit_date_label.pack(pady=5)
+        self.payment_total_label = tk.Label(frame)
+        self.payment_total_label.pack(pady=5)
+
+        tk.Label(frame, text="Card Number:").pack(pady=5)
+        self.card_number_entry = tk.Entry(frame)
         self.card_number_entry.pack(pady=5)
 
-        tk.Label(self.root, text="Cardholder Name:").pack(pady=5)
-        self.card_name_entry = tk.Entry(self.root)
+        tk.Label(frame, text="Cardholder Name:").pack(pady=5)
+        self.card_name_entry = tk.Entry(frame)
         self.card_name_entry.pack(pady=5)
 
-        tk.Label(self.root, text="CVV:").pack(pady=5)
-        self.cvv_entry = tk.Entry(self.root, show="*")
+        tk.Label(frame, text="CVV:").pack(pady=5)
+        self.cvv_entry = tk.Entry(frame, show="*")
         self.cvv_entry.pack(pady=5)
 
-        tk.Button(self.root, text="Confirm Purchase", command=self.confirm_purchase).pack(pady=10)
+        tk.Button(frame, text="Confirm Purchase", command=self.confirm_purchase).pack(pady=10)
+
+    def refresh_payment_page(self):
+        self.payment_ticket_label.config(text=f"Ticket: {self.selected_ticket[0]}")
+        self.payment_quantity_label.config(text=f"Quantity: {self.selected_quantity}")
+        self.payment_visit_date_label.config(text=f"Visit Date: {self.selected_visit_date}")
+        self.payment_total_label.config(text=f"Total Price: ${self.total_price:.2f}")
+        for entry in (self.card_number_entry, self.card_name_entry, self.cvv_entry):
+            entry.delete(0, "end")
 
     def confirm_purchase(self):
         """Confirms ticket purchase."""
@@ -259,54 +750,73 @@ class AccountAndTicketApp:
             messagebox.showerror("Error", "Please complete all fields.")
             return
 
-        if not isinstance(self.orders, dict):
-            self.orders = {}
-
-        order_id = f"ORDER-{len(self.orders) + 1}"
-        self.orders[order_id] = {
+        validity = self.prices.get_ticket(self.selected_ticket[0])["validity"]
+        today = datetime.now().strftime("%Y-%m-%d")
+        order = {
             "customer": self.current_user,
             "ticket": self.selected_ticket[0],
             "quantity": self.selected_quantity,
             "total_price": self.total_price,
+            "order_date": today,
+            "visit_date": self.selected_visit_date,
         }
-        self.save_data(self.orders_file, self.orders)
+        try:
+            order_id = self.parks.place_order(self.current_park, order, Reservations.validity_days(validity))
+        except Schedule.ParkClosedError as error:
+            messagebox.showerror("Park Closed", str(error))
+            return
+        except ValueError as error:
+            messagebox.showerror("Sold Out", str(error))
+            return
+        if self.outbox is not None:
+            self.outbox.append(Sync.ORDER, order_id, order, self.current_park)
+        if self.search_index is not None:
+            Search.index_order(self.search_index, order_id, order)
 
-        today = datetime.now().strftime("%Y-%m-%d")
-        if today not in self.sales:
-            self.sales[today] = {}
-        self.sales[today][self.selected_ticket[0]] = self.sales[today].get(self.selected_ticket[0], 0) + self.selected_quantity
-        self.save_data(self.sales_file, self.sales)
+        points = self.loyalty.accrue(self.current_user, self.total_price, order_id, today)
 
-        messagebox.showinfo("Success", f"Purchase Confirmed!\nOrder ID: {order_id}")
+        messagebox.showinfo("Success", f"Purchase Confirmed!\nOrder ID: {order_id}\nLoyalty Points Earned: {points:.0f}")
         self.show_dashboard()
 
     def view_customer_orders(self):
         """Displays the current user's orders."""
-        self.clear_frame()
-
-        tk.Label(self.root, text="My Orders", font=("Arial", 16)).pack(pady=10)
-
-        orders_table = ttk.Treeview(self.root, columns=("Order ID", "Ticket", "Quantity", "Total Price"), show="headings")
-        orders_table.heading("Order ID", text="Order ID")
-        orders_table.heading("Ticket", text="Ticket")
-        orders_table.heading("Quantity", text="Quantity")
-        orders_table.heading("Total Price", text="Total Price ($)")
-        orders_table.pack(padx=10, pady=10)
-
-        for order_id, order in self.orders.items():
-            if order["customer"] == self.current_user:
-                orders_table.insert("", "end", values=(
-                    order_id,
-                    order["ticket"],
-                    order["quantity"],
-                    f"${order['total_price']:.2f}",
-                ))
+        self.screens.show("customer_orders")
+
+    def build_customer_orders(self, frame):
+        tk.Label(frame, text="My Orders", font=("Arial", 16)).pack(pady=10)
+
+        self.orders_table = ttk.Treeview(frame, columns=("Order ID", "Ticket", "Quantity", "Total Price"), show="headings")
+        self.orders_table.heading("Order ID", text="Order ID")
+        self.orders_table.heading("Ticket", text="Ticket")
+        self.orders_table.heading("Quantity", text="Quantity")
+        self.orders_table.heading("Total Price", text="Total Price ($)")
+        self.orders_table.pack(padx=10, pady=10)
+
+        tk.Button(frame, text="Save Receipts", command=self.save_receipts).pack(pady=5)
+        tk.Button(frame, text="Back to Dashboard", command=self.show_dashboard).pack(pady=10)
+
+    def refresh_customer_orders(self):
+        self.orders_table.delete(*self.orders_table.get_children())
+        for order_id, order in self.parks.customer_orders(self.current_user):
+            self.orders_table.insert("", "end", values=(
+                order_id,
+                order["ticket"],
+                order["quantity"],
+                f"${order['total_price']:.2f}",
+            ))
 
-        tk.Button(self.root, text="Back to Dashboard", command=self.show_dashboard).pack(pady=10)
+    def save_receipts(self):
+        """Streams receipts for all of the current user's orders to a text file."""
+        file_path = filedialog.asksaveasfilename(defaultextension=".txt", initialfile=f"{self.current_user}_receipts.txt")
+        if not file_path:
+            return
+        with open(file_path, "w", encoding="utf-8") as f:
+            written = Rendering.stream_receipts(self.parks.customer_orders(self.current_user), f)
+        messagebox.showinfo("Success", f"Saved {written} receipts to {file_path}")
 
 
 # Run the application
 if __name__ == "__main__":
     root = tk.Tk()
     app = AccountAndTicketApp(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
@@ -0,0 +1,244 @@
+import argparse
+import math
+import os
+import struct
+from array import array
+from contextlib import contextmanager
+from datetime import datetime
+import Storage
+
+POINTS_PER_DOLLAR = 1
+CHECKPOINT_EVERY = 1000
+# ledger bytes covered, offset of the last record covered, number of balances
+CHECKPOINT_HEADER = struct.Struct("<QQI")
+BALANCE = struct.Struct("<d")
+
+
+class LoyaltyLedger:
+    """
+    Append-only ledger of loyalty point accruals, redemptions and promotions.
+
+    Every change is appended to a checksummed log and never rewritten. The
+    running balance of each customer is kept in a flat array indexed by a
+    per-customer slot, so balance queries are O(1) however long the history
+    grows. The balances are checkpointed to disk together with the ledger
+    offset they cover, so startup only replays entries written since the
+    last checkpoint.
+
+    Several processes may hold the ledger open, e.g. the GUI and the
+    nightly promotion job. Every write takes a file lock and first replays
+    what other processes appended, so balances, checks and checkpoints
+    always cover the whole ledger up to a record boundary.
+    """
+
+    def __init__(self, ledger_path: str = "loyalty.log", checkpoint_path: str = None):
+        """
+        Opens (or creates) a loyalty ledger.
+
+        Args:
+            ledger_path (str): Path to the ledger log.
+            checkpoint_path (str): Path to the balance checkpoint; defaults to the
+                ledger path with ".bal".
+        """
+        self.__ledger_path = ledger_path
+        self.__lock_path = ledger_path + ".lock"
+        self.__checkpoint_path = checkpoint_path if checkpoint_path else os.path.splitext(ledger_path)[0] + ".bal"
+        self.__slots = {}
+        self.__balances = array("d")
+        self.__covered = Storage.LOG_HEADER.size
+        self.__last_record = 0
+        self.__since_checkpoint = 0
+        with Storage.file_lock(self.__lock_path):
+            if not os.path.exists(ledger_path) or os.path.getsize(ledger_path) < Storage.LOG_HEADER.size:
+                with open(ledger_path, "wb") as f:
+                    f.write(Storage.LOG_HEADER.pack(Storage.LOG_MAGIC, Storage.LOG_FORMAT_VERSION, Storage.SCHEMAS.get("loyalty").get_store_id()))
+            self.__file = open(ledger_path, "r+b")
+            self.__load_checkpoint()
+            self.__catch_up()
+
+    # Internal helpers
+    def __slot(self, customer: str) -> int:
+        slot = self.__slots.get(customer)
+        if slot is None:
+            slot = self.__slots[customer] = len(self.__balances)
+            self.__balances.append(0.0)
+        return slot
+
+    def __apply(self, entry: dict):
+        self.__balances[self.__slot(entry["customer"])] += entry["points"]
+
+    def __load_checkpoint(self):
+        try:
+            payload = Storage.atomic_read(self.__checkpoint_path, generations=1)
+        except Storage.SnapshotError:
+            return
+        covered, last_record, count = CHECKPOINT_HEADER.unpack_from(payload, 0)
+        # A checkpoint that does not end on the record it names is ignored and the ledger replayed in full
+        if covered != Storage.LOG_HEADER.size and not Storage.is_record_end(self.__file, last_record, covered):
+            return
+        offset = CHECKPOINT_HEADER.size
+        for _ in range(count):
+            (length,) = Storage.STRING_LENGTH.unpack_from(payload, offset)
+            offset += Storage.STRING_LENGTH.size
+            customer = payload[offset:offset + length].decode("utf-8")
+            offset += length
+            (points,) = BALANCE.unpack_from(payload, offset)
+            offset += BALANCE.size
+            self.__balances[self.__slot(customer)] = points
+        self.__covered = covered
+        self.__last_record = last_record
+
+    def __catch_up(self):
+        # Replays entries appended since the last one applied, by this or any other process
+        for start, end, entry in Storage.read_log_range(self.__ledger_path, "loyalty", self.__covered, offsets=True):
+            self.__apply(entry)
+            self.__last_record, self.__covered = start, end
+        # Drop a torn entry left by an interrupted append
+        Storage.repair_torn_tail(self.__file, self.__covered)
+
+    @contextmanager
+    def __locked(self):
+        with Storage.file_lock(self.__lock_path):
+            self.__catch_up()
+            yield
+
+    def __append(self, entries: list):
+        # Callers hold the lock, so the end of the file is the end of the last entry applied
+        encoded = [Storage.encode_log_record("loyalty", entry) for entry in entries]
+        self.__file.seek(0, os.SEEK_END)
+        start = self.__file.tell()
+        self.__file.write(b"".join(encoded))
+        self.__file.flush()
+        os.fsync(self.__file.fileno())
+        self.__last_record = start + sum(len(record) for record in encoded[:-1])
+        self.__covered = self.__file.tell()
+        for entry in entries:
+            self.__apply(entry)
+        self.__since_checkpoint += len(entries)
+        if self.__since_checkpoint >= CHECKPOINT_EVERY:
+            self.__write_checkpoint()
+
+    def __write_checkpoint(self):
+        payload = bytearray(CHECKPOINT_HEADER.pack(self.__covered, self.__last_record, len(self.__slots)))
+        for customer, slot in self.__slots.items():
+            encoded = customer.encode("utf-8")
+            payload += Storage.STRING_LENGTH.pack(len(encoded)) + encoded + BALANCE.pack(self.__balances[slot])
+        Storage.atomic_write(self.__checkpoint_path, payload, generations=1)
+        self.__since_checkpoint = 0
+
+    @staticmethod
+    def __today() -> str:
+        return datetime.now().strftime("%Y-%m-%d")
+
+    # Getters
+    def get_balance(self, customer: str) -> float:
+        """
+        Returns a customer's current point balance in O(1).
+        """
+        slot = self.__slots.get(customer)
+        return 0.0 if slot is None else self.__balances[slot]
+
+    def get_customers(self) -> list:
+        return list(self.__slots)
+
+    # Behavioral Methods
+    def accrue(self, customer: str, amount: float, reference: str = "", entry_date: str = None) -> float:
+        """
+        Awards points for a purchase.
+
+        Args:
+            customer (str): Username of the customer.
+            amount (float): Amount paid, in dollars.
+            reference (str): Order ID the points were earned on.
+            entry_date (str): Date of the purchase; defaults to today.
+
+        Returns:
+            float: Number of points awarded.
+        """
+        points = float(math.floor(amount * POINTS_PER_DOLLAR))
+        if points > 0:
+            with self.__locked():
+                self.__append([{"customer": customer, "kind": "accrual", "points": points, "reference": reference, "entry_date": entry_date or self.__today()}])
+        return points
+
+    def redeem(self, customer: str, points: float, reference: str = "", entry_date: str = None):
+        """
+        Redeems points from a customer's balance.
+
+        Raises:
+            ValueError: If points is not positive or exceeds the balance.
+        """
+        if points <= 0:
+            raise ValueError("Points to redeem must be positive.")
+        with self.__locked():
+            if points > self.get_balance(customer):
+                raise ValueError(f"{customer} has only {self.get_balance(customer):.0f} points.")
+            self.__append([{"customer": customer, "kind": "redemption", "points": -float(points), "reference": reference, "entry_date": entry_date or self.__today()}])
+
+    def apply_promotion(self, multiplier: float = 1.0, bonus: float = 0.0, reference: str = "promotion", entry_date: str = None) -> int:
+        """
+        Applies a promotion to every customer in one batch.
+
+        Each customer receives bonus points plus (multiplier - 1) times their
+        current balance, rounded down. The awards are computed in a single
+        pass over the balance array and written to the ledger with one write.
+
+        Returns:
+            int: Number of customers who received points.
+        """
+        entry_date = entry_date or self.__today()
+        rate = multiplier - 1
+        with self.__locked():
+            awards = [math.floor(balance * rate + bonus) for balance in self.__balances]
+            names = list(self.__slots)
+            entries = [
+                {"customer": names[slot], "kind": "promotion", "points": float(points), "reference": reference, "entry_date": entry_date}
+                for slot, points in enumerate(awards) if points > 0
+            ]
+            if entries:
+                self.__append(entries)
+        return len(entries)
+
+    def history(self, customer: str):
+        """
+        Streams every ledger entry for one customer, oldest first.
+        """
+        for _, entry in Storage.read_log_range(self.__ledger_path, "loyalty"):
+            if entry["customer"] == customer:
+                yield entry
+
+    def refresh(self):
+        """
+        Applies the entries other processes have appended since this ledger last read or wrote.
+        """
+        with self.__locked():
+            pass
+
+    def checkpoint(self):
+        """
+        Writes the current balances and the ledger offset they cover.
+        """
+        with self.__locked():
+            self.__write_checkpoint()
+
+    def close(self):
+        self.checkpoint()
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply a loyalty promotion to every customer (nightly batch job).")
+    parser.add_argument("--ledger", default="loyalty.log")
+    parser.add_argument("--multiplier", type=float, default=1.0, help="Multiply every balance by this factor.")
+    parser.add_argument("--bonus", type=float, default=0.0, help="Flat bonus points for every customer.")
+    parser.add_argument("--reference", default="promotion")
+    args = parser.parse_args()
+    with LoyaltyLedger(args.ledger) as ledger:
+        awarded = ledger.apply_promotion(args.multiplier, args.bonus, args.reference)
+    print(f"Promotion applied to {awarded} customers.")
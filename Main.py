@@ -1,3 +1,9 @@
+import weakref
+from datetime import datetime
+import Rendering
+import Schedule
+
+
 class Park:
     """
     Represents a Park containing multiple rides and other features.
@@ -11,6 +17,7 @@ class Park:
         events (list): List of ongoing events.
         services (list): List of services offered.
         ride_list (list[Ride]): List of rides in the park (composition relationship).
+        occupancy (OccupancyCounter): Optional live counter fed by gate events.
     """
 
     def __init__(self, name, location, operating_hours, current_visitors, attractions=None, events=None, services=None):
@@ -34,6 +41,8 @@ class Park:
         self.__events = events if events else []
         self.__services = services if services else []
         self.__ride_list = []  # Composition: List of Ride objects
+        self.__occupancy = None
+        self.__parsed_hours = None  # Parsed on first use, reset when the hours change
 
     # Setters
     def set_name(self, name: str):
@@ -44,8 +53,11 @@ class Park:
 
     def set_operating_hours(self, operating_hours: str):
         self.__operating_hours = operating_hours
+        self.__parsed_hours = None
 
     def set_current_visitors(self, current_visitors: int):
+        if self.__occupancy is not None:
+            self.__occupancy.set_current_visitors(current_visitors)
         self.__current_visitors = current_visitors
 
     def set_attractions(self, attractions: list):
@@ -68,6 +80,8 @@ class Park:
         return self.__operating_hours
 
     def get_current_visitors(self) -> int:
+        if self.__occupancy is not None:
+            return self.__occupancy.get_current_visitors()
         return self.__current_visitors
 
     def get_attractions(self) -> list:
@@ -82,6 +96,44 @@ class Park:
     def get_ride_list(self) -> list:
         return self.__ride_list
 
+    def get_occupancy(self):
+        return self.__occupancy
+
+    def get_parsed_hours(self):
+        """
+        Returns the operating hours parsed into a Schedule.OperatingHours.
+
+        Raises:
+            ValueError: If the operating hours text cannot be parsed.
+        """
+        if self.__parsed_hours is None:
+            self.__parsed_hours = Schedule.OperatingHours(self.__operating_hours)
+        return self.__parsed_hours
+
+    def is_open(self, at=None) -> bool:
+        """
+        Returns whether the park is open at a moment (default: now).
+        """
+        return self.get_parsed_hours().is_open(at if at else datetime.now())
+
+    def attach_occupancy(self, occupancy):
+        """
+        Keeps current_visitors in step with a live OccupancyCounter.
+
+        The counter starts from the park's current visitor count, and from then
+        on entry and exit events recorded on it drive get_current_visitors().
+        """
+        occupancy.set_current_visitors(self.__current_visitors)
+        self.__occupancy = occupancy
+
+    def get_ride_occupancy(self) -> dict:
+        """
+        Returns the live number of guests at each ride, keyed by ride name.
+        """
+        if self.__occupancy is None:
+            return {ride.get_name(): 0 for ride in self.__ride_list}
+        return {ride.get_name(): self.__occupancy.get_ride_count(ride.get_name()) for ride in self.__ride_list}
+
     # Relationship Management
     def add_ride(self, ride):
         """
@@ -113,6 +165,7 @@ class Park:
             hours (str): New operating hours for the park.
         """
         self.__operating_hours = hours
+        self.__parsed_hours = None
 
 
 class Ride:
@@ -258,28 +311,37 @@ class Ticket:
             self.__discount = float(discount)
             self.__limitations = limitations
             self.__visit_date = visit_date
+            self.__version = 0  # Incremented on every change, for caches built from this ticket
+            self.__observers = weakref.WeakSet()  # Orders to notify when this ticket changes
 
         # Setters
         def set_ticket_type(self, ticket_type: str):
             self.__ticket_type = ticket_type
+            self.__changed()
 
         def set_description(self, description: str):
             self.__description = description
+            self.__changed()
 
         def set_price(self, price: float):
             self.__price = price
+            self.__changed()
 
         def set_validity(self, validity: str):
             self.__validity = validity
+            self.__changed()
 
         def set_discount(self, discount: float):
             self.__discount = discount
+            self.__changed()
 
         def set_limitations(self, limitations: str):
             self.__limitations = limitations
+            self.__changed()
 
         def set_visit_date(self, visit_date: str):
             self.__visit_date = visit_date
+            self.__changed()
 
         # Getters
         def get_ticket_type(self) -> str:
@@ -303,6 +365,27 @@ class Ticket:
         def get_visit_date(self) -> str:
             return self.__visit_date
 
+        def get_version(self) -> int:
+            return self.__version
+
+        # Observer Management
+        def add_observer(self, observer):
+            """
+            Registers an object whose ticket_changed method is called whenever this ticket changes.
+            """
+            self.__observers.add(observer)
+
+        def remove_observer(self, observer):
+            """
+            Stops notifying an observer about changes to this ticket.
+            """
+            self.__observers.discard(observer)
+
+        def __changed(self):
+            self.__version += 1
+            for observer in list(self.__observers):
+                observer.ticket_changed(self)
+
         # Behavioral Methods
         def apply_discount(self) -> float:
             """
@@ -310,21 +393,14 @@ class Ticket:
             Returns the new price after applying the discount.
             """
             self.__price = self.__price - (self.__price * self.__discount / 100)
+            self.__changed()
             return round(self.__price, 2)
 
         def describe_ticket(self) -> str:
             """
             Returns a detailed description of the ticket.
             """
-            return (
-                f"Ticket Type: {self.__ticket_type}\n"
-                f"Description: {self.__description}\n"
-                f"Price: ${self.__price:.2f}\n"
-                f"Discount: {self.__discount}%\n"
-                f"Validity: {self.__validity}\n"
-                f"Limitations: {self.__limitations}\n"
-                f"Visit Date: {self.__visit_date}"
-            )
+            return Rendering.render_ticket(self)
 
 class Order:
     """
@@ -363,31 +439,46 @@ class Order:
         self.__payment_type = payment_type
         self.__order_date = order_date
         self.__order_id = order_id
+        # Cached results, invalidated when the order or one of its tickets changes
+        self.__cached_total = None
+        self.__cached_summary = None
+        self.__watched_tickets = ()
+        self.__watch_tickets()
 
     # Setters
     def set_customer(self, customer):
         self.__customer = customer
+        self.__cached_summary = None
 
     def set_ticket_list(self, ticket_list: list):
+        self.__unwatch_tickets()
         self.__ticket_list = ticket_list
+        self.__watch_tickets()
+        self.ticket_changed(None)
 
     def set_quantity(self, quantity: int):
         self.__quantity = quantity
+        self.__cached_summary = None
 
     def set_total_price(self, total_price: float):
         self.__total_price = total_price
+        self.__cached_summary = None
 
     def set_amount_paid(self, amount_paid: float):
         self.__amount_paid = amount_paid
+        self.__cached_summary = None
 
     def set_payment_type(self, payment_type: str):
         self.__payment_type = payment_type
+        self.__cached_summary = None
 
     def set_order_date(self, order_date: str):
         self.__order_date = order_date
+        self.__cached_summary = None
 
     def set_order_id(self, order_id: str):
         self.__order_id = order_id
+        self.__cached_summary = None
 
     # Getters
     def get_customer(self):
@@ -414,29 +505,85 @@ class Order:
     def get_order_id(self) -> str:
         return self.__order_id
 
+    # Relationship Management
+    def add_ticket(self, ticket):
+        """
+        Adds a Ticket object to the order.
+        """
+        self.__check_ticket_list()
+        self.__ticket_list.append(ticket)
+        ticket.add_observer(self)
+        self.__watched_tickets = tuple(self.__ticket_list)
+        self.ticket_changed(ticket)
+
+    def remove_ticket(self, ticket):
+        """
+        Removes a Ticket object from the order.
+        """
+        self.__check_ticket_list()
+        if ticket in self.__ticket_list:
+            self.__ticket_list.remove(ticket)
+            if ticket not in self.__ticket_list:
+                ticket.remove_observer(self)
+            self.__watched_tickets = tuple(self.__ticket_list)
+            self.ticket_changed(ticket)
+
+    def ticket_changed(self, ticket):
+        """
+        Called by a contained Ticket when it changes; drops the cached total and summary.
+        """
+        self.__cached_total = None
+        self.__cached_summary = None
+
+    def __watch_tickets(self):
+        for ticket in self.__ticket_list:
+            ticket.add_observer(self)
+        self.__watched_tickets = tuple(self.__ticket_list)
+
+    def __unwatch_tickets(self):
+        for ticket in self.__ticket_list:
+            ticket.remove_observer(self)
+
+    def __check_ticket_list(self):
+        # Catches tickets added, removed or replaced through get_ticket_list() instead of add_ticket().
+        # The watched tuple holds the tickets themselves, so their identities cannot be reused.
+        watched = self.__watched_tickets
+        if len(watched) == len(self.__ticket_list) and all(old is new for old, new in zip(watched, self.__ticket_list)):
+            return
+        for ticket in watched:
+            if not any(ticket is current for current in self.__ticket_list):
+                ticket.remove_observer(self)
+        self.__watch_tickets()
+        self.ticket_changed(None)
+
     # Behavioral Methods
     def calculate_total_price(self) -> float:
         """
         Calculates the total price of all tickets in the order.
+
+        The sum is cached and only recomputed after the ticket list or one of
+        its tickets has changed.
         """
-        self._total_price = sum(ticket.get_price() for ticket in self.get_ticket_list())
+        self.__check_ticket_list()
+        if self.__cached_total is None:
+            self.__cached_total = sum(ticket.get_price() for ticket in self.__ticket_list)
+        if self.__total_price != self.__cached_total:
+            self.__total_price = self.__cached_total
+            self.__cached_summary = None
         return round(self.__total_price, 2)
 
     def get_order_summary(self) -> str:
         """
         Generates a summary of the order details.
+
+        The rendered summary is cached until the order, its customer's name or
+        one of its tickets changes.
         """
-        ticket_details = "\n".join([ticket.describe_ticket() for ticket in self.__ticket_list])
-        return (
-            f"Order ID: {self.__order_id}\n"
-            f"Customer: {self.__customer.get_name()}\n"
-            f"Order Date: {self.__order_date}\n"
-            f"Payment Type: {self.__payment_type}\n"
-            f"Quantity: {self.__quantity}\n"
-            f"Total Price: ${self.__total_price:.2f}\n"
-            f"Amount Paid: ${self.__amount_paid:.2f}\n"
-            f"Tickets:\n{ticket_details}"
-        )
+        self.__check_ticket_list()
+        customer_name = self.__customer.get_name()
+        if self.__cached_summary is None or self.__cached_summary[0] != customer_name:
+            self.__cached_summary = (customer_name, Rendering.render_order(self))
+        return self.__cached_summary[1]
 
 
 class Account:
@@ -613,9 +760,15 @@ class Customer(Account):
 
         Args:
             points (float): The number of points to redeem.
+
+        Raises:
+            ValueError: If points is not positive or exceeds the current balance.
         """
-        if points <= self.__loyalty_points:
-            self.__loyalty_points -= points
+        if points <= 0:
+            raise ValueError("Points to redeem must be positive.")
+        if points > self.__loyalty_points:
+            raise ValueError(f"Cannot redeem {points} points; only {self.__loyalty_points} available.")
+        self.__loyalty_points -= points
 
     def display_order_history(self) -> str:
         """
@@ -624,7 +777,7 @@ class Customer(Account):
         Returns:
             str: A formatted string of the purchase history.
         """
-        return "\n".join([str(order) for order in self.__purchase_history])
+        return "\n".join([Rendering.render_purchase(purchase) for purchase in self.__purchase_history])
 
 class Admin(Account):
     """
@@ -710,12 +863,12 @@ class Admin(Account):
         Returns:
             str: A summary of the admin's activity.
         """
-        return (
-            f"Admin Role: {self.__role}\n"
-            f"Department: {self.__assigned_department}\n"
-            f"Accounts Accessed: {self.__number_of_accounts_accessed}\n"
-            f"Super Admin: {'Yes' if self.__is_super_admin else 'No'}"
-        )
+        return Rendering.ADMIN_REPORT_TEMPLATE.render({
+            "role": self.__role,
+            "department": self.__assigned_department,
+            "accounts_accessed": self.__number_of_accounts_accessed,
+            "super_admin": "Yes" if self.__is_super_admin else "No",
+        })
 
 
 
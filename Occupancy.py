@@ -0,0 +1,305 @@
+import argparse
+import itertools
+import os
+import threading
+import time
+from datetime import datetime
+
+ENTRY = "entry"
+EXIT = "exit"
+SHARDS = 16
+BUCKET_SECONDS = 60
+HISTORY_BUCKETS = 24 * 60
+# Counter key used for the park gates; rides are keyed by name
+PARK = None
+
+
+class _Shard:
+    """
+    One slice of the occupancy counters, guarded by its own lock.
+    """
+
+    __slots__ = ("lock", "counts", "buckets", "last_bucket")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+        # bucket number -> [entries, exits] at the park gates
+        self.buckets = {}
+        self.last_bucket = None
+
+
+class OccupancyCounter:
+    """
+    Live visitor counts for a park and its rides, fed by gate entry/exit events.
+
+    Counts are split over several shards, each with its own lock, and every
+    thread always writes to the same shard. Threads handling different gates
+    therefore never wait on each other; reads add the shards together. Park
+    entries and exits are also tallied per time bucket, which gives the
+    dashboard its history without storing individual events.
+
+    Attributes:
+        shards (int): Number of counter shards.
+        bucket_seconds (int): Width of one history bucket in seconds.
+        history_buckets (int): Number of history buckets kept.
+    """
+
+    def __init__(self, shards: int = SHARDS, bucket_seconds: int = BUCKET_SECONDS, history_buckets: int = HISTORY_BUCKETS):
+        """
+        Initializes a new OccupancyCounter with every count at zero.
+
+        Args:
+            shards (int): Number of counter shards.
+            bucket_seconds (int): Width of one history bucket in seconds.
+            history_buckets (int): Number of history buckets kept.
+        """
+        self.__shards = [_Shard() for _ in range(shards)]
+        # Each thread takes the next shard the first time it counts; thread idents are
+        # aligned addresses, so taking them modulo the shard count would pile every thread onto one shard
+        self.__next_shard = itertools.count()
+        self.__thread_shard = threading.local()
+        self.__bucket_seconds = bucket_seconds
+        self.__history_buckets = history_buckets
+
+    # Internal helpers
+    def __shard(self) -> _Shard:
+        shard = getattr(self.__thread_shard, "shard", None)
+        if shard is None:
+            # next() on itertools.count is atomic under the GIL
+            shard = self.__thread_shard.shard = self.__shards[next(self.__next_shard) % len(self.__shards)]
+        return shard
+
+    def __prune(self, shard: _Shard, bucket: int):
+        # Called with the shard lock held, once per shard per new bucket
+        shard.last_bucket = bucket
+        oldest = bucket - self.__history_buckets
+        for stale in [number for number in shard.buckets if number <= oldest]:
+            del shard.buckets[stale]
+
+    def __total(self, key) -> int:
+        return sum(shard.counts.get(key, 0) for shard in self.__shards)
+
+    # Getters
+    def get_bucket_seconds(self) -> int:
+        return self.__bucket_seconds
+
+    def get_current_visitors(self) -> int:
+        return self.__total(PARK)
+
+    def get_ride_count(self, ride_name: str) -> int:
+        return self.__total(ride_name)
+
+    def get_ride_counts(self) -> dict:
+        """
+        Returns the number of guests currently on or queuing for each ride.
+        """
+        totals = {}
+        for shard in self.__shards:
+            for key, count in list(shard.counts.items()):
+                if key is not PARK:
+                    totals[key] = totals.get(key, 0) + count
+        return totals
+
+    # Setters
+    def set_current_visitors(self, current_visitors: int):
+        """
+        Overrides the park count, e.g. after a manual headcount.
+        """
+        for shard in self.__shards:
+            shard.lock.acquire()
+        try:
+            delta = current_visitors - self.__total(PARK)
+            counts = self.__shards[0].counts
+            counts[PARK] = counts.get(PARK, 0) + delta
+        finally:
+            for shard in self.__shards:
+                shard.lock.release()
+
+    # Behavioral Methods
+    def record(self, kind: str, ride: str = None, timestamp: float = None, count: int = 1):
+        """
+        Records one gate event.
+
+        Args:
+            kind (str): ENTRY or EXIT.
+            ride (str): Ride name, or None for the park gates.
+            timestamp (float): Event time in seconds since the epoch; defaults to now.
+            count (int): Number of guests passing the gate.
+        """
+        if kind == ENTRY:
+            delta = count
+        elif kind == EXIT:
+            delta = -count
+        else:
+            raise ValueError(f"Unknown event kind '{kind}'.")
+        shard = self.__shard()
+        with shard.lock:
+            counts = shard.counts
+            counts[ride] = counts.get(ride, 0) + delta
+            if ride is PARK:
+                bucket = int((timestamp if timestamp is not None else time.time()) // self.__bucket_seconds)
+                if shard.last_bucket is None or bucket > shard.last_bucket:
+                    self.__prune(shard, bucket)
+                tally = shard.buckets.get(bucket)
+                if tally is None:
+                    tally = shard.buckets[bucket] = [0, 0]
+                tally[0 if delta > 0 else 1] += count
+
+    def enter(self, ride: str = None, timestamp: float = None, count: int = 1):
+        self.record(ENTRY, ride, timestamp, count)
+
+    def exit(self, ride: str = None, timestamp: float = None, count: int = 1):
+        self.record(EXIT, ride, timestamp, count)
+
+    def process(self, events) -> int:
+        """
+        Records a batch of events with one lock acquisition.
+
+        Args:
+            events (iterable[tuple]): (timestamp, kind, ride) tuples; ride is None
+                for the park gates.
+
+        Returns:
+            int: Number of events recorded.
+        """
+        counts = {}
+        buckets = {}
+        processed = 0
+        for timestamp, kind, ride in events:
+            if kind == ENTRY:
+                delta = 1
+            elif kind == EXIT:
+                delta = -1
+            else:
+                raise ValueError(f"Unknown event kind '{kind}'.")
+            counts[ride] = counts.get(ride, 0) + delta
+            if ride is PARK:
+                tally = buckets.setdefault(int(timestamp // self.__bucket_seconds), [0, 0])
+                tally[0 if delta > 0 else 1] += 1
+            processed += 1
+
+        shard = self.__shard()
+        with shard.lock:
+            for key, delta in counts.items():
+                shard.counts[key] = shard.counts.get(key, 0) + delta
+            for bucket, (entries, exits) in buckets.items():
+                tally = shard.buckets.setdefault(bucket, [0, 0])
+                tally[0] += entries
+                tally[1] += exits
+            if buckets:
+                newest = max(buckets)
+                if shard.last_bucket is None or newest > shard.last_bucket:
+                    self.__prune(shard, newest)
+        return processed
+
+    def history(self, buckets: int = 60, now: float = None) -> list:
+        """
+        Returns park traffic for the most recent time buckets, oldest first.
+
+        Args:
+            buckets (int): Number of buckets to return.
+            now (float): End of the window in seconds since the epoch; defaults to now.
+
+        Returns:
+            list[dict]: One {"start", "entries", "exits", "visitors"} dict per bucket,
+                where visitors is the park count at the end of the bucket.
+        """
+        last = int((now if now is not None else time.time()) // self.__bucket_seconds)
+        first = last - buckets + 1
+        tallies = {}
+        later_net = 0
+        for shard in self.__shards:
+            with shard.lock:
+                for bucket, (entries, exits) in shard.buckets.items():
+                    if bucket > last:
+                        later_net += entries - exits
+                    elif bucket >= first:
+                        tally = tallies.setdefault(bucket, [0, 0])
+                        tally[0] += entries
+                        tally[1] += exits
+
+        # Walk back from the live count to the count at the end of each bucket
+        visitors = self.get_current_visitors() - later_net
+        rows = []
+        for bucket in range(last, first - 1, -1):
+            entries, exits = tallies.get(bucket, (0, 0))
+            rows.append({
+                "start": datetime.fromtimestamp(bucket * self.__bucket_seconds),
+                "entries": entries,
+                "exits": exits,
+                "visitors": visitors,
+            })
+            visitors -= entries - exits
+        rows.reverse()
+        return rows
+
+
+def parse_event(line: str) -> tuple:
+    """
+    Parses one gate feed line of the form "timestamp,kind[,ride]".
+
+    Returns:
+        tuple: (timestamp, kind, ride) with ride None for the park gates.
+    """
+    fields = line.rstrip("\r\n").split(",")
+    if len(fields) < 2:
+        raise ValueError(f"Malformed gate event: {line!r}")
+    ride = fields[2] if len(fields) > 2 and fields[2] else PARK
+    return float(fields[0]), fields[1], ride
+
+
+class GateFeed:
+    """
+    Reads new events appended to a local gate feed file into a counter.
+
+    The read offset is remembered between polls, so each poll only parses
+    the lines written since the previous one. A trailing partial line is
+    left for the next poll.
+    """
+
+    def __init__(self, file_path: str, counter: OccupancyCounter):
+        """
+        Initializes a new GateFeed.
+
+        Args:
+            file_path (str): Path to the gate feed file.
+            counter (OccupancyCounter): Counter receiving the events.
+        """
+        self.__file_path = file_path
+        self.__counter = counter
+        self.__offset = 0
+
+    def poll(self) -> int:
+        """
+        Records every complete event appended since the last poll.
+
+        Returns:
+            int: Number of events recorded.
+        """
+        if not os.path.exists(self.__file_path):
+            return 0
+        with open(self.__file_path, "rb") as f:
+            f.seek(self.__offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        if not end:
+            return 0
+        self.__offset += end
+        lines = data[:end].decode("utf-8").splitlines()
+        return self.__counter.process(parse_event(line) for line in lines if line.strip())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a gate event feed and print the resulting occupancy.")
+    parser.add_argument("feed", help='File with one "timestamp,kind[,ride]" event per line.')
+    parser.add_argument("--buckets", type=int, default=12)
+    args = parser.parse_args()
+    occupancy = OccupancyCounter()
+    start = time.perf_counter()
+    events = GateFeed(args.feed, occupancy).poll()
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print(f"{events} events in {elapsed * 1000:.0f} ms ({events / elapsed:,.0f} events/s)")
+    print(f"Current visitors: {occupancy.get_current_visitors()}")
+    for ride, count in sorted(occupancy.get_ride_counts().items()):
+        print(f"  {ride}: {count}")
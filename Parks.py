@@ -0,0 +1,438 @@
+import itertools
+import json
+import os
+import re
+import struct
+import Archive
+import Forecast
+import Reports
+import Reservations
+import Schedule
+import Storage
+from Main import Park, Ride
+
+DEFAULT_PARK = "Main Park"
+PARK_FILE = "park.json"
+# last order number issued
+ORDER_COUNTER = struct.Struct("<Q")
+
+
+def load_park_directories(config_path: str = "parks.json") -> dict:
+    """
+    Reads the data directory of every park from a JSON config file.
+
+    The file maps park names to directories, e.g. {"Main Park": ".",
+    "Seaside": "parks/seaside"}. Without a config file there is a single park
+    whose data stays in the current directory, as before sharding.
+    """
+    if not os.path.exists(config_path):
+        return {DEFAULT_PARK: "."}
+    with open(config_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_park(park_id: str, config_path: str) -> Park:
+    """
+    Builds a park's Park object from its JSON description.
+
+    The file holds the Park fields and its rides, e.g. {"location": "Los
+    Angeles, CA", "operating_hours": "Mon-Fri 10am-6pm", "rides": [{"name":
+    "Coaster", "ride_type": "Thrill", "min_height": "48 inches",
+    "max_height": "None", "duration": "2 minutes", "capacity": 20, "status":
+    "Open"}]}. Without the file the park has no rides and is always open.
+    """
+    details = {}
+    if os.path.exists(config_path):
+        with open(config_path, encoding="utf-8") as f:
+            details = json.load(f)
+    park = Park(park_id, details.get("location", ""), details.get("operating_hours"), details.get("current_visitors", 0),
+                details.get("attractions"), details.get("events"), details.get("services"))
+    for ride in details.get("rides", []):
+        park.add_ride(Ride(ride["name"], ride.get("ride_type", ""), ride.get("min_height", "None"), ride.get("max_height", "None"),
+                           ride.get("duration", ""), ride.get("capacity", 0), ride.get("status", "Open")))
+    return park
+
+
+class ParkShard:
+    """
+    The order store, sales rollup and reservation calendar of one park.
+
+    Every park keeps its own files in its own directory, so parks never
+    share a log, an index or a lock. Orders older than the archive age are
+    moved from the hot order log into compressed segments under "archive".
+
+    Attributes:
+        park_id (str): Name of the park.
+        directory (str): Directory holding the park's data files.
+        order_prefix (str): Prefix of the park's order IDs.
+    """
+
+    def __init__(self, park_id: str, directory: str, capacities: dict, order_prefix: str = "ORDER"):
+        """
+        Opens (or creates) the data files of one park.
+
+        Args:
+            park_id (str): Name of the park.
+            directory (str): Directory holding the park's data files.
+            capacities (dict): Daily capacity per ticket type.
+            order_prefix (str): Prefix of the park's order IDs.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.__park_id = park_id
+        self.__directory = directory
+        self.__order_prefix = order_prefix
+        self.__orders_file = os.path.join(directory, "orders.log")
+        self.__counter_file = os.path.join(directory, "orders.seq")
+        self.__archive_dir = os.path.join(directory, "archive")
+        self.__sales_file = os.path.join(directory, "sales.snap")
+        self.__orders = self.__open_orders()
+        self.__sales = Storage.load_store(self.__sales_file, "sales", os.path.join(directory, "sales.pkl"))
+        self.__reservations = Reservations.ReservationCalendar(os.path.join(directory, "reservations.bin"), capacities)
+        self.__schedule_file = os.path.join(directory, "schedule.json")
+        self.__schedule = Schedule.ParkSchedule.load(self.__schedule_file)
+        self.__forecast = None
+
+    # Internal helpers
+    def __open_orders(self) -> Archive.TieredOrders:
+        order_log = Storage.open_order_log(self.__orders_file, os.path.join(self.__directory, "orders.snap"), os.path.join(self.__directory, "orders.pkl"))
+        return Archive.TieredOrders(order_log, Archive.OrderArchive(self.__archive_dir))
+
+    def __last_order_number(self) -> int:
+        # Before the counter existed, IDs were numbered by order count, so continue after the highest one
+        pattern = re.compile(re.escape(self.__order_prefix) + r"-(\d+)$")
+        highest = 0
+        for order_id, _ in self.__orders.items():
+            match = pattern.match(order_id)
+            if match:
+                highest = max(highest, int(match.group(1)))
+        return highest
+
+    # Getters
+    def get_park_id(self) -> str:
+        return self.__park_id
+
+    def get_directory(self) -> str:
+        return self.__directory
+
+    def get_orders(self) -> Archive.TieredOrders:
+        return self.__orders
+
+    def get_orders_file(self) -> str:
+        return self.__orders_file
+
+    def get_archive_dir(self) -> str:
+        return self.__archive_dir
+
+    def get_sales(self) -> dict:
+        return self.__sales
+
+    def get_sales_file(self) -> str:
+        return self.__sales_file
+
+    def get_reservations(self) -> Reservations.ReservationCalendar:
+        return self.__reservations
+
+    def get_schedule(self) -> Schedule.ParkSchedule:
+        return self.__schedule
+
+    def get_schedule_file(self) -> str:
+        return self.__schedule_file
+
+    def get_forecast(self, today=None) -> Forecast.DemandForecast:
+        """
+        Returns the park's demand forecast, fitted on first use and brought up to date with every day closed since.
+        """
+        if self.__forecast is None:
+            self.__forecast = Forecast.DemandForecast.fit(self.__sales, today, operating_hours=self.__schedule.get_operating_hours())
+        else:
+            self.__forecast.update(self.__sales, today)
+        return self.__forecast
+
+    # Setters
+    def set_schedule(self, schedule: Schedule.ParkSchedule):
+        self.__schedule = schedule
+        # The forecast depends on the park's hours
+        self.__forecast = None
+
+    # Behavioral Methods
+    def next_order_id(self) -> str:
+        """
+        Issues the park's next order ID from a counter saved in the park's directory.
+
+        The counter is shared by every process using the park, and skips
+        IDs that are already taken, e.g. by bulk-imported orders.
+        """
+        with Storage.file_lock(self.__counter_file + ".lock"):
+            try:
+                (number,) = ORDER_COUNTER.unpack(Storage.atomic_read(self.__counter_file, generations=1))
+            except Storage.SnapshotError:
+                number = self.__last_order_number()
+            number += 1
+            while f"{self.__order_prefix}-{number}" in self.__orders:
+                number += 1
+            Storage.atomic_write(self.__counter_file, ORDER_COUNTER.pack(number), generations=1)
+        return f"{self.__order_prefix}-{number}"
+
+    def record_order(self, order_id: str, order: dict):
+        """
+        Appends an order to the park's log and adds it to the daily sales rollup.
+        """
+        self.__orders[order_id] = order
+        if self.__forecast is not None and order["order_date"] not in self.__sales:
+            # The first sale of a new day closes the rollups before it
+            self.__forecast.update(self.__sales, order["order_date"])
+        daily = self.__sales.setdefault(order["order_date"], {})
+        daily[order["ticket"]] = daily.get(order["ticket"], 0) + order["quantity"]
+        Storage.write_snapshot(self.__sales_file, "sales", self.__sales)
+
+    def archive(self, max_age_days: int = Archive.ARCHIVE_AFTER_DAYS, codec: str = "zlib") -> int:
+        """
+        Moves orders older than max_age_days from the hot log into the archive.
+
+        Returns:
+            int: Number of orders archived.
+        """
+        self.__orders.close()
+        try:
+            return Archive.archive_orders(self.__orders_file, self.__archive_dir, Archive.cutoff_date(max_age_days), codec)
+        finally:
+            self.__orders = self.__open_orders()
+
+    def rename_orders(self, renames: dict) -> int:
+        """
+        Gives orders in the hot log new IDs, e.g. the IDs the central store assigned in a conflict.
+
+        Args:
+            renames (dict): New order ID per old order ID.
+
+        Returns:
+            int: Number of orders renamed.
+        """
+        order_log = self.__orders.get_order_log()
+        matches = {order_id: renamed for order_id, renamed in renames.items() if order_id in order_log}
+        if not matches:
+            return 0
+        self.__orders.close()
+        try:
+            return Storage.rename_orders(self.__orders_file, matches)
+        finally:
+            self.__orders = self.__open_orders()
+
+    def close(self):
+        self.__orders.close()
+
+
+class ParkRouter:
+    """
+    Directs orders, reports and capacity queries to the shard of each park.
+
+    Shards are opened on first use. Reports over several parks fan the
+    parks' order logs out over one process pool and merge the results.
+
+    Attributes:
+        parks (dict): Data directory per park name.
+        capacities (dict): Daily capacity per ticket type, shared by all parks.
+    """
+
+    def __init__(self, park_directories: dict, capacities: dict, kiosk: str = None):
+        """
+        Initializes a new ParkRouter.
+
+        Args:
+            park_directories (dict): Data directory per park name.
+            capacities (dict): Daily capacity per ticket type.
+            kiosk (str): Name of this kiosk, added to its order IDs when
+                several kiosks sync with one central store.
+        """
+        self.__park_directories = dict(park_directories)
+        self.__capacities = capacities
+        self.__kiosk = kiosk
+        self.__shards = {}
+        self.__parks = {}
+
+    # Internal helpers
+    def __order_prefix(self, park_id: str) -> str:
+        # The park in the current directory keeps the original "ORDER-n" IDs
+        parts = ["ORDER"]
+        if os.path.abspath(self.__park_directories[park_id]) != os.path.abspath("."):
+            parts.append(re.sub(r"[^A-Z0-9]+", "", park_id.upper()))
+        if self.__kiosk:
+            # Kiosks number their orders independently, so the kiosk name keeps their IDs apart
+            parts.append(re.sub(r"[^A-Z0-9]+", "", self.__kiosk.upper()))
+        return "-".join(parts)
+
+    # Getters
+    def get_park_ids(self) -> list:
+        return list(self.__park_directories)
+
+    def get_park(self, park_id: str):
+        return self.__parks.get(park_id)
+
+    def shard(self, park_id: str) -> ParkShard:
+        """
+        Returns the shard of a park, opening it on first use.
+
+        Raises:
+            KeyError: If the park is not configured.
+        """
+        shard = self.__shards.get(park_id)
+        if shard is None:
+            if park_id not in self.__park_directories:
+                raise KeyError(f"Unknown park '{park_id}'.")
+            shard = ParkShard(park_id, self.__park_directories[park_id], self.__capacities, self.__order_prefix(park_id))
+            self.__shards[park_id] = shard
+        return shard
+
+    # Relationship Management
+    def add_park(self, park_id: str, park):
+        """
+        Attaches the Park domain object of a configured park.
+
+        Without a schedule file in the park's directory, the park's own
+        operating hours decide when its tickets can be used.
+        """
+        if park_id not in self.__park_directories:
+            raise KeyError(f"Unknown park '{park_id}'.")
+        self.__parks[park_id] = park
+        shard = self.shard(park_id)
+        if not os.path.exists(shard.get_schedule_file()):
+            shard.set_schedule(Schedule.ParkSchedule.from_park(park))
+
+    def load_parks(self):
+        """
+        Attaches a Park object to every configured park, described by the PARK_FILE in its directory.
+        """
+        for park_id, directory in self.__park_directories.items():
+            self.add_park(park_id, load_park(park_id, os.path.join(directory, PARK_FILE)))
+
+    # Behavioral Methods
+    def place_order(self, park_id: str, order: dict, span: int = 1) -> str:
+        """
+        Reserves capacity and records a new order in the park's shard.
+
+        The reservation is released again if the order cannot be recorded.
+
+        Args:
+            park_id (str): The park the tickets are for.
+            order (dict): Order fields, including ticket, quantity, order_date and visit_date.
+            span (int): Number of consecutive days the ticket is valid for.
+
+        Returns:
+            str: The new order ID.
+
+        Raises:
+            Schedule.ParkClosedError: If the park is closed on the visit date.
+            Reservations.SoldOutError: If the visit date has too few tickets left.
+        """
+        shard = self.shard(park_id)
+        shard.get_schedule().check_visit(order["visit_date"])
+        shard.get_reservations().reserve(order["ticket"], order["visit_date"], order["quantity"], span)
+        order_id = None
+        try:
+            order_id = shard.next_order_id()
+            shard.record_order(order_id, order)
+        except BaseException:
+            # An order that reached the log keeps its tickets
+            if order_id is None or shard.get_orders().get_order_log().get(order_id) is None:
+                shard.get_reservations().release(order["ticket"], order["visit_date"], order["quantity"], span)
+            raise
+        return order_id
+
+    def get_schedule(self, park_id: str) -> Schedule.ParkSchedule:
+        return self.shard(park_id).get_schedule()
+
+    def staffing_plan(self, park_id: str, days: int = Forecast.FORECAST_DAYS) -> list:
+        """
+        Returns the expected guests, ride load and staff of a park for the coming days.
+        """
+        return Forecast.staffing_plan(self.shard(park_id).get_forecast().forecast(days=days), self.__parks.get(park_id))
+
+    def get_remaining(self, park_id: str, ticket_type: str, visit_date) -> int:
+        return self.shard(park_id).get_reservations().get_remaining(ticket_type, visit_date)
+
+    def ride_capacity(self, park_id: str) -> int:
+        """
+        Returns the total ride capacity of a park, or 0 if no Park object is attached.
+        """
+        park = self.__parks.get(park_id)
+        return park.check_capacity() if park is not None else 0
+
+    def find_order(self, order_id: str, default=None):
+        """
+        Looks an order up in every shard.
+
+        Returns:
+            tuple: (park_id, order), or default if no park has the order.
+        """
+        for park_id in self.__park_directories:
+            order = self.shard(park_id).get_orders().get(order_id)
+            if order is not None:
+                return park_id, order
+        return default
+
+    def customer_orders(self, customer: str):
+        """
+        Yields (order_id, order) pairs for one customer from every park.
+        """
+        return itertools.chain.from_iterable(self.shard(park_id).get_orders().customer_orders(customer) for park_id in self.__park_directories)
+
+    def items(self):
+        """
+        Streams (order_id, order) pairs from every park.
+        """
+        return itertools.chain.from_iterable(self.shard(park_id).get_orders().items() for park_id in self.__park_directories)
+
+    def build_reports(self, prices: dict, date_from: str = None, date_to: str = None, park_ids: list = None, workers: int = None) -> dict:
+        """
+        Builds a sales report per park, in parallel across all selected parks.
+
+        Args:
+            prices (dict): List price per ticket type.
+            date_from (str): Optional first order date to include.
+            date_to (str): Optional last order date to include.
+            park_ids (list): Parks to report on; defaults to every park.
+            workers (int): Number of worker processes; defaults to the CPU count.
+
+        Returns:
+            dict: ReportTotals per park.
+        """
+        log_paths = {}
+        segment_paths = {}
+        for park_id in park_ids if park_ids is not None else self.__park_directories:
+            shard = self.shard(park_id)
+            shard.get_orders().flush_index()
+            log_paths[park_id] = shard.get_orders_file()
+            segment_paths[park_id] = shard.get_orders().get_archive().get_segment_paths()
+        return Reports.build_reports_parallel(log_paths, prices, date_from, date_to, workers, segment_paths)
+
+    def build_report(self, prices: dict, date_from: str = None, date_to: str = None, park_ids: list = None, workers: int = None) -> Reports.ReportTotals:
+        """
+        Builds one sales report merged across parks.
+        """
+        totals = Reports.ReportTotals()
+        for report in self.build_reports(prices, date_from, date_to, park_ids, workers).values():
+            totals.merge(report)
+        return totals
+
+    def rename_orders(self, renames: dict) -> int:
+        """
+        Applies order renames to every park's hot log.
+
+        Returns:
+            int: Number of orders renamed.
+        """
+        return sum(self.shard(park_id).rename_orders(renames) for park_id in self.__park_directories)
+
+    def archive_parks(self, max_age_days: int = Archive.ARCHIVE_AFTER_DAYS, park_ids: list = None) -> dict:
+        """
+        Runs the order archive job on every selected park.
+
+        Returns:
+            dict: Number of orders archived per park.
+        """
+        return {park_id: self.shard(park_id).archive(max_age_days) for park_id in (park_ids if park_ids is not None else self.__park_directories)}
+
+    def close(self):
+        for shard in self.__shards.values():
+            shard.close()
+        self.__shards = {}
@@ -0,0 +1,257 @@
+import argparse
+import os
+from datetime import datetime
+import Storage
+
+# Permission bits
+VIEW_SALES = 1 << 0
+VIEW_OCCUPANCY = 1 << 1
+VIEW_REPORTS = 1 << 2
+SEARCH_RECORDS = 1 << 3
+EXPORT_DATA = 1 << 4
+MODIFY_DISCOUNTS = 1 << 5
+MANAGE_USERS = 1 << 6
+ALL_PERMISSIONS = (1 << 7) - 1
+
+# Action name -> (permission bit, minimum security clearance level)
+ACTIONS = {
+    "view_sales": (VIEW_SALES, 1),
+    "view_occupancy": (VIEW_OCCUPANCY, 1),
+    "view_reports": (VIEW_REPORTS, 2),
+    "search_records": (SEARCH_RECORDS, 2),
+    "export_data": (EXPORT_DATA, 3),
+    "modify_discounts": (MODIFY_DISCOUNTS, 3),
+    "manage_users": (MANAGE_USERS, 4),
+}
+PERMISSIONS = {name: bit for name, (bit, _) in ACTIONS.items()}
+MAX_CLEARANCE = 5
+
+# Grants a role gets when a profile lists no permissions of its own, and the clearance assumed when none is set
+ROLE_GRANTS = {
+    "Customer": (0, 0),
+    "Manager": (VIEW_SALES | VIEW_OCCUPANCY | VIEW_REPORTS | SEARCH_RECORDS, 2),
+    # Plain GUI admins keep the access they had before permissions existed
+    "Admin": (ALL_PERMISSIONS & ~MANAGE_USERS, MAX_CLEARANCE),
+    # Anyone can register an admin account on the create-account page, so wider access needs an admin profile
+    "Registered Admin": (VIEW_SALES | VIEW_OCCUPANCY, 1),
+    "Super Admin": (ALL_PERMISSIONS, MAX_CLEARANCE),
+}
+# Role given to admin accounts created on the create-account page
+SELF_REGISTERED_ADMIN = "Registered Admin"
+
+# CLEARANCE_MASKS[level] holds every permission bit that clearance level may use
+CLEARANCE_MASKS = [
+    sum(bit for bit, minimum in ACTIONS.values() if minimum <= level)
+    for level in range(MAX_CLEARANCE + 1)
+]
+AUDIT_BATCH = 100
+
+
+class AccessDenied(PermissionError):
+    """
+    Raised when an account is not authorized for an action.
+    """
+
+
+def parse_permissions(permissions) -> int:
+    """
+    Converts a permission list such as ["view_reports", "Modify Discounts"] to a bitmask.
+
+    Names are matched case-insensitively, with spaces or dashes for
+    underscores. Unknown names grant nothing.
+    """
+    if isinstance(permissions, str):
+        permissions = permissions.split(",")
+    mask = 0
+    for name in permissions:
+        mask |= PERMISSIONS.get(name.strip().lower().replace(" ", "_").replace("-", "_"), 0)
+    return mask
+
+
+def format_permissions(mask: int) -> str:
+    """
+    Converts a bitmask back to a comma-separated permission list.
+    """
+    return ",".join(name for name, bit in PERMISSIONS.items() if mask & bit)
+
+
+class AccessControl:
+    """
+    Compiles roles, clearance levels and permission lists into bitmasks.
+
+    A profile is compiled once, at login: its explicit permission list, or
+    the role's grants when it has none, is masked by what the security
+    clearance level allows, and super admins get every bit. Compiled masks
+    are kept in a decision table keyed by the profile, so accounts that
+    share a profile share one entry. Checking an action is then a single
+    AND against a precomputed bit.
+    """
+
+    def __init__(self, role_grants: dict = None):
+        """
+        Initializes a new AccessControl.
+
+        Args:
+            role_grants (dict): (permission mask, default clearance) per role;
+                defaults to ROLE_GRANTS.
+        """
+        self.__role_grants = role_grants if role_grants is not None else ROLE_GRANTS
+        self.__decisions = {}
+
+    # Getters
+    def get_decision_count(self) -> int:
+        return len(self.__decisions)
+
+    # Behavioral Methods
+    def compile(self, role: str, permissions=None, clearance: int = None, super_admin: bool = False) -> int:
+        """
+        Returns the permission mask of a profile.
+
+        Args:
+            role (str): Role name, e.g. "Admin" or "Manager".
+            permissions (list | str): Explicit permission names; they replace the
+                role's grants. None falls back to the role's grants.
+            clearance (int): Security clearance level; defaults to the role's.
+            super_admin (bool): Whether the account bypasses clearance checks.
+
+        Returns:
+            int: Bitmask of the permissions granted.
+        """
+        explicit = None if permissions is None else parse_permissions(permissions)
+        key = (role, explicit, clearance, bool(super_admin))
+        mask = self.__decisions.get(key)
+        if mask is None:
+            if super_admin:
+                mask = ALL_PERMISSIONS
+            else:
+                grants, default_clearance = self.__role_grants.get(role, (0, 0))
+                level = default_clearance if clearance is None else clearance
+                mask = (grants if explicit is None else explicit) & CLEARANCE_MASKS[max(0, min(level, MAX_CLEARANCE))]
+            self.__decisions[key] = mask
+        return mask
+
+    def compile_admin(self, admin) -> int:
+        """
+        Returns the permission mask of a Main.Admin object.
+        """
+        return self.compile(admin.get_role(), admin.get_permission_list() or None, admin.get_security_clearance_level(), admin.get_is_super_admin())
+
+    def compile_account(self, account: dict, profile: dict = None) -> int:
+        """
+        Returns the permission mask of a GUI account record and its optional admin profile.
+
+        Args:
+            account (dict): The account record, with at least a role.
+            profile (dict): The account's entry in the admins store, if any.
+        """
+        if profile is None:
+            return self.compile(account["role"])
+        return self.compile(account["role"], profile["permissions"] or None, profile["clearance"], profile["super_admin"])
+
+    @staticmethod
+    def allows(mask: int, action: str) -> bool:
+        return bool(mask & ACTIONS[action][0])
+
+    @staticmethod
+    def check(mask: int, action: str):
+        """
+        Raises:
+            AccessDenied: If the mask does not allow the action.
+        """
+        if not mask & ACTIONS[action][0]:
+            raise AccessDenied(f"Not authorized to {action.replace('_', ' ')}.")
+
+
+class AuditLog:
+    """
+    Append-only record of admin actions, written in batches.
+
+    record() only adds an entry to an in-memory batch; the batch is written
+    with a single append and fsync when it reaches its size or on flush().
+    Each entry counts the accounts the action exposed, and the log keeps a
+    running total per admin.
+    """
+
+    def __init__(self, log_path: str = "audit.log", batch_size: int = AUDIT_BATCH):
+        """
+        Opens (or creates) an audit log.
+
+        Args:
+            log_path (str): Path to the audit log.
+            batch_size (int): Entries buffered before they are written.
+        """
+        self.__log_path = log_path
+        self.__batch_size = batch_size
+        if not os.path.exists(log_path) or os.path.getsize(log_path) < Storage.LOG_HEADER.size:
+            with open(log_path, "wb") as f:
+                f.write(Storage.LOG_HEADER.pack(Storage.LOG_MAGIC, Storage.LOG_FORMAT_VERSION, Storage.SCHEMAS.get("audit").get_store_id()))
+        self.__accessed = {}
+        for _, entry in Storage.read_log_range(log_path, "audit"):
+            self.__accessed[entry["admin"]] = self.__accessed.get(entry["admin"], 0) + entry["accounts"]
+        with open(log_path, "r+b") as f:
+            # Drop a torn entry left by an interrupted append
+            Storage.repair_torn_tail(f)
+        self.__file = open(log_path, "ab")
+        self.__pending = []
+
+    # Getters
+    def get_accounts_accessed(self, admin: str) -> int:
+        """
+        Returns how many accounts an admin has accessed, including unwritten entries.
+        """
+        return self.__accessed.get(admin, 0) + sum(entry["accounts"] for entry in self.__pending if entry["admin"] == admin)
+
+    def get_pending_count(self) -> int:
+        return len(self.__pending)
+
+    # Behavioral Methods
+    def record(self, admin: str, action: str, accounts: int = 0):
+        """
+        Adds an admin action to the current batch.
+
+        Args:
+            admin (str): Username of the admin.
+            action (str): The action taken.
+            accounts (int): Number of accounts the action accessed.
+        """
+        self.__pending.append({"admin": admin, "action": action, "accounts": accounts, "entry_time": datetime.now().isoformat(timespec="seconds")})
+        if len(self.__pending) >= self.__batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the current batch with one append and one fsync.
+        """
+        if not self.__pending:
+            return
+        buffer = bytearray()
+        for entry in self.__pending:
+            buffer += Storage.encode_log_record("audit", entry)
+        self.__file.write(buffer)
+        self.__file.flush()
+        os.fsync(self.__file.fileno())
+        for entry in self.__pending:
+            self.__accessed[entry["admin"]] = self.__accessed.get(entry["admin"], 0) + entry["accounts"]
+        self.__pending = []
+
+    def close(self):
+        self.flush()
+        self.__file.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Grant an admin permissions and a security clearance level.")
+    parser.add_argument("username")
+    parser.add_argument("--permissions", default="", help="Comma-separated permission names")
+    parser.add_argument("--clearance", type=int, default=MAX_CLEARANCE)
+    parser.add_argument("--super-admin", action="store_true")
+    parser.add_argument("--store", default="admins.snap")
+    args = parser.parse_args()
+    profiles = Storage.load_store(args.store, "admins")
+    profiles[args.username] = {
+        "permissions": format_permissions(parse_permissions(args.permissions)),
+        "clearance": args.clearance,
+        "super_admin": int(args.super_admin),
+    }
+    Storage.write_snapshot(args.store, "admins", profiles)
+    print(f"{args.username}: {profiles[args.username]}")
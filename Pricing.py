@@ -0,0 +1,258 @@
+import argparse
+import mmap
+import os
+import struct
+import time
+from contextlib import contextmanager
+import Storage
+
+TABLE_MAGIC = b"TKPT"
+TABLE_FORMAT_VERSION = 1
+# magic, format version, generation, ticket count
+TABLE_HEADER = struct.Struct("<4sHxxQI4x")
+GENERATION_OFFSET = 8
+GENERATION = struct.Struct("<Q")
+# type, validity, features, list price, discount (%)
+TICKET_SLOT = struct.Struct("<32s16s64sdd")
+MAX_TICKETS = 64
+TABLE_SIZE = TABLE_HEADER.size + TICKET_SLOT.size * MAX_TICKETS
+# Reads of an odd generation before checking for a writer that died mid-update
+READ_RETRIES = 1000
+
+DEFAULT_TICKETS = [
+    {"type": "Single-Day Pass", "price": 50.0, "validity": "1 Day", "features": "Access to all rides"},
+    {"type": "Multi-Day Pass", "price": 120.0, "validity": "3 Days", "features": "Access to all rides"},
+    {"type": "Group Pass", "price": 200.0, "validity": "1 Day", "features": "Access for up to 5 people"},
+]
+
+
+def _encode_text(value: str, size: int, field: str) -> bytes:
+    encoded = value.encode("utf-8")
+    if len(encoded) > size:
+        raise ValueError(f"Ticket {field} '{value}' is longer than {size} bytes.")
+    return encoded
+
+
+def _decode_text(value: bytes) -> str:
+    return value.rstrip(b"\0").decode("utf-8")
+
+
+class PriceTable:
+    """
+    Ticket catalog and discounts in a memory-mapped file shared by every kiosk process.
+
+    The table is a fixed-size file of ticket slots behind a header with a
+    generation counter. Writers bump the counter to an odd value, update the
+    slots and bump it to the next even value; readers retry while the
+    counter is odd or changed during their read (a sequence lock). A writer
+    killed between its two bumps leaves the counter odd; readers that keep
+    finding it odd take the write lock and, with no writer left, make it
+    even again. Every
+    process maps the same file, so a discount saved by an admin is visible
+    to all kiosks on their next read, without reloading or restarting.
+    Readers keep the decoded catalog per generation, so a read that finds
+    the generation unchanged costs one 8-byte load.
+    """
+
+    def __init__(self, table_path: str = "prices.tbl", tickets: list = None):
+        """
+        Opens the shared price table, creating it from a ticket catalog if needed.
+
+        Args:
+            table_path (str): Path to the table file.
+            tickets (list[dict]): Catalog used when the table does not exist yet;
+                defaults to DEFAULT_TICKETS.
+        """
+        self.__table_path = table_path
+        self.__lock_path = table_path + ".lock"
+        created = False
+        if not os.path.exists(table_path) or os.path.getsize(table_path) != TABLE_SIZE:
+            with open(table_path, "wb") as f:
+                f.write(bytes(TABLE_SIZE))
+            created = True
+        self.__file = open(table_path, "r+b")
+        self.__map = mmap.mmap(self.__file.fileno(), TABLE_SIZE)
+        self.__cached_generation = None
+        self.__tickets = []
+        self.__by_type = {}
+        magic, format_version, _, _ = TABLE_HEADER.unpack_from(self.__map, 0)
+        if created or magic != TABLE_MAGIC or format_version != TABLE_FORMAT_VERSION:
+            self.set_tickets(tickets if tickets is not None else DEFAULT_TICKETS)
+        elif GENERATION.unpack_from(self.__map, GENERATION_OFFSET)[0] % 2:
+            self.__recover()
+
+    # Internal helpers
+    @contextmanager
+    def __writing(self, ticket_type: str = None):
+        """
+        Holds the write lock with the generation odd, yielding the slot offset of ticket_type if given.
+
+        Only writers lock; readers never block.
+        """
+        with Storage.file_lock(self.__lock_path):
+            offset = self.__slot_offset(ticket_type) if ticket_type is not None else None
+            (generation,) = GENERATION.unpack_from(self.__map, GENERATION_OFFSET)
+            # A writer killed between its two bumps left the generation odd
+            generation += generation % 2
+            GENERATION.pack_into(self.__map, GENERATION_OFFSET, generation + 1)
+            try:
+                yield offset
+            finally:
+                GENERATION.pack_into(self.__map, GENERATION_OFFSET, generation + 2)
+                self.__map.flush()
+
+    def __recover(self):
+        # Writers hold the lock for as long as the generation is odd, so an odd generation under the lock has no writer left
+        with Storage.file_lock(self.__lock_path):
+            (generation,) = GENERATION.unpack_from(self.__map, GENERATION_OFFSET)
+            if generation % 2:
+                GENERATION.pack_into(self.__map, GENERATION_OFFSET, generation + 1)
+                self.__map.flush()
+
+    def __read(self):
+        retries = 0
+        while True:
+            (generation,) = GENERATION.unpack_from(self.__map, GENERATION_OFFSET)
+            if generation == self.__cached_generation:
+                return
+            if generation % 2:
+                retries += 1
+                if retries >= READ_RETRIES:
+                    self.__recover()
+                    retries = 0
+                else:
+                    time.sleep(0)
+                continue
+            count = TABLE_HEADER.unpack_from(self.__map, 0)[3]
+            tickets = []
+            for slot in range(count):
+                ticket_type, validity, features, price, discount = TICKET_SLOT.unpack_from(self.__map, TABLE_HEADER.size + slot * TICKET_SLOT.size)
+                tickets.append({
+                    "type": _decode_text(ticket_type),
+                    "price": price,
+                    "validity": _decode_text(validity),
+                    "features": _decode_text(features),
+                    "discount": discount,
+                })
+            if GENERATION.unpack_from(self.__map, GENERATION_OFFSET)[0] == generation:
+                self.__tickets = tickets
+                self.__by_type = {ticket["type"]: ticket for ticket in tickets}
+                self.__cached_generation = generation
+                return
+
+    def __slot_offset(self, ticket_type: str) -> int:
+        # Called with the write lock held, so the slots are read straight from the map
+        for slot in range(TABLE_HEADER.unpack_from(self.__map, 0)[3]):
+            offset = TABLE_HEADER.size + slot * TICKET_SLOT.size
+            if _decode_text(TICKET_SLOT.unpack_from(self.__map, offset)[0]) == ticket_type:
+                return offset
+        raise KeyError(f"Unknown ticket type '{ticket_type}'.")
+
+    # Getters
+    def get_generation(self) -> int:
+        """
+        Returns the table's generation; it changes with every update.
+        """
+        self.__read()
+        return self.__cached_generation
+
+    def get_tickets(self) -> list:
+        """
+        Returns the catalog as a list of dicts with type, price, validity, features and discount.
+        """
+        self.__read()
+        return self.__tickets
+
+    def get_ticket(self, ticket_type: str) -> dict:
+        self.__read()
+        return self.__by_type[ticket_type]
+
+    def get_discount(self, ticket_type: str) -> float:
+        return self.get_ticket(ticket_type)["discount"]
+
+    def get_discounts(self) -> dict:
+        return {ticket["type"]: ticket["discount"] for ticket in self.get_tickets()}
+
+    def get_list_prices(self) -> dict:
+        return {ticket["type"]: ticket["price"] for ticket in self.get_tickets()}
+
+    def get_price(self, ticket_type: str) -> float:
+        """
+        Returns a ticket's current price after its discount.
+        """
+        ticket = self.get_ticket(ticket_type)
+        return ticket["price"] * (1 - ticket["discount"] / 100)
+
+    # Setters
+    def set_discount(self, ticket_type: str, discount: float):
+        """
+        Sets a ticket's discount for every kiosk.
+
+        Raises:
+            KeyError: If the ticket type is not in the catalog.
+            ValueError: If the discount is not between 0 and 100.
+        """
+        if not 0 <= discount <= 100:
+            raise ValueError("Discount must be between 0 and 100.")
+        with self.__writing(ticket_type) as offset:
+            struct.pack_into("<d", self.__map, offset + TICKET_SLOT.size - 8, discount)
+
+    def set_price(self, ticket_type: str, price: float):
+        """
+        Sets a ticket's list price for every kiosk.
+        """
+        if price < 0:
+            raise ValueError("Price cannot be negative.")
+        with self.__writing(ticket_type) as offset:
+            struct.pack_into("<d", self.__map, offset + TICKET_SLOT.size - 16, price)
+
+    def set_tickets(self, tickets: list):
+        """
+        Replaces the whole catalog.
+
+        Args:
+            tickets (list[dict]): Tickets with type, price, validity, features
+                and optionally discount.
+
+        Raises:
+            ValueError: If there are too many tickets or a text field is too long.
+        """
+        if len(tickets) > MAX_TICKETS:
+            raise ValueError(f"The price table holds at most {MAX_TICKETS} tickets.")
+        slots = [
+            TICKET_SLOT.pack(
+                _encode_text(ticket["type"], 32, "type"),
+                _encode_text(ticket["validity"], 16, "validity"),
+                _encode_text(ticket["features"], 64, "features"),
+                float(ticket["price"]),
+                float(ticket.get("discount", 0)),
+            )
+            for ticket in tickets
+        ]
+        with self.__writing():
+            self.__map[0:GENERATION_OFFSET] = TABLE_HEADER.pack(TABLE_MAGIC, TABLE_FORMAT_VERSION, 0, 0)[:GENERATION_OFFSET]
+            struct.pack_into("<I", self.__map, GENERATION_OFFSET + GENERATION.size, len(slots))
+            self.__map[TABLE_HEADER.size:TABLE_HEADER.size + len(slots) * TICKET_SLOT.size] = b"".join(slots)
+
+    # Behavioral Methods
+    def close(self):
+        self.__map.close()
+        self.__file.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show or change the shared ticket price table.")
+    parser.add_argument("--table", default="prices.tbl")
+    parser.add_argument("--ticket", help="Ticket type to change")
+    parser.add_argument("--discount", type=float)
+    parser.add_argument("--price", type=float)
+    args = parser.parse_args()
+    table = PriceTable(args.table)
+    if args.ticket and args.discount is not None:
+        table.set_discount(args.ticket, args.discount)
+    if args.ticket and args.price is not None:
+        table.set_price(args.ticket, args.price)
+    print(f"Generation {table.get_generation()}")
+    for ticket in table.get_tickets():
+        print(f"{ticket['type']}: ${ticket['price']:.2f} less {ticket['discount']:g}% ({ticket['validity']}, {ticket['features']})")
+    table.close()
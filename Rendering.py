@@ -0,0 +1,221 @@
+import io
+import weakref
+
+
+class Template:
+    """
+    A text template compiled once and rendered many times.
+
+    The template text uses str.format fields (e.g., "{price:.2f}"). The bound
+    format_map method is looked up once at compile time, so each render is a
+    single C-level call that allocates only the resulting string.
+
+    Attributes:
+        text (str): The template text.
+    """
+
+    def __init__(self, text: str):
+        """
+        Compiles a new Template.
+
+        Args:
+            text (str): The template text.
+        """
+        self.__text = text
+        self.__format = text.format_map
+
+    # Getters
+    def get_text(self) -> str:
+        return self.__text
+
+    # Behavioral Methods
+    def render(self, values: dict) -> str:
+        """
+        Renders the template with the given field values.
+        """
+        return self.__format(values)
+
+    def write(self, out, values: dict):
+        """
+        Renders the template straight into a text buffer or file.
+        """
+        out.write(self.__format(values))
+
+
+TICKET_TEMPLATE = Template(
+    "Ticket Type: {ticket_type}\n"
+    "Description: {description}\n"
+    "Price: ${price:.2f}\n"
+    "Discount: {discount}%\n"
+    "Validity: {validity}\n"
+    "Limitations: {limitations}\n"
+    "Visit Date: {visit_date}"
+)
+
+ORDER_TEMPLATE = Template(
+    "Order ID: {order_id}\n"
+    "Customer: {customer}\n"
+    "Order Date: {order_date}\n"
+    "Payment Type: {payment_type}\n"
+    "Quantity: {quantity}\n"
+    "Total Price: ${total_price:.2f}\n"
+    "Amount Paid: ${amount_paid:.2f}\n"
+    "Tickets:\n"
+)
+
+RECEIPT_TEMPLATE = Template(
+    "Order ID: {order_id}\n"
+    "Customer: {customer}\n"
+    "Order Date: {order_date}\n"
+    "Ticket: {ticket}\n"
+    "Quantity: {quantity}\n"
+    "Total Price: ${total_price:.2f}\n"
+)
+
+ADMIN_REPORT_TEMPLATE = Template(
+    "Admin Role: {role}\n"
+    "Department: {department}\n"
+    "Accounts Accessed: {accounts_accessed}\n"
+    "Super Admin: {super_admin}"
+)
+
+SEPARATOR = "-" * 40 + "\n"
+
+# Rendered ticket text, keyed weakly by Ticket and tagged with the ticket's version
+_ticket_fragments = weakref.WeakKeyDictionary()
+
+
+def ticket_values(ticket) -> dict:
+    """
+    Collects the template fields of a Ticket.
+    """
+    return {
+        "ticket_type": ticket.get_ticket_type(),
+        "description": ticket.get_description(),
+        "price": ticket.get_price(),
+        "discount": ticket.get_discount(),
+        "validity": ticket.get_validity(),
+        "limitations": ticket.get_limitations(),
+        "visit_date": ticket.get_visit_date(),
+    }
+
+
+def render_ticket(ticket) -> str:
+    """
+    Returns the description of a Ticket, reusing the cached fragment while
+    the ticket's version is unchanged.
+    """
+    cached = _ticket_fragments.get(ticket)
+    version = ticket.get_version()
+    if cached is None or cached[0] != version:
+        cached = (version, TICKET_TEMPLATE.render(ticket_values(ticket)))
+        _ticket_fragments[ticket] = cached
+    return cached[1]
+
+
+def write_order(out, order):
+    """
+    Writes the full summary of an Order object into out.
+    """
+    ORDER_TEMPLATE.write(out, {
+        "order_id": order.get_order_id(),
+        "customer": order.get_customer().get_name(),
+        "order_date": order.get_order_date(),
+        "payment_type": order.get_payment_type(),
+        "quantity": order.get_quantity(),
+        "total_price": order.get_total_price(),
+        "amount_paid": order.get_amount_paid(),
+    })
+    first = True
+    for ticket in order.get_ticket_list():
+        if not first:
+            out.write("\n")
+        out.write(render_ticket(ticket))
+        first = False
+
+
+def render_order(order) -> str:
+    """
+    Renders the full summary of one Order object from the cached ticket fragments.
+    """
+    out = io.StringIO()
+    write_order(out, order)
+    return out.getvalue()
+
+
+def stream_orders(orders, out) -> int:
+    """
+    Writes the summaries of many Order objects into one buffer or file.
+
+    Each order's own cached summary is reused, so orders that have not
+    changed since they were last rendered cost a single write.
+
+    Args:
+        orders (iterable[Order]): The orders to render.
+        out: Any object with a write(str) method, such as an open file.
+
+    Returns:
+        int: Number of orders written.
+    """
+    count = 0
+    for order in orders:
+        if count:
+            out.write("\n" + SEPARATOR)
+        out.write(order.get_order_summary())
+        count += 1
+    return count
+
+
+def render_orders(orders) -> str:
+    """
+    Renders the summaries of many Order objects into a single string.
+    """
+    out = io.StringIO()
+    stream_orders(orders, out)
+    return out.getvalue()
+
+
+def stream_receipts(orders, out) -> int:
+    """
+    Writes receipts for stored order records into one buffer or file.
+
+    Args:
+        orders (iterable[tuple]): (order_id, order) pairs, e.g. OrderLog.customer_orders().
+        out: Any object with a write(str) method, such as an open file.
+
+    Returns:
+        int: Number of receipts written.
+    """
+    count = 0
+    values = {}
+    for order_id, order in orders:
+        values.update(order)
+        values["order_id"] = order_id
+        if count:
+            out.write(SEPARATOR)
+        RECEIPT_TEMPLATE.write(out, values)
+        count += 1
+    return count
+
+
+def render_receipts(orders) -> str:
+    """
+    Renders receipts for stored order records into a single string.
+    """
+    out = io.StringIO()
+    stream_receipts(orders, out)
+    return out.getvalue()
+
+
+def render_purchase(purchase) -> str:
+    """
+    Renders one purchase history entry as "key: value" pairs.
+    """
+    if not isinstance(purchase, dict):
+        return str(purchase)
+    out = io.StringIO()
+    for key, value in purchase.items():
+        if out.tell():
+            out.write(", ")
+        out.write(f"{key}: {value}")
+    return out.getvalue()
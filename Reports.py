@@ -0,0 +1,222 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import Archive
+import Storage
+
+
+class ReportTotals:
+    """
+    Aggregated sales figures for a span of order history.
+
+    Amounts are accumulated in whole cents so that partial totals computed in
+    different processes merge to exactly the same result as a single pass.
+
+    Attributes:
+        order_count (int): Number of orders aggregated.
+        revenue_by_ticket (dict): Revenue in cents per ticket type.
+        revenue_by_customer (dict): Revenue in cents per customer.
+        revenue_by_day (dict): Revenue in cents per order date.
+        quantity_by_ticket (dict): Tickets sold per ticket type.
+        discount_by_ticket (dict): Revenue in cents given away by discounts per ticket type.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty ReportTotals object.
+        """
+        self.__order_count = 0
+        self.__revenue_by_ticket = {}
+        self.__revenue_by_customer = {}
+        self.__revenue_by_day = {}
+        self.__quantity_by_ticket = {}
+        self.__discount_by_ticket = {}
+
+    # Getters
+    def get_order_count(self) -> int:
+        return self.__order_count
+
+    def get_total_revenue(self) -> float:
+        return sum(self.__revenue_by_ticket.values()) / 100
+
+    def get_revenue_by_ticket(self) -> dict:
+        return {key: cents / 100 for key, cents in self.__revenue_by_ticket.items()}
+
+    def get_revenue_by_customer(self) -> dict:
+        return {key: cents / 100 for key, cents in self.__revenue_by_customer.items()}
+
+    def get_revenue_by_day(self) -> dict:
+        return {key: cents / 100 for key, cents in sorted(self.__revenue_by_day.items())}
+
+    def get_quantity_by_ticket(self) -> dict:
+        return dict(self.__quantity_by_ticket)
+
+    def get_discount_by_ticket(self) -> dict:
+        return {key: cents / 100 for key, cents in self.__discount_by_ticket.items()}
+
+    # Behavioral Methods
+    def add_order(self, order: dict, prices: dict):
+        """
+        Adds one order to the totals.
+
+        Args:
+            order (dict): An order record (customer, ticket, quantity, total_price, order_date).
+            prices (dict): List price per ticket type, used to measure discount impact.
+        """
+        ticket = order["ticket"]
+        cents = round(order["total_price"] * 100)
+        self.__order_count += 1
+        self.__revenue_by_ticket[ticket] = self.__revenue_by_ticket.get(ticket, 0) + cents
+        self.__revenue_by_customer[order["customer"]] = self.__revenue_by_customer.get(order["customer"], 0) + cents
+        self.__revenue_by_day[order["order_date"]] = self.__revenue_by_day.get(order["order_date"], 0) + cents
+        self.__quantity_by_ticket[ticket] = self.__quantity_by_ticket.get(ticket, 0) + order["quantity"]
+        if ticket in prices:
+            list_cents = round(prices[ticket] * 100) * order["quantity"]
+            self.__discount_by_ticket[ticket] = self.__discount_by_ticket.get(ticket, 0) + list_cents - cents
+
+    def merge(self, other):
+        """
+        Adds another set of partial totals into this one.
+
+        Args:
+            other (ReportTotals): Partial totals for a different span of history.
+        """
+        self.__order_count += other.__order_count
+        for mine, theirs in (
+            (self.__revenue_by_ticket, other.__revenue_by_ticket),
+            (self.__revenue_by_customer, other.__revenue_by_customer),
+            (self.__revenue_by_day, other.__revenue_by_day),
+            (self.__quantity_by_ticket, other.__quantity_by_ticket),
+            (self.__discount_by_ticket, other.__discount_by_ticket),
+        ):
+            for key, value in theirs.items():
+                mine[key] = mine.get(key, 0) + value
+        return self
+
+    def __eq__(self, other):
+        if not isinstance(other, ReportTotals):
+            return NotImplemented
+        return (
+            self.__order_count == other.__order_count
+            and self.__revenue_by_ticket == other.__revenue_by_ticket
+            and self.__revenue_by_customer == other.__revenue_by_customer
+            and self.__revenue_by_day == other.__revenue_by_day
+            and self.__quantity_by_ticket == other.__quantity_by_ticket
+            and self.__discount_by_ticket == other.__discount_by_ticket
+        )
+
+    def generate_report(self) -> str:
+        """
+        Formats the totals as a plain-text end-of-day report.
+        """
+        lines = [f"Orders: {self.__order_count}", f"Total Revenue: ${self.get_total_revenue():.2f}", "Revenue by Ticket:"]
+        for ticket, revenue in sorted(self.get_revenue_by_ticket().items()):
+            lines.append(f"  {ticket}: ${revenue:.2f} ({self.__quantity_by_ticket[ticket]} sold)")
+        lines.append("Discount Impact:")
+        for ticket, discount in sorted(self.get_discount_by_ticket().items()):
+            lines.append(f"  {ticket}: ${discount:.2f}")
+        lines.append("Revenue by Day:")
+        for day, revenue in self.get_revenue_by_day().items():
+            lines.append(f"  {day or 'Unknown'}: ${revenue:.2f}")
+        return "\n".join(lines)
+
+
+def _in_range(order: dict, date_from: str, date_to: str) -> bool:
+    order_date = order["order_date"]
+    return (date_from is None or order_date >= date_from) and (date_to is None or order_date <= date_to)
+
+
+def build_report(orders, prices: dict, date_from: str = None, date_to: str = None) -> ReportTotals:
+    """
+    Single-process reference implementation of the report.
+
+    Args:
+        orders (iterable[tuple]): (order_id, order) pairs, e.g. OrderLog.items().
+        prices (dict): List price per ticket type.
+        date_from (str): Optional first order date to include ("YYYY-MM-DD").
+        date_to (str): Optional last order date to include ("YYYY-MM-DD").
+
+    Returns:
+        ReportTotals: The aggregated totals.
+    """
+    totals = ReportTotals()
+    for _, order in orders:
+        if _in_range(order, date_from, date_to):
+            totals.add_order(order, prices)
+    return totals
+
+
+def _build_partial(log_path, start, end, prices, date_from, date_to) -> ReportTotals:
+    return build_report(Storage.read_order_log_range(log_path, start, end), prices, date_from, date_to)
+
+
+def _build_segment(segment_path, prices, date_from, date_to) -> ReportTotals:
+    segment = Archive.ArchiveSegment(segment_path)
+    try:
+        return build_report(segment.items(), prices, date_from, date_to)
+    finally:
+        segment.close()
+
+
+def build_report_parallel(log_path: str, prices: dict, date_from: str = None, date_to: str = None, workers: int = None) -> ReportTotals:
+    """
+    Builds the report by aggregating partitions of the order log in a process pool.
+
+    The log is split into one contiguous range per worker; since orders are
+    appended as they are placed, each range is a contiguous span of dates.
+    Every worker reads its range straight from the log file and returns
+    partial totals, which are merged here.
+
+    Args:
+        log_path (str): Path to the order log.
+        prices (dict): List price per ticket type.
+        date_from (str): Optional first order date to include.
+        date_to (str): Optional last order date to include.
+        workers (int): Number of worker processes; defaults to the CPU count.
+
+    Returns:
+        ReportTotals: The aggregated totals, identical to build_report's.
+    """
+    return build_reports_parallel({log_path: log_path}, prices, date_from, date_to, workers)[log_path]
+
+
+def build_reports_parallel(log_paths: dict, prices: dict, date_from: str = None, date_to: str = None, workers: int = None, segment_paths: dict = None) -> dict:
+    """
+    Builds one report per order log, fanning every log's ranges out over a single process pool.
+
+    Each log is split into ranges in proportion to its share of the total
+    size, so a large log gets more workers than a small one and no pool
+    waits on a single busy shard. Archive segments are one task each;
+    segments whose month lies outside the date range are skipped.
+
+    Args:
+        log_paths (dict): Order log path per report key (e.g. per park).
+        prices (dict): List price per ticket type.
+        date_from (str): Optional first order date to include.
+        date_to (str): Optional last order date to include.
+        workers (int): Number of worker processes; defaults to the CPU count.
+        segment_paths (dict): Optional archive segment paths per report key.
+
+    Returns:
+        dict: ReportTotals per report key.
+    """
+    workers = workers or os.cpu_count() or 1
+    sizes = {key: os.path.getsize(log_path) if os.path.exists(log_path) else 0 for key, log_path in log_paths.items()}
+    total_size = sum(sizes.values()) or 1
+    tasks = []
+    for key, log_path in log_paths.items():
+        if sizes[key]:
+            parts = max(round(workers * sizes[key] / total_size), 1)
+            tasks.extend((key, _build_partial, (log_path, start, end, prices, date_from, date_to)) for start, end in Storage.split_order_log(log_path, parts))
+    for key, paths in (segment_paths or {}).items():
+        tasks.extend((key, _build_segment, (path, prices, date_from, date_to)) for path in paths if Archive.segment_in_range(path, date_from, date_to))
+
+    reports = {key: ReportTotals() for key in list(log_paths) + list(segment_paths or {})}
+    if len(tasks) <= 1:
+        for key, function, arguments in tasks:
+            reports[key].merge(function(*arguments))
+        return reports
+    with ProcessPoolExecutor(max_workers=min(len(tasks), workers)) as pool:
+        futures = [(key, pool.submit(function, *arguments)) for key, function, arguments in tasks]
+        for key, future in futures:
+            reports[key].merge(future.result())
+    return reports
@@ -0,0 +1,221 @@
+import struct
+import threading
+from array import array
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+import Storage
+
+CALENDAR_DAYS = 365
+# first day (proleptic ordinal), number of days, number of ticket types
+CALENDAR_HEADER = struct.Struct("<IHH")
+
+
+class SoldOutError(ValueError):
+    """
+    Raised when a reservation asks for more tickets than remain on a date.
+    """
+
+
+def _to_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def validity_days(validity: str) -> int:
+    """
+    Returns how many consecutive days a ticket validity such as "3 Days" covers.
+    """
+    try:
+        return max(int(str(validity).split()[0]), 1)
+    except (ValueError, IndexError):
+        return 1
+
+
+class ReservationCalendar:
+    """
+    Remaining capacity per visit date and ticket type over a rolling calendar.
+
+    Tickets sold are counted in one flat integer array with a row per day and
+    a column per ticket type, so an availability query for the whole calendar
+    is a single slice. The calendar file is shared by every kiosk process on
+    the machine: reservations reload it, check and update the array and
+    write it back atomically, all under a lock held across processes, so two
+    purchases can never both take the last ticket of a day. Queries answer
+    from the copy loaded last; refresh() reloads it. Storing sold counts
+    rather than remaining ones lets daily capacities be changed without
+    rewriting the calendar. Every load also moves the window up to the
+    current date, so a kiosk left running past midnight stops offering
+    yesterday.
+
+    Attributes:
+        capacities (dict): Daily capacity per ticket type.
+        start_date (date): First day covered by the calendar.
+        days (int): Number of days covered.
+    """
+
+    def __init__(self, file_path: str, capacities: dict, days: int = CALENDAR_DAYS, today: date = None, clock=date.today):
+        """
+        Opens (or creates) a reservation calendar.
+
+        Args:
+            file_path (str): Path to the calendar file.
+            capacities (dict): Daily capacity per ticket type.
+            days (int): Number of days to keep bookable.
+            today (date): Fixed first bookable day; by default the window follows the clock.
+            clock (callable): Returns the current date.
+        """
+        self.__file_path = file_path
+        self.__capacities = dict(capacities)
+        self.__types = list(capacities)
+        self.__columns = {ticket_type: column for column, ticket_type in enumerate(self.__types)}
+        self.__days = days
+        self.__lock = threading.Lock()
+        self.__lock_path = file_path + ".lock"
+        self.__clock = (lambda: today) if today else clock
+        self.__start = self.__clock()
+        self.__load()
+
+    # Internal helpers
+    def __load(self):
+        self.__start = max(self.__start, self.__clock())
+        self.__sold = array("i", [0]) * (len(self.__types) * self.__days)
+        try:
+            payload = Storage.atomic_read(self.__file_path, generations=1)
+        except Storage.SnapshotError:
+            return
+        start_ordinal, days, type_count = CALENDAR_HEADER.unpack_from(payload, 0)
+        offset = CALENDAR_HEADER.size
+        stored_types = []
+        for _ in range(type_count):
+            (length,) = Storage.STRING_LENGTH.unpack_from(payload, offset)
+            offset += Storage.STRING_LENGTH.size
+            stored_types.append(payload[offset:offset + length].decode("utf-8"))
+            offset += length
+        stored = array("i")
+        stored.frombytes(payload[offset:offset + days * type_count * stored.itemsize])
+
+        # Carry over sales for days still inside the window; past days are dropped
+        shift = self.__start.toordinal() - start_ordinal
+        for day in range(max(shift, 0), min(days, shift + self.__days)):
+            for stored_column, ticket_type in enumerate(stored_types):
+                column = self.__columns.get(ticket_type)
+                if column is not None:
+                    self.__sold[(day - shift) * len(self.__types) + column] = stored[day * type_count + stored_column]
+
+    def __save(self):
+        payload = bytearray(CALENDAR_HEADER.pack(self.__start.toordinal(), self.__days, len(self.__types)))
+        for ticket_type in self.__types:
+            encoded = ticket_type.encode("utf-8")
+            payload += Storage.STRING_LENGTH.pack(len(encoded)) + encoded
+        payload += self.__sold.tobytes()
+        Storage.atomic_write(self.__file_path, payload, generations=1)
+
+    @contextmanager
+    def __locked(self):
+        # Other processes may have reserved since the last load
+        with self.__lock, Storage.file_lock(self.__lock_path):
+            self.__load()
+            yield
+
+    def __position(self, ticket_type: str, visit_date) -> int:
+        if ticket_type not in self.__columns:
+            raise KeyError(f"Unknown ticket type '{ticket_type}'.")
+        day = (_to_date(visit_date) - self.__start).days
+        if not 0 <= day < self.__days:
+            raise ValueError(f"{visit_date} is outside the bookable window.")
+        return day * len(self.__types) + self.__columns[ticket_type]
+
+    # Getters
+    def get_start_date(self) -> date:
+        return self.__start
+
+    def get_days(self) -> int:
+        return self.__days
+
+    def get_capacities(self) -> dict:
+        return self.__capacities
+
+    def get_remaining(self, ticket_type: str, visit_date) -> int:
+        return self.__capacities[ticket_type] - self.__sold[self.__position(ticket_type, visit_date)]
+
+    # Behavioral Methods
+    def reserve(self, ticket_type: str, visit_date, quantity: int, span: int = 1) -> int:
+        """
+        Atomically reserves tickets for a visit date.
+
+        Args:
+            ticket_type (str): The ticket type.
+            visit_date (str | date): First day of the visit ("YYYY-MM-DD").
+            quantity (int): Number of tickets.
+            span (int): Number of consecutive days the ticket is valid for.
+
+        Returns:
+            int: Tickets still available on the first visit date.
+
+        Raises:
+            SoldOutError: If any day in the span has fewer than quantity tickets left.
+        """
+        first = _to_date(visit_date)
+        with self.__locked():
+            capacity = self.__capacities[ticket_type]
+            positions = [self.__position(ticket_type, first + timedelta(days=day)) for day in range(span)]
+            for day, position in enumerate(positions):
+                if capacity - self.__sold[position] < quantity:
+                    raise SoldOutError(f"Only {max(capacity - self.__sold[position], 0)} {ticket_type} tickets left for {first + timedelta(days=day)}.")
+            for position in positions:
+                self.__sold[position] += quantity
+            self.__save()
+            return capacity - self.__sold[positions[0]]
+
+    def release(self, ticket_type: str, visit_date, quantity: int, span: int = 1):
+        """
+        Returns previously reserved tickets to the calendar (e.g., on cancellation).
+        """
+        first = _to_date(visit_date)
+        with self.__locked():
+            for day in range(span):
+                position = self.__position(ticket_type, first + timedelta(days=day))
+                self.__sold[position] = max(self.__sold[position] - quantity, 0)
+            self.__save()
+
+    def refresh(self):
+        """
+        Reloads the calendar to pick up reservations made by other processes.
+        """
+        with self.__lock:
+            self.__load()
+
+    def availability(self, ticket_type: str = None) -> dict:
+        """
+        Returns remaining capacity for every day of the calendar in one call.
+
+        Args:
+            ticket_type (str): Optional ticket type; if omitted, every type is returned.
+
+        Returns:
+            dict: {"YYYY-MM-DD": remaining} for one type, or
+                {"YYYY-MM-DD": {ticket_type: remaining}} for all types.
+        """
+        width = len(self.__types)
+        dates = [(self.__start + timedelta(days=day)).isoformat() for day in range(self.__days)]
+        if ticket_type is not None:
+            capacity = self.__capacities[ticket_type]
+            return {visit_date: capacity - sold for visit_date, sold in zip(dates, self.__sold[self.__columns[ticket_type]::width])}
+        capacities = [self.__capacities[name] for name in self.__types]
+        return {
+            visit_date: {name: capacity - sold for name, capacity, sold in zip(self.__types, capacities, self.__sold[day * width:(day + 1) * width])}
+            for day, visit_date in enumerate(dates)
+        }
+
+    def sold_out_dates(self, ticket_type: str) -> list:
+        """
+        Returns the dates on which a ticket type has no capacity left.
+        """
+        capacity = self.__capacities[ticket_type]
+        return [
+            (self.__start + timedelta(days=day)).isoformat()
+            for day, sold in enumerate(self.__sold[self.__columns[ticket_type]::len(self.__types)]) if sold >= capacity
+        ]
@@ -0,0 +1,286 @@
+import bisect
+import math
+import re
+
+CM_PER_INCH = 2.54
+# Boundary flags: a ride's minimum height applies at the point itself, its maximum only up to it
+START, END = 0, 1
+QUERY = 0.5
+
+_NUMBER = r"(\d+(?:\.\d+)?)"
+_FEET_INCHES = re.compile(_NUMBER + r"\s*(?:ft|feet|foot|')\s*(?:" + _NUMBER + r"\s*(?:in|inch|inches|\")?)?$")
+_CLOCK = re.compile(r"(\d+):(\d{1,2})$")
+_DURATION_PART = re.compile(_NUMBER + r"\s*(h|hr|hrs|hour|hours|m|min|mins|minute|minutes|s|sec|secs|second|seconds)\b")
+_NO_LIMIT = ("", "none", "n/a", "no limit", "any")
+
+
+def parse_height(value) -> float:
+    """
+    Converts a height such as "48 inches", "4 ft 2 in", "4'2\"", "122 cm" or
+    "1.2 m" to inches.
+
+    Returns:
+        float: The height in inches, or None if there is no limit.
+
+    Raises:
+        ValueError: If the height cannot be parsed.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().lower()
+    if text in _NO_LIMIT:
+        return None
+    match = _FEET_INCHES.match(text)
+    if match:
+        return float(match.group(1)) * 12 + float(match.group(2) or 0)
+    match = re.match(_NUMBER + r"\s*(in|inch|inches|\"|cm|m)?$", text)
+    if not match:
+        raise ValueError(f"Unrecognized height '{value}'.")
+    number, unit = float(match.group(1)), match.group(2)
+    if unit == "cm":
+        return number / CM_PER_INCH
+    if unit == "m":
+        return number * 100 / CM_PER_INCH
+    return number
+
+
+def parse_duration(value) -> int:
+    """
+    Converts a duration such as "2 minutes", "90 sec", "1 min 30 s" or "1:30" to seconds.
+
+    Raises:
+        ValueError: If the duration cannot be parsed.
+    """
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip().lower()
+    match = _CLOCK.match(text)
+    if match:
+        return int(match.group(1)) * 60 + int(match.group(2))
+    parts = _DURATION_PART.findall(text)
+    if not parts:
+        raise ValueError(f"Unrecognized duration '{value}'.")
+    seconds = 0.0
+    for number, unit in parts:
+        if unit.startswith("h"):
+            seconds += float(number) * 3600
+        elif unit.startswith("m"):
+            seconds += float(number) * 60
+        else:
+            seconds += float(number)
+    return int(seconds)
+
+
+def parse_capacity(value) -> int:
+    """
+    Converts a capacity such as 20, "20" or "20 riders" to an integer.
+    """
+    match = re.match(r"\s*(\d+)", str(value))
+    if not match:
+        raise ValueError(f"Unrecognized capacity '{value}'.")
+    return int(match.group(1))
+
+
+class RideSpec:
+    """
+    A Ride with its heights, duration and capacity normalized to numbers.
+
+    Attributes:
+        ride (Ride): The ride the spec was built from.
+        min_height (float): Minimum height in inches (-inf if unlimited).
+        max_height (float): Maximum height in inches (inf if unlimited).
+        duration (int): Ride duration in seconds.
+        capacity (int): Riders per cycle.
+        open (bool): Whether the ride was open when the catalog was loaded.
+    """
+
+    __slots__ = ("__ride", "__min_height", "__max_height", "__duration", "__capacity", "__open")
+
+    def __init__(self, ride):
+        """
+        Normalizes one Ride.
+
+        Args:
+            ride (Ride): The ride to normalize.
+
+        Raises:
+            ValueError: If a height, duration or capacity cannot be parsed.
+        """
+        min_height = parse_height(ride.get_min_height())
+        max_height = parse_height(ride.get_max_height())
+        self.__ride = ride
+        self.__min_height = -math.inf if min_height is None else min_height
+        self.__max_height = math.inf if max_height is None else max_height
+        self.__duration = parse_duration(ride.get_duration())
+        self.__capacity = parse_capacity(ride.get_capacity())
+        self.__open = str(ride.get_status()).strip().lower() == "open"
+
+    # Getters
+    def get_ride(self):
+        return self.__ride
+
+    def get_name(self) -> str:
+        return self.__ride.get_name()
+
+    def get_min_height(self) -> float:
+        return self.__min_height
+
+    def get_max_height(self) -> float:
+        return self.__max_height
+
+    def get_duration(self) -> int:
+        return self.__duration
+
+    def get_capacity(self) -> int:
+        return self.__capacity
+
+    def is_open(self) -> bool:
+        return self.__open
+
+    def get_hourly_throughput(self) -> int:
+        """
+        Returns how many riders the ride can carry per hour.
+        """
+        return self.__capacity * 3600 // max(self.__duration, 1)
+
+    def admits(self, height: float) -> bool:
+        return self.__min_height <= height <= self.__max_height
+
+
+class RideCatalog:
+    """
+    Typed, indexed view of a park's rides for height eligibility queries.
+
+    Every ride's height limits become a closed interval on the height axis.
+    The interval endpoints are sorted once, and the set of rides whose
+    interval covers each segment between consecutive endpoints is
+    precomputed. A guest's eligible rides are then a single bisection into
+    the endpoint list, with no string parsing and no scan of the ride list.
+    The catalog is a snapshot; call refresh() after rides change.
+    """
+
+    def __init__(self, rides):
+        """
+        Builds a catalog from Ride objects.
+
+        Args:
+            rides (iterable[Ride]): The rides to catalog. A list is kept by
+                reference, so refresh() picks up rides added to it later.
+        """
+        self.__rides = rides if isinstance(rides, list) else list(rides)
+        self.refresh()
+
+    @classmethod
+    def from_park(cls, park):
+        """
+        Builds a catalog of every ride in a Park.
+        """
+        return cls(park.get_ride_list())
+
+    # Internal helpers
+    @staticmethod
+    def __guest_height(height) -> float:
+        inches = parse_height(height)
+        if inches is None:
+            raise ValueError("A guest height is required.")
+        return inches
+
+    # Getters
+    def __len__(self):
+        return len(self.__specs)
+
+    def get_specs(self) -> list:
+        return self.__specs
+
+    def get_spec(self, name: str) -> RideSpec:
+        return self.__by_name[name]
+
+    def get_total_capacity(self) -> int:
+        return sum(spec.get_capacity() for spec in self.__specs)
+
+    # Behavioral Methods
+    def refresh(self):
+        """
+        Re-reads every ride and rebuilds the eligibility index.
+        """
+        self.__specs = [RideSpec(ride) for ride in self.__rides]
+        self.__by_name = {spec.get_name(): spec for spec in self.__specs}
+
+        boundaries = []
+        for position, spec in enumerate(self.__specs):
+            boundaries.append((spec.get_min_height(), START, position))
+            if spec.get_max_height() != math.inf:
+                boundaries.append((spec.get_max_height(), END, position))
+        boundaries.sort()
+
+        # segments[k] holds the rides covering heights after the first k boundaries
+        active = set()
+        segments = [()]
+        open_segments = [()]
+        for _, flag, position in boundaries:
+            if flag == START:
+                active.add(position)
+            else:
+                active.discard(position)
+            covering = tuple(self.__specs[index] for index in sorted(active))
+            segments.append(covering)
+            open_segments.append(tuple(spec for spec in covering if spec.is_open()))
+        self.__points = [(height, flag) for height, flag, _ in boundaries]
+        self.__segments = segments
+        self.__open_segments = open_segments
+
+    def eligible_rides(self, height, open_only: bool = True) -> tuple:
+        """
+        Returns the rides a guest of the given height may ride.
+
+        Args:
+            height (float | str): Guest height in inches, or a height string.
+            open_only (bool): Whether to leave out rides that are not open.
+
+        Returns:
+            tuple[RideSpec]: The eligible rides, in catalog order.
+        """
+        height = self.__guest_height(height)
+        position = bisect.bisect_right(self.__points, (height, QUERY))
+        return (self.__open_segments if open_only else self.__segments)[position]
+
+    def eligible_rides_bulk(self, heights, open_only: bool = True) -> list:
+        """
+        Returns the eligible rides of every guest in a group.
+
+        The heights are sorted once and matched to segments in a single
+        merge walk over the boundaries.
+
+        Args:
+            heights (iterable): Guest heights in inches or as height strings.
+            open_only (bool): Whether to leave out rides that are not open.
+
+        Returns:
+            list[tuple[RideSpec]]: Eligible rides per guest, in input order.
+        """
+        heights = [self.__guest_height(height) for height in heights]
+        segments = self.__open_segments if open_only else self.__segments
+        points = self.__points
+        results = [None] * len(heights)
+        position = 0
+        for index in sorted(range(len(heights)), key=heights.__getitem__):
+            key = (heights[index], QUERY)
+            while position < len(points) and points[position] <= key:
+                position += 1
+            results[index] = segments[position]
+        return results
+
+    def rides_for_group(self, heights, open_only: bool = True) -> tuple:
+        """
+        Returns the rides every guest in a group may ride together.
+
+        Height limits are intervals, so a ride that admits both the shortest
+        and the tallest guest admits everyone in between.
+        """
+        heights = [self.__guest_height(height) for height in heights]
+        if not heights:
+            return ()
+        tallest = set(self.eligible_rides(max(heights), open_only))
+        return tuple(spec for spec in self.eligible_rides(min(heights), open_only) if spec in tallest)
@@ -0,0 +1,519 @@
+import argparse
+import bisect
+import json
+import os
+import re
+from datetime import date, datetime, time, timedelta
+
+DAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+DAY_GROUPS = {"daily": range(7), "everyday": range(7), "weekdays": range(5), "weekends": range(5, 7)}
+MINUTES_PER_DAY = 24 * 60
+# Intervals added since the last rebuild are kept in a list until there are this many
+PENDING_LIMIT = 64
+EVENT = "event"
+SLOT = "slot"
+
+_DAY = r"(?:mon|tue|wed|thu|fri|sat|sun)[a-z]*\.?"
+_DAY_SPEC = re.compile(r"^\s*((?:" + _DAY + r"|daily|everyday|weekdays|weekends)(?:\s*(?:-|–|,|&|and|to)\s*(?:" + _DAY + r"))*)\s*:?\s*")
+_TIME = r"(noon|midnight|\d{1,2}(?::\d{2})?\s*(?:am|pm|a\.m\.|p\.m\.)?)"
+_RANGE = re.compile(_TIME + r"\s*(?:-|–|to)\s*" + _TIME)
+
+
+class ScheduleConflict(ValueError):
+    """
+    Raised when a new entry overlaps another entry at the same location.
+    """
+
+
+class ParkClosedError(ValueError):
+    """
+    Raised when a visit falls outside the park's operating hours.
+    """
+
+
+def parse_time(text: str) -> int:
+    """
+    Converts a time such as "9:00 AM", "9pm", "21:30", "noon" or "midnight" to minutes after midnight.
+
+    Raises:
+        ValueError: If the time cannot be parsed.
+    """
+    text = text.strip().lower().replace(".", "")
+    if text == "noon":
+        return 12 * 60
+    if text == "midnight":
+        return 0
+    match = re.match(r"(\d{1,2})(?::(\d{2}))?\s*(am|pm)?$", text)
+    if not match:
+        raise ValueError(f"Unrecognized time '{text}'.")
+    hours, minutes, suffix = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if suffix:
+        if not 1 <= hours <= 12:
+            raise ValueError(f"Unrecognized time '{text}'.")
+        hours = hours % 12 + (12 if suffix == "pm" else 0)
+    if hours > 24 or minutes > 59 or (hours == 24 and minutes):
+        raise ValueError(f"Unrecognized time '{text}'.")
+    return hours * 60 + minutes
+
+
+def _parse_days(spec: str) -> list:
+    days = set()
+    for part in re.split(r"\s*(?:,|&|\band\b)\s*", spec.strip().lower()):
+        if part in DAY_GROUPS:
+            days.update(DAY_GROUPS[part])
+            continue
+        ends = re.split(r"\s*(?:-|–|\bto\b)\s*", part)
+        first, last = DAYS.index(ends[0][:3]), DAYS.index(ends[-1][:3])
+        # Ranges may wrap around the week, e.g. "Fri-Mon"
+        days.update(day % 7 for day in range(first, first + (last - first) % 7 + 1))
+    return sorted(days)
+
+
+def parse_operating_hours(text: str) -> list:
+    """
+    Parses free-text operating hours into opening intervals per weekday.
+
+    Accepts one or more ";"- or newline-separated rules such as
+    "9:00 AM - 10:00 PM", "Mon-Fri 10am-6pm", "Sat, Sun: 8:00-23:00",
+    "Tue closed", "Daily 24 hours" or "Fri 10am-2pm, 4pm-1am". A rule
+    without days applies to every day, and later rules replace earlier ones
+    for the days they name. Closing times at or before the opening time
+    run past midnight.
+
+    Returns:
+        list[list[tuple]]: (open, close) minutes after midnight for Monday to Sunday.
+
+    Raises:
+        ValueError: If a rule cannot be parsed.
+    """
+    week = [[] for _ in DAYS]
+    for rule in re.split(r"[;\n]", text):
+        rule = rule.strip().lower()
+        if not rule:
+            continue
+        match = _DAY_SPEC.match(rule)
+        days = _parse_days(match.group(1)) if match else list(range(7))
+        hours = rule[match.end():] if match else rule
+        if hours.strip() in ("closed", "close"):
+            intervals = []
+        elif re.fullmatch(r"\s*(?:open\s*)?24\s*(?:hours|hrs|h)\s*", hours):
+            intervals = [(0, MINUTES_PER_DAY)]
+        else:
+            ranges = _RANGE.findall(hours)
+            if not ranges or _RANGE.sub("", hours).strip(" ,and") != "":
+                raise ValueError(f"Unrecognized operating hours '{rule}'.")
+            intervals = []
+            for opening, closing in ranges:
+                start, end = parse_time(opening), parse_time(closing)
+                intervals.append((start, end if end > start else end + MINUTES_PER_DAY))
+        for day in days:
+            week[day] = sorted(intervals)
+    return week
+
+
+class OperatingHours:
+    """
+    Parsed operating hours with dated closures.
+
+    The hours text is parsed once into opening intervals per weekday, so
+    open/closed checks are arithmetic on minutes. Without hours text the
+    park is treated as always open, as it was before hours were enforced.
+    """
+
+    def __init__(self, text: str = None, closures=()):
+        """
+        Parses operating hours.
+
+        Args:
+            text (str): Free-text hours (see parse_operating_hours), or None for always open.
+            closures (iterable): Dates ("YYYY-MM-DD" or date) on which the park is closed all day.
+
+        Raises:
+            ValueError: If the hours cannot be parsed.
+        """
+        self.__text = text
+        self.__week = parse_operating_hours(text) if text and text.strip() else [[(0, MINUTES_PER_DAY)] for _ in DAYS]
+        self.__closures = set()
+        for closure in closures:
+            self.add_closure(closure)
+
+    # Internal helpers
+    @staticmethod
+    def __as_date(value) -> date:
+        if isinstance(value, datetime):
+            return value.date()
+        return value if isinstance(value, date) else date.fromisoformat(value)
+
+    # Getters
+    def get_text(self) -> str:
+        return self.__text
+
+    def get_closures(self) -> list:
+        return sorted(self.__closures)
+
+    def hours_on(self, day) -> list:
+        """
+        Returns the (open, close) datetimes of a date, or an empty list if the park is closed.
+        """
+        day = self.__as_date(day)
+        if day in self.__closures:
+            return []
+        midnight = datetime.combine(day, time())
+        return [(midnight + timedelta(minutes=start), midnight + timedelta(minutes=end)) for start, end in self.__week[day.weekday()]]
+
+    def is_open_on(self, day) -> bool:
+        return bool(self.hours_on(day))
+
+    def is_open(self, at: datetime) -> bool:
+        """
+        Returns whether the park is open at a moment, including hours that run past midnight.
+        """
+        for day in (at.date(), at.date() - timedelta(days=1)):
+            for opening, closing in self.hours_on(day):
+                if opening <= at < closing:
+                    return True
+        return False
+
+    # Behavioral Methods
+    def add_closure(self, day):
+        self.__closures.add(self.__as_date(day))
+
+    def check_visit(self, visit_date, now: datetime = None):
+        """
+        Checks that tickets can still be used on a visit date.
+
+        Raises:
+            ParkClosedError: If the park is closed that day, or the visit is
+                today and the park has already closed for the day.
+        """
+        visit_day = self.__as_date(visit_date)
+        hours = self.hours_on(visit_day)
+        if not hours:
+            raise ParkClosedError(f"The park is closed on {visit_day.isoformat()}.")
+        now = now if now else datetime.now()
+        if visit_day == now.date() and now >= hours[-1][1]:
+            raise ParkClosedError(f"The park has closed for today ({hours[-1][1]:%H:%M}).")
+
+
+class IntervalTree:
+    """
+    Centered interval tree over half-open [start, end) intervals.
+
+    Each node holds the intervals that contain its center, sorted once by
+    start and once by end, so an overlap query visits one root-to-leaf
+    path and only scans intervals it reports: O(log n + k). Intervals added
+    since the tree was last built wait in a short pending list that queries
+    scan directly; the tree is rebuilt once the list reaches PENDING_LIMIT.
+    Removed items are dropped from results until the next rebuild.
+    """
+
+    def __init__(self, intervals=()):
+        """
+        Builds a tree of (start, end, item) triples.
+        """
+        self.__pending = list(intervals)
+        self.__removed = set()
+        self.__count = 0
+        self.__root = None
+        self.__rebuild()
+
+    # Internal helpers
+    def __rebuild(self):
+        intervals = [interval for interval in self.__intervals() if id(interval[2]) not in self.__removed] + self.__pending
+        self.__pending = []
+        self.__removed = set()
+        self.__count = len(intervals)
+        self.__root = self.__build(intervals)
+
+    def __build(self, intervals: list):
+        if not intervals:
+            return None
+        points = sorted(point for start, end, _ in intervals for point in (start, end))
+        center = points[(len(points) - 1) // 2]
+        left, right, here = [], [], []
+        for interval in intervals:
+            if interval[1] <= center:
+                left.append(interval)
+            elif interval[0] > center:
+                right.append(interval)
+            else:
+                here.append(interval)
+        by_start = sorted(here, key=lambda interval: interval[0])
+        by_end = sorted(here, key=lambda interval: interval[1], reverse=True)
+        return (center, by_start, [interval[0] for interval in by_start], by_end, self.__build(left), self.__build(right))
+
+    def __intervals(self):
+        stack = [self.__root] if self.__root else []
+        while stack:
+            center, by_start, _, _, left, right = stack.pop()
+            yield from by_start
+            stack.extend(node for node in (left, right) if node)
+
+    # Getters
+    def __len__(self):
+        return self.__count + len(self.__pending) - len(self.__removed)
+
+    # Behavioral Methods
+    def add(self, start, end, item):
+        """
+        Adds an item covering [start, end).
+
+        Raises:
+            ValueError: If end is not after start.
+        """
+        if not end > start:
+            raise ValueError("An interval must end after it starts.")
+        self.__pending.append((start, end, item))
+        if len(self.__pending) >= PENDING_LIMIT:
+            self.__rebuild()
+
+    def remove(self, item):
+        """
+        Removes an item added earlier.
+        """
+        for position, interval in enumerate(self.__pending):
+            if interval[2] is item:
+                del self.__pending[position]
+                return
+        self.__removed.add(id(item))
+        if len(self.__removed) >= PENDING_LIMIT:
+            self.__rebuild()
+
+    def overlapping(self, start, end) -> list:
+        """
+        Returns the items whose intervals overlap [start, end), ordered by start.
+        """
+        found = []
+        node = self.__root
+        while node:
+            center, by_start, starts, by_end, left, right = node
+            if end <= center:
+                # Intervals here all end after the center, so only their starts matter
+                found.extend(by_start[:bisect.bisect_left(starts, end)])
+                node = left
+            elif start > center:
+                for interval in by_end:
+                    if interval[1] <= start:
+                        break
+                    found.append(interval)
+                node = right
+            else:
+                found.extend(by_start)
+                found.extend(self.__overlapping_subtree(left, start, end))
+                node = right
+        found.extend(interval for interval in self.__pending if interval[0] < end and interval[1] > start)
+        if self.__removed:
+            found = [interval for interval in found if id(interval[2]) not in self.__removed]
+        found.sort(key=lambda interval: interval[0])
+        return [interval[2] for interval in found]
+
+    def __overlapping_subtree(self, node, start, end):
+        # Everything left of a center inside [start, end) ends after start only if it ends past it
+        while node:
+            center, by_start, starts, by_end, left, right = node
+            if start > center:
+                for interval in by_end:
+                    if interval[1] <= start:
+                        break
+                    yield interval
+                node = right
+            else:
+                yield from by_start
+                yield from self.__everything(right)
+                node = left
+
+    def __everything(self, node):
+        stack = [node] if node else []
+        while stack:
+            _, by_start, _, _, left, right = stack.pop()
+            yield from by_start
+            stack.extend(child for child in (left, right) if child)
+
+    def at(self, moment) -> list:
+        """
+        Returns the items whose intervals contain a moment.
+        """
+        found = []
+        node = self.__root
+        while node:
+            center, by_start, starts, by_end, left, right = node
+            if moment < center:
+                found.extend(by_start[:bisect.bisect_right(starts, moment)])
+                node = left
+            else:
+                for interval in by_end:
+                    if interval[1] <= moment:
+                        break
+                    found.append(interval)
+                node = right
+        found.extend(interval for interval in self.__pending if interval[0] <= moment < interval[1])
+        if self.__removed:
+            found = [interval for interval in found if id(interval[2]) not in self.__removed]
+        found.sort(key=lambda interval: interval[0])
+        return [interval[2] for interval in found]
+
+
+class ScheduleEntry:
+    """
+    An event or attraction slot occupying a location for a time interval.
+
+    Attributes:
+        name (str): Name of the event or attraction.
+        kind (str): EVENT or SLOT.
+        start (datetime): When it starts.
+        end (datetime): When it ends.
+        location (str): Where it takes place; entries at one location must not overlap.
+    """
+
+    __slots__ = ("__name", "__kind", "__start", "__end", "__location")
+
+    def __init__(self, name: str, kind: str, start: datetime, end: datetime, location: str = None):
+        self.__name = name
+        self.__kind = kind
+        self.__start = start
+        self.__end = end
+        self.__location = location if location else name
+
+    # Getters
+    def get_name(self) -> str:
+        return self.__name
+
+    def get_kind(self) -> str:
+        return self.__kind
+
+    def get_start(self) -> datetime:
+        return self.__start
+
+    def get_end(self) -> datetime:
+        return self.__end
+
+    def get_location(self) -> str:
+        return self.__location
+
+    def __repr__(self):
+        return f"{self.__name} ({self.__start:%Y-%m-%d %H:%M}-{self.__end:%H:%M} at {self.__location})"
+
+
+class ParkSchedule:
+    """
+    A park's operating hours, events and attraction slots.
+
+    Entries are indexed twice: in one interval tree for "what is running"
+    queries and in one tree per location for conflict checks, so both cost
+    O(log n + k).
+    """
+
+    def __init__(self, operating_hours: OperatingHours = None):
+        """
+        Initializes a new ParkSchedule.
+
+        Args:
+            operating_hours (OperatingHours): The park's hours; defaults to always open.
+        """
+        self.__hours = operating_hours if operating_hours else OperatingHours()
+        self.__entries = IntervalTree()
+        self.__locations = {}
+
+    @classmethod
+    def load(cls, file_path: str):
+        """
+        Reads a schedule from a JSON file.
+
+        The file holds "operating_hours", optional "closures" (dates) and
+        optional "events" and "slots" lists of {"name", "start", "end",
+        "location"} with ISO date-times. A missing file gives an always-open
+        park with nothing scheduled.
+        """
+        if not os.path.exists(file_path):
+            return cls()
+        with open(file_path, encoding="utf-8") as f:
+            config = json.load(f)
+        schedule = cls(OperatingHours(config.get("operating_hours"), config.get("closures", ())))
+        for kind, key in ((EVENT, "events"), (SLOT, "slots")):
+            for entry in config.get(key, ()):
+                schedule.add(entry["name"], kind, datetime.fromisoformat(entry["start"]), datetime.fromisoformat(entry["end"]), entry.get("location"))
+        return schedule
+
+    @classmethod
+    def from_park(cls, park):
+        """
+        Builds an empty schedule from a Main.Park's operating hours.
+        """
+        return cls(OperatingHours(park.get_operating_hours()))
+
+    # Getters
+    def get_operating_hours(self) -> OperatingHours:
+        return self.__hours
+
+    def __len__(self):
+        return len(self.__entries)
+
+    # Behavioral Methods
+    def conflicts(self, start: datetime, end: datetime, location: str) -> list:
+        """
+        Returns the entries at a location that overlap [start, end).
+        """
+        tree = self.__locations.get(location)
+        return tree.overlapping(start, end) if tree else []
+
+    def add(self, name: str, kind: str, start: datetime, end: datetime, location: str = None) -> ScheduleEntry:
+        """
+        Schedules an event or attraction slot.
+
+        Raises:
+            ScheduleConflict: If another entry at the same location overlaps it.
+            ValueError: If it does not end after it starts.
+        """
+        entry = ScheduleEntry(name, kind, start, end, location)
+        clashes = self.conflicts(start, end, entry.get_location())
+        if clashes:
+            raise ScheduleConflict(f"{entry!r} overlaps {', '.join(repr(clash) for clash in clashes)}.")
+        self.__entries.add(start, end, entry)
+        self.__locations.setdefault(entry.get_location(), IntervalTree()).add(start, end, entry)
+        return entry
+
+    def add_event(self, name: str, start: datetime, end: datetime, location: str = None) -> ScheduleEntry:
+        return self.add(name, EVENT, start, end, location)
+
+    def add_slot(self, attraction: str, start: datetime, end: datetime) -> ScheduleEntry:
+        return self.add(attraction, SLOT, start, end, attraction)
+
+    def remove(self, entry: ScheduleEntry):
+        self.__entries.remove(entry)
+        self.__locations[entry.get_location()].remove(entry)
+
+    def running(self, at: datetime = None) -> list:
+        """
+        Returns the entries running at a moment (default: now).
+        """
+        return self.__entries.at(at if at else datetime.now())
+
+    def upcoming(self, at: datetime = None, within: timedelta = timedelta(hours=1)) -> list:
+        """
+        Returns the entries running at any point in the coming period (default: the next hour).
+        """
+        at = at if at else datetime.now()
+        return self.__entries.overlapping(at, at + within)
+
+    def is_open(self, at: datetime = None) -> bool:
+        return self.__hours.is_open(at if at else datetime.now())
+
+    def check_visit(self, visit_date, now: datetime = None):
+        """
+        Raises:
+            ParkClosedError: If tickets cannot be used on the visit date.
+        """
+        self.__hours.check_visit(visit_date, now)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show what is running in a park.")
+    parser.add_argument("--schedule", default="schedule.json")
+    parser.add_argument("--at", help="ISO date-time (default: now)")
+    parser.add_argument("--hours", type=float, default=1.0, help="Look-ahead window in hours")
+    args = parser.parse_args()
+    park_schedule = ParkSchedule.load(args.schedule)
+    moment = datetime.fromisoformat(args.at) if args.at else datetime.now()
+    print("Open" if park_schedule.is_open(moment) else "Closed", f"at {moment:%Y-%m-%d %H:%M}")
+    for scheduled in park_schedule.upcoming(moment, timedelta(hours=args.hours)):
+        print(f"  {scheduled!r}")
@@ -0,0 +1,133 @@
+import time
+import tkinter as tk
+
+
+def count_widgets(widget) -> int:
+    """
+    Counts a widget and all of its descendants.
+    """
+    return 1 + sum(count_widgets(child) for child in widget.winfo_children())
+
+
+class Debouncer:
+    """
+    Delays a callback until its trigger has been quiet for a short time.
+
+    Each call to trigger() restarts the delay, so a burst of keystrokes runs
+    the callback once, after the last one.
+    """
+
+    def __init__(self, widget, delay_ms: int, callback):
+        """
+        Initializes a new Debouncer.
+
+        Args:
+            widget: Any Tk widget, used to schedule the callback.
+            delay_ms (int): Quiet time before the callback runs.
+            callback (callable): Function called with no arguments.
+        """
+        self.__widget = widget
+        self.__delay_ms = delay_ms
+        self.__callback = callback
+        self.__pending = None
+
+    def trigger(self, *_):
+        if self.__pending is not None:
+            self.__widget.after_cancel(self.__pending)
+        self.__pending = self.__widget.after(self.__delay_ms, self.__run)
+
+    def __run(self):
+        self.__pending = None
+        self.__callback()
+
+
+class Screen:
+    """
+    A cached screen: its frame and the function that refreshes its data.
+    """
+
+    __slots__ = ("frame", "refresh", "shows", "total_ms", "last_ms")
+
+    def __init__(self, frame, refresh):
+        self.frame = frame
+        self.refresh = refresh
+        self.shows = 0
+        self.total_ms = 0.0
+        self.last_ms = 0.0
+
+
+class ScreenManager:
+    """
+    Builds each screen once and switches between them by hiding frames.
+
+    A screen is registered with a build function, which creates its widgets
+    inside a frame, and an optional refresh function, which only updates the
+    data those widgets show. The first show() of a screen builds it; later
+    calls hide the current frame, refresh the target and pack it again, so
+    navigating never destroys or recreates widgets. Navigation latency is
+    recorded per screen.
+    """
+
+    def __init__(self, root):
+        """
+        Initializes a new ScreenManager.
+
+        Args:
+            root: The Tk root window the screens are packed into.
+        """
+        self.__root = root
+        self.__builders = {}
+        self.__screens = {}
+        self.__current = None
+
+    # Getters
+    def get_current(self) -> str:
+        return self.__current
+
+    def get_widget_count(self) -> int:
+        return count_widgets(self.__root)
+
+    def get_stats(self) -> dict:
+        """
+        Returns {screen: {"shows", "average_ms", "last_ms"}} for every screen shown so far.
+        """
+        return {
+            name: {"shows": screen.shows, "average_ms": screen.total_ms / screen.shows, "last_ms": screen.last_ms}
+            for name, screen in self.__screens.items() if screen.shows
+        }
+
+    # Behavioral Methods
+    def register(self, name: str, build, refresh=None):
+        """
+        Registers a screen.
+
+        Args:
+            name (str): Screen name used with show().
+            build (callable): Called once with the screen's frame to create its widgets.
+            refresh (callable): Called with no arguments each time the screen is shown.
+        """
+        self.__builders[name] = (build, refresh)
+
+    def show(self, name: str):
+        """
+        Shows a screen, building it on first use and refreshing it otherwise.
+        """
+        start = time.perf_counter()
+        screen = self.__screens.get(name)
+        if screen is None:
+            build, refresh = self.__builders[name]
+            frame = tk.Frame(self.__root)
+            build(frame)
+            screen = self.__screens[name] = Screen(frame, refresh)
+        if self.__current is not None and self.__current != name:
+            self.__screens[self.__current].frame.pack_forget()
+        if screen.refresh is not None:
+            screen.refresh()
+        if self.__current != name:
+            screen.frame.pack(fill="both", expand=True)
+            self.__current = name
+        self.__root.update_idletasks()
+        elapsed = (time.perf_counter() - start) * 1000
+        screen.shows += 1
+        screen.total_ms += elapsed
+        screen.last_ms = elapsed
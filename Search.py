@@ -0,0 +1,231 @@
+import bisect
+import re
+import sys
+from array import array
+
+CUSTOMER = "customer"
+ORDER = "order"
+RESULT_LIMIT = 50
+# Tokens added one at a time are inserted in place; larger batches are merged on the next search
+INSERT_LIMIT = 64
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(value) -> set:
+    """
+    Splits a field value into lower-case search tokens.
+
+    The whole value is kept as a token alongside its words, so prefixes of
+    e-mail addresses and dates match as typed ("john.d", "2024-12"). Phone
+    numbers also get a digits-only token.
+    """
+    text = str(value).strip().lower()
+    if not text:
+        return set()
+    tokens = set(_WORD.findall(text))
+    tokens.add(text)
+    digits = "".join(character for character in text if character.isdigit())
+    if len(digits) >= 3:
+        tokens.add(digits)
+    return tokens
+
+
+class SearchIndex:
+    """
+    In-memory inverted and prefix index over customers and orders.
+
+    Every indexed record gets an integer document number. Each token maps to
+    a sorted array of the document numbers that contain it, and all tokens
+    are kept in one sorted list, so a prefix is a bisection to a contiguous
+    run of tokens. Each document also keeps its own token tuple, so a query
+    walks the rarest term's documents and checks the other terms in place
+    instead of intersecting large sets. A query's terms must all match, and
+    the last term is treated as a prefix so results follow the admin's
+    typing. Re-indexing a key replaces its earlier document.
+    """
+
+    def __init__(self):
+        """
+        Initializes a new, empty SearchIndex.
+        """
+        self.__postings = {}
+        self.__tokens = []
+        self.__pending = []
+        self.__documents = []
+        self.__forward = []
+        self.__current = {}
+        self.__deleted = set()
+
+    # Internal helpers
+    def __sorted_tokens(self) -> list:
+        if self.__pending:
+            if len(self.__pending) <= INSERT_LIMIT:
+                for token in self.__pending:
+                    bisect.insort(self.__tokens, token)
+            else:
+                self.__tokens.extend(self.__pending)
+                self.__tokens.sort()
+            self.__pending = []
+        return self.__tokens
+
+    def __prefix_postings(self, prefix: str):
+        # Postings of every token starting with prefix, in token order
+        tokens = self.__sorted_tokens()
+        postings = self.__postings
+        for position in range(bisect.bisect_left(tokens, prefix), bisect.bisect_left(tokens, prefix + "\uffff")):
+            yield postings[tokens[position]]
+
+    @staticmethod
+    def __prefix_documents(postings):
+        # Documents matching any token of a prefix, in token order, each once
+        seen = set()
+        for posting in postings:
+            for document in reversed(posting):
+                if document not in seen:
+                    seen.add(document)
+                    yield document
+
+    # Getters
+    def __len__(self):
+        return len(self.__current)
+
+    def get_token_count(self) -> int:
+        return len(self.__postings)
+
+    # Behavioral Methods
+    def add(self, kind: str, key: str, fields: dict):
+        """
+        Indexes a record, replacing any earlier record with the same kind and key.
+
+        Args:
+            kind (str): CUSTOMER or ORDER.
+            key (str): Username or order ID.
+            fields (dict): Searchable field values.
+        """
+        previous = self.__current.get((kind, key))
+        if previous is not None:
+            self.__deleted.add(previous)
+        document = len(self.__documents)
+        self.__documents.append((kind, key))
+        self.__current[(kind, key)] = document
+
+        tokens = tokenize(key)
+        for value in fields.values():
+            if value is not None:
+                tokens |= tokenize(value)
+        # Interned so the postings keys and every document share one string per token
+        forward = tuple(sys.intern(token) for token in tokens)
+        for token in forward:
+            posting = self.__postings.get(token)
+            if posting is None:
+                posting = self.__postings[token] = array("I")
+                self.__pending.append(token)
+            posting.append(document)
+        self.__forward.append(forward)
+
+    def remove(self, kind: str, key: str):
+        """
+        Removes a record from the search results.
+        """
+        document = self.__current.pop((kind, key), None)
+        if document is not None:
+            self.__deleted.add(document)
+
+    def search(self, query: str, kind: str = None, limit: int = RESULT_LIMIT) -> list:
+        """
+        Finds records matching every term of a query.
+
+        Args:
+            query (str): Search text; the last term may be incomplete.
+            kind (str): Optional CUSTOMER or ORDER filter.
+            limit (int): Maximum number of results.
+
+        Returns:
+            list[tuple]: Up to limit (kind, key) pairs.
+        """
+        terms = query.strip().lower().split()
+        if not terms:
+            return []
+        words, prefix = terms[:-1], terms[-1]
+        exact = []
+        for word in words:
+            posting = self.__postings.get(word)
+            if posting is None:
+                return []
+            exact.append(posting)
+
+        # Walk whichever side has the fewest documents and check the rest per document
+        candidates = None
+        if exact:
+            shortest = min(exact, key=len)
+            prefix_total = 0
+            for posting in self.__prefix_postings(prefix):
+                prefix_total += len(posting)
+                if prefix_total > len(shortest):
+                    candidates = reversed(shortest)
+                    break
+        if candidates is None:
+            candidates = self.__prefix_documents(self.__prefix_postings(prefix))
+
+        results = []
+        for document in candidates:
+            if document in self.__deleted:
+                continue
+            found = self.__documents[document]
+            if kind is not None and found[0] != kind:
+                continue
+            tokens = self.__forward[document]
+            if not all(word in tokens for word in words) or not any(token.startswith(prefix) for token in tokens):
+                continue
+            results.append(found)
+            if len(results) >= limit:
+                break
+        return results
+
+
+def index_account(index: SearchIndex, username: str, account: dict):
+    """
+    Indexes an account record as stored by the GUI.
+    """
+    index.add(CUSTOMER, username, {
+        "name": account.get("name"),
+        "email": account.get("email"),
+        "phone": account.get("phone"),
+        "role": account.get("role"),
+    })
+
+
+def index_customer(index: SearchIndex, customer):
+    """
+    Indexes a Customer object by name, e-mail and phone number.
+    """
+    index.add(CUSTOMER, customer.get_username(), {
+        "name": customer.get_name(),
+        "email": customer.get_email(),
+        "phone": customer.get_phone_number(),
+    })
+
+
+def index_order(index: SearchIndex, order_id: str, order: dict):
+    """
+    Indexes an order record from the order log.
+    """
+    index.add(ORDER, order_id, {
+        "customer": order.get("customer"),
+        "ticket": order.get("ticket"),
+        "order_date": order.get("order_date"),
+        "visit_date": order.get("visit_date"),
+    })
+
+
+def build_index(accounts: dict, orders) -> SearchIndex:
+    """
+    Builds a SearchIndex over an accounts store and (order_id, order) pairs.
+    """
+    index = SearchIndex()
+    for username, account in accounts.items():
+        index_account(index, username, account)
+    for order_id, order in orders:
+        index_order(index, order_id, order)
+    return index
@@ -0,0 +1,1318 @@
+import hashlib
+import heapq
+import mmap
+import os
+import pickle
+import struct
+import zlib
+from contextlib import contextmanager
+from Main import Order, Ticket
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class SnapshotError(Exception):
+    """
+    Raised when a snapshot file is malformed or does not match its schema.
+    """
+
+
+class Schema:
+    """
+    Describes the fixed record layout of one data store.
+
+    Every field is stored in a fixed number of bytes: strings are stored as an
+    index into the snapshot's interned string table, so each record has the
+    same size and can be read in place from a memory-mapped file.
+
+    Attributes:
+        store (str): Name of the store (e.g., "orders").
+        store_id (int): Numeric identifier written into the file header.
+        version (int): Version of the record layout.
+        fields (list[tuple]): Ordered (name, kind) pairs; kind is "str", "u32" or "f64".
+        key_fields (tuple): Fields that form the nested dictionary keys of the store.
+    """
+
+    KINDS = {"str": "I", "u32": "I", "f64": "d"}
+
+    def __init__(self, store, store_id, version, fields, key_fields):
+        """
+        Initializes a new Schema object.
+
+        Args:
+            store (str): Name of the store.
+            store_id (int): Numeric identifier of the store.
+            version (int): Version of the record layout.
+            fields (list[tuple]): Ordered (name, kind) pairs.
+            key_fields (tuple): Names of the fields used as dictionary keys.
+        """
+        self.__store = store
+        self.__store_id = store_id
+        self.__version = version
+        self.__fields = list(fields)
+        self.__key_fields = tuple(key_fields)
+        self.__struct = struct.Struct("<" + "".join(self.KINDS[kind] for _, kind in self.__fields))
+        self.__offsets = {}
+        offset = 0
+        for name, kind in self.__fields:
+            self.__offsets[name] = (offset, struct.Struct("<" + self.KINDS[kind]), kind)
+            offset += struct.calcsize("<" + self.KINDS[kind])
+
+    # Getters
+    def get_store(self) -> str:
+        return self.__store
+
+    def get_store_id(self) -> int:
+        return self.__store_id
+
+    def get_version(self) -> int:
+        return self.__version
+
+    def get_fields(self) -> list:
+        return self.__fields
+
+    def get_key_fields(self) -> tuple:
+        return self.__key_fields
+
+    def get_value_fields(self) -> list:
+        return [name for name, _ in self.__fields if name not in self.__key_fields]
+
+    def get_record_size(self) -> int:
+        return self.__struct.size
+
+    def get_struct(self) -> struct.Struct:
+        return self.__struct
+
+    def get_field_layout(self, name: str) -> tuple:
+        """
+        Returns the (offset, struct, kind) triple for a single field.
+        """
+        return self.__offsets[name]
+
+    # Behavioral Methods
+    def to_records(self, data: dict):
+        """
+        Flattens the nested dictionary form of a store into flat records.
+
+        Args:
+            data (dict): The store as used by the GUI (e.g., {order_id: {...}}).
+
+        Yields:
+            dict: One flat record per leaf of the nested dictionary.
+        """
+        value_fields = self.get_value_fields()
+
+        def walk(node, depth, keys):
+            if depth == len(self.__key_fields):
+                record = dict(zip(self.__key_fields, keys))
+                if isinstance(node, dict):
+                    record.update(node)
+                else:
+                    record[value_fields[0]] = node
+                yield record
+                return
+            for key, child in node.items():
+                yield from walk(child, depth + 1, keys + (key,))
+
+        yield from walk(data, 0, ())
+
+    def from_records(self, records) -> dict:
+        """
+        Rebuilds the nested dictionary form of a store from flat records.
+
+        Args:
+            records (iterable[dict]): Flat records produced by to_records.
+
+        Returns:
+            dict: The store in the form used by the GUI.
+        """
+        value_fields = self.get_value_fields()
+        data = {}
+        for record in records:
+            node = data
+            for key_field in self.__key_fields[:-1]:
+                node = node.setdefault(record[key_field], {})
+            if len(value_fields) == 1 and len(self.__key_fields) > 1:
+                node[record[self.__key_fields[-1]]] = record[value_fields[0]]
+            else:
+                node[record[self.__key_fields[-1]]] = {name: record[name] for name in value_fields}
+        return data
+
+    def pack_inline(self, record: dict) -> bytes:
+        """
+        Encodes one record with its strings stored inline rather than interned.
+
+        Used by append-only logs, which cannot share a snapshot's string table.
+        """
+        out = bytearray()
+        for name, kind in self.__fields:
+            value = record.get(name, "" if kind == "str" else 0)
+            if kind == "str":
+                encoded = str(value).encode("utf-8")
+                out += STRING_LENGTH.pack(len(encoded)) + encoded
+            elif kind == "u32":
+                out += struct.pack("<I", int(value))
+            else:
+                out += struct.pack("<d", float(value))
+        return bytes(out)
+
+    def unpack_inline(self, buffer, offset: int = 0) -> dict:
+        """
+        Decodes one record written by pack_inline starting at the given offset.
+        """
+        record = {}
+        for name, kind in self.__fields:
+            if kind == "str":
+                (length,) = STRING_LENGTH.unpack_from(buffer, offset)
+                offset += STRING_LENGTH.size
+                record[name] = bytes(buffer[offset:offset + length]).decode("utf-8")
+                offset += length
+            elif kind == "u32":
+                (record[name],) = struct.unpack_from("<I", buffer, offset)
+                offset += 4
+            else:
+                (record[name],) = struct.unpack_from("<d", buffer, offset)
+                offset += 8
+        return record
+
+
+class SchemaRegistry:
+    """
+    Keeps every known version of every store schema together with the
+    functions that upgrade a record from one version to the next.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty SchemaRegistry.
+        """
+        self.__schemas = {}
+        self.__by_id = {}
+        self.__current = {}
+        self.__upgrades = {}
+
+    def register(self, schema: Schema, upgrade=None):
+        """
+        Registers a schema version.
+
+        Args:
+            schema (Schema): The schema to register.
+            upgrade (callable): Optional function converting a record of the
+                previous version into this version.
+        """
+        key = (schema.get_store(), schema.get_version())
+        self.__schemas[key] = schema
+        self.__by_id[schema.get_store_id()] = schema.get_store()
+        if upgrade is not None:
+            self.__upgrades[key] = upgrade
+        current = self.__current.get(schema.get_store())
+        if current is None or schema.get_version() > current.get_version():
+            self.__current[schema.get_store()] = schema
+
+    def get(self, store: str, version: int = None) -> Schema:
+        """
+        Returns a schema by store name, defaulting to its newest version.
+        """
+        if version is None:
+            if store not in self.__current:
+                raise SnapshotError(f"Unknown store '{store}'.")
+            return self.__current[store]
+        if (store, version) not in self.__schemas:
+            raise SnapshotError(f"Unknown schema version {version} for store '{store}'.")
+        return self.__schemas[(store, version)]
+
+    def get_store_name(self, store_id: int) -> str:
+        if store_id not in self.__by_id:
+            raise SnapshotError(f"Unknown store id {store_id}.")
+        return self.__by_id[store_id]
+
+    def upgrade(self, store: str, version: int, record: dict) -> dict:
+        """
+        Upgrades a record from the given version to the newest schema version.
+        """
+        current = self.get(store).get_version()
+        while version < current:
+            version += 1
+            upgrade = self.__upgrades.get((store, version))
+            if upgrade is not None:
+                record = upgrade(record)
+        return record
+
+
+SCHEMAS = SchemaRegistry()
+SCHEMAS.register(Schema("accounts", 1, 1, [("username", "str"), ("password", "str"), ("role", "str")], ("username",)))
+SCHEMAS.register(Schema("orders", 2, 1, [("order_id", "str"), ("customer", "str"), ("ticket", "str"), ("quantity", "u32"), ("total_price", "f64"), ("order_date", "str")], ("order_id",)))
+SCHEMAS.register(
+    Schema("orders", 2, 2, [("order_id", "str"), ("customer", "str"), ("ticket", "str"), ("quantity", "u32"), ("total_price", "f64"), ("order_date", "str"), ("visit_date", "str")], ("order_id",)),
+    upgrade=lambda record: dict(record, visit_date=record["order_date"]),
+)
+SCHEMAS.register(Schema("sales", 3, 1, [("date", "str"), ("ticket", "str"), ("quantity", "u32")], ("date", "ticket")))
+SCHEMAS.register(Schema("loyalty", 4, 1, [("customer", "str"), ("kind", "str"), ("points", "f64"), ("reference", "str"), ("entry_date", "str")], ("customer",)))
+SCHEMAS.register(Schema("outbox", 5, 1, [("sequence", "u32"), ("kind", "str"), ("key", "str"), ("park", "str"), ("created", "str"), ("payload", "str")], ("sequence",)))
+SCHEMAS.register(Schema("admins", 6, 1, [("username", "str"), ("permissions", "str"), ("clearance", "u32"), ("super_admin", "u32")], ("username",)))
+SCHEMAS.register(Schema("audit", 7, 1, [("admin", "str"), ("action", "str"), ("accounts", "u32"), ("entry_time", "str")], ("admin",)))
+
+MAGIC = b"TKSN"
+FORMAT_VERSION = 1
+# magic, format version, store id, schema version, string count, record count, string table size
+HEADER = struct.Struct("<4sHBBIII")
+STRING_LENGTH = struct.Struct("<I")
+
+TRAILER_MAGIC = b"TKCK"
+# magic, generation, payload length, CRC-32 of the payload
+TRAILER = struct.Struct("<4sQQI")
+GENERATIONS = 3
+
+
+def _fsync_directory(directory: str):
+    """
+    Flushes a directory entry so that a completed rename survives a power cut.
+    """
+    if os.name == "nt":
+        # Windows cannot open directories for fsync; NTFS journals renames itself
+        return
+    fd = os.open(directory or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _read_trailer(file_path: str, verify: bool = True):
+    """
+    Reads and optionally verifies the checksum trailer of one file.
+
+    Returns:
+        tuple: (generation, payload length), or None if the file is missing or invalid.
+    """
+    try:
+        with open(file_path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < TRAILER.size:
+                return None
+            f.seek(size - TRAILER.size)
+            magic, generation, length, checksum = TRAILER.unpack(f.read(TRAILER.size))
+            if magic != TRAILER_MAGIC or length != size - TRAILER.size:
+                return None
+            if verify:
+                f.seek(0)
+                crc = 0
+                remaining = length
+                while remaining:
+                    chunk = f.read(min(remaining, 1 << 20))
+                    if not chunk:
+                        return None
+                    crc = zlib.crc32(chunk, crc)
+                    remaining -= len(chunk)
+                if crc != checksum:
+                    return None
+    except OSError:
+        return None
+    return generation, length
+
+
+def generation_paths(file_path: str, generations: int = GENERATIONS) -> list:
+    """
+    Returns the paths of a file's generations, newest first.
+    """
+    return [file_path] + [f"{file_path}.{number}" for number in range(1, generations)]
+
+
+def find_latest_generation(file_path: str, generations: int = GENERATIONS):
+    """
+    Finds the newest generation of a file whose checksum is valid.
+
+    A temporary file left behind by an interrupted write is also considered:
+    it is only chosen if it was completely written and its checksum matches.
+
+    Returns:
+        tuple: (path, generation, payload length), or None if no valid generation exists.
+    """
+    best = None
+    for path in generation_paths(file_path, generations) + [file_path + ".tmp"]:
+        trailer = _read_trailer(path)
+        if trailer is not None and (best is None or trailer[0] > best[1]):
+            best = (path, trailer[0], trailer[1])
+    return best
+
+
+@contextmanager
+def file_lock(lock_path: str):
+    """
+    Holds an exclusive lock on a lock file, shared by every process that opens the same path.
+    """
+    with open(lock_path, "a+b") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def atomic_write(file_path: str, chunks, generations: int = GENERATIONS):
+    """
+    Atomically replaces a file, keeping older copies as rotating generations.
+
+    The payload is written to a temporary file together with a checksum
+    trailer and fsynced; the existing generations are shifted down by one
+    (file -> file.1 -> file.2 ...), the temporary file is renamed into place
+    and the directory is fsynced. A crash at any point leaves at least one
+    complete, verifiable generation on disk.
+
+    Args:
+        file_path (str): Path of the file to replace.
+        chunks (bytes | iterable[bytes]): The payload, as one buffer or as chunks.
+        generations (int): How many generations to keep, including the newest.
+    """
+    if isinstance(chunks, (bytes, bytearray, memoryview)):
+        chunks = (chunks,)
+    trailers = [_read_trailer(path, verify=False) for path in generation_paths(file_path, generations)]
+    generation = max((trailer[0] for trailer in trailers if trailer), default=0) + 1
+
+    temp_path = file_path + ".tmp"
+    crc = 0
+    length = 0
+    with open(temp_path, "wb") as f:
+        for chunk in chunks:
+            f.write(chunk)
+            crc = zlib.crc32(chunk, crc)
+            length += len(chunk)
+        f.write(TRAILER.pack(TRAILER_MAGIC, generation, length, crc))
+        f.flush()
+        os.fsync(f.fileno())
+
+    paths = generation_paths(file_path, generations)
+    for older, newer in zip(reversed(paths[1:]), reversed(paths[:-1])):
+        if os.path.exists(newer):
+            os.replace(newer, older)
+    os.replace(temp_path, file_path)
+    _fsync_directory(os.path.dirname(file_path))
+
+
+def atomic_read(file_path: str, generations: int = GENERATIONS) -> bytes:
+    """
+    Returns the payload of the newest valid generation of a file.
+
+    Raises:
+        SnapshotError: If no generation of the file passes its checksum.
+    """
+    latest = find_latest_generation(file_path, generations)
+    if latest is None:
+        raise SnapshotError(f"No valid copy of {file_path} was found.")
+    path, _, length = latest
+    with open(path, "rb") as f:
+        return f.read(length)
+
+
+def encode_snapshot(store: str, data: dict) -> bytes:
+    """
+    Encodes a store into the binary snapshot format.
+
+    Args:
+        store (str): Name of the store.
+        data (dict): The store in the form used by the GUI.
+
+    Returns:
+        bytes: The encoded snapshot.
+    """
+    schema = SCHEMAS.get(store)
+    strings = {}
+    string_table = []
+    record_struct = schema.get_struct()
+    kinds = [kind for _, kind in schema.get_fields()]
+    names = [name for name, _ in schema.get_fields()]
+    body = bytearray()
+    count = 0
+
+    for record in schema.to_records(data):
+        values = []
+        for name, kind in zip(names, kinds):
+            value = record.get(name, "" if kind == "str" else 0)
+            if kind == "str":
+                value = str(value)
+                index = strings.get(value)
+                if index is None:
+                    index = strings[value] = len(string_table)
+                    string_table.append(value)
+                values.append(index)
+            elif kind == "u32":
+                values.append(int(value))
+            else:
+                values.append(float(value))
+        body += record_struct.pack(*values)
+        count += 1
+
+    table = bytearray()
+    for value in string_table:
+        encoded = value.encode("utf-8")
+        table += STRING_LENGTH.pack(len(encoded)) + encoded
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, schema.get_store_id(), schema.get_version(), len(string_table), count, len(table))
+    return header + bytes(table) + bytes(body)
+
+
+class SnapshotReader:
+    """
+    Reads a snapshot file through a memory map without copying its records.
+
+    Strings are decoded once from the interned string table; records are
+    unpacked on demand directly from the mapped file.
+    """
+
+    def __init__(self, file_path: str):
+        """
+        Opens and validates the newest valid generation of a snapshot file.
+
+        Args:
+            file_path (str): Path to the snapshot file.
+        """
+        latest = find_latest_generation(file_path)
+        path, size = (latest[0], latest[2]) if latest else (file_path, None)
+        self.__file = open(path, "rb")
+        if size is None:
+            # Snapshot written before checksum trailers were introduced
+            size = os.fstat(self.__file.fileno()).st_size
+        if size < HEADER.size:
+            self.__file.close()
+            raise SnapshotError(f"{file_path} is too short to be a snapshot.")
+        self.__map = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.__view = memoryview(self.__map)
+        try:
+            self.__parse(file_path, size)
+        except Exception:
+            self.close()
+            raise
+
+    def __parse(self, file_path, size):
+        magic, format_version, store_id, schema_version, string_count, record_count, table_size = HEADER.unpack_from(self.__view, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise SnapshotError(f"{file_path} is not a version {FORMAT_VERSION} snapshot.")
+        self.__store = SCHEMAS.get_store_name(store_id)
+        self.__schema = SCHEMAS.get(self.__store, schema_version)
+        self.__count = record_count
+
+        self.__strings = []
+        offset = HEADER.size
+        for _ in range(string_count):
+            (length,) = STRING_LENGTH.unpack_from(self.__view, offset)
+            offset += STRING_LENGTH.size
+            self.__strings.append(bytes(self.__view[offset:offset + length]).decode("utf-8"))
+            offset += length
+        if offset != HEADER.size + table_size:
+            raise SnapshotError(f"{file_path} has a corrupt string table.")
+
+        self.__records_offset = offset
+        if offset + record_count * self.__schema.get_record_size() != size:
+            raise SnapshotError(f"{file_path} has an unexpected size for {record_count} records.")
+
+    # Getters
+    def get_store(self) -> str:
+        return self.__store
+
+    def get_schema(self) -> Schema:
+        return self.__schema
+
+    def __len__(self):
+        return self.__count
+
+    # Behavioral Methods
+    def raw_record(self, index: int) -> memoryview:
+        """
+        Returns a zero-copy view of the bytes of one record.
+        """
+        if not 0 <= index < self.__count:
+            raise IndexError(index)
+        size = self.__schema.get_record_size()
+        start = self.__records_offset + index * size
+        return self.__view[start:start + size]
+
+    def get_field(self, index: int, name: str):
+        """
+        Reads a single field of one record without decoding the others.
+        """
+        if not 0 <= index < self.__count:
+            raise IndexError(index)
+        offset, field_struct, kind = self.__schema.get_field_layout(name)
+        (value,) = field_struct.unpack_from(self.__view, self.__records_offset + index * self.__schema.get_record_size() + offset)
+        return self.__strings[value] if kind == "str" else value
+
+    def record(self, index: int) -> dict:
+        """
+        Decodes one record, upgraded to the newest schema version.
+        """
+        if not 0 <= index < self.__count:
+            raise IndexError(index)
+        size = self.__schema.get_record_size()
+        values = self.__schema.get_struct().unpack_from(self.__view, self.__records_offset + index * size)
+        record = {}
+        for (name, kind), value in zip(self.__schema.get_fields(), values):
+            record[name] = self.__strings[value] if kind == "str" else value
+        return SCHEMAS.upgrade(self.__store, self.__schema.get_version(), record)
+
+    def iter_records(self):
+        for index in range(self.__count):
+            yield self.record(index)
+
+    def close(self):
+        self.__view.release()
+        self.__map.close()
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class _RestrictedUnpickler(pickle.Unpickler):
+    """
+    Unpickler that only accepts plain builtin containers and scalars, so that
+    migrating a legacy .pkl file can never import or call arbitrary code.
+    """
+
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError(f"Refusing to load global '{module}.{name}' from a legacy data file.")
+
+
+def read_legacy_pickle(file_path: str) -> dict:
+    """
+    Loads a legacy .pkl data file using the restricted unpickler.
+    """
+    with open(file_path, "rb") as f:
+        data = _RestrictedUnpickler(f).load()
+    return data if isinstance(data, dict) else {}
+
+
+def write_snapshot(file_path: str, store: str, data: dict):
+    """
+    Atomically writes a store to a snapshot file.
+    """
+    atomic_write(file_path, encode_snapshot(store, data))
+
+
+def read_snapshot(file_path: str) -> dict:
+    """
+    Reads a whole snapshot file back into the nested dictionary form.
+    """
+    with SnapshotReader(file_path) as reader:
+        return SCHEMAS.get(reader.get_store()).from_records(reader.iter_records())
+
+
+def load_store(file_path: str, store: str, legacy_path: str = None) -> dict:
+    """
+    Loads a store, migrating it from its legacy .pkl file on first use.
+
+    Args:
+        file_path (str): Path to the snapshot file.
+        store (str): Name of the store.
+        legacy_path (str): Optional path of the legacy pickle file.
+
+    Returns:
+        dict: The store in the form used by the GUI.
+    """
+    if find_latest_generation(file_path) is not None or os.path.exists(file_path):
+        return read_snapshot(file_path)
+    if legacy_path and os.path.exists(legacy_path):
+        data = read_legacy_pickle(legacy_path)
+        write_snapshot(file_path, store, data)
+        return read_snapshot(file_path)
+    return {}
+
+
+LOG_MAGIC = b"TKOL"
+LOG_FORMAT_VERSION = 2
+# magic, format version, store id
+LOG_HEADER = struct.Struct("<4sHB")
+# payload length, schema version, CRC-32 of the payload
+RECORD_HEADER = struct.Struct("<IBI")
+INDEX_MAGIC = b"TKOI"
+INDEX_FORMAT_VERSION = 1
+# magic, format version, log bytes covered, order entries, customer entries
+INDEX_HEADER = struct.Struct("<4sHQII")
+# key hash, record offset
+INDEX_ENTRY = struct.Struct("<QQ")
+
+
+def key_hash(value: str) -> int:
+    """
+    Returns the stable 64-bit hash used to key the order log indexes.
+    """
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class OrderLog:
+    """
+    Append-only, memory-mapped log of order records with an on-disk offset index.
+
+    The index file holds two sorted tables of (key hash, record offset) pairs,
+    one keyed by order ID and one by customer, which are searched by bisection
+    straight from the mapped file. Orders appended since the index was last
+    written are kept in a small in-memory tail index, which is merged into the
+    index file once it grows past TAIL_LIMIT entries. Resident memory is
+    therefore bounded by the tail, not by the size of the order history.
+
+    Several kiosk processes may share one log. Appends and index merges hold
+    the log's file lock and first scan whatever other processes appended
+    since this process last looked, so a merged index never claims to cover
+    records it does not hold. Lookups that miss catch up the same way.
+
+    The log behaves like the read-only parts of a dictionary keyed by order ID,
+    plus __setitem__ for appending new orders.
+    """
+
+    TAIL_LIMIT = 1024
+    # Batches merge less often, since every merge rewrites the whole index
+    BATCH_TAIL_LIMIT = 65536
+
+    def __init__(self, log_path: str, index_path: str = None):
+        """
+        Opens (or creates) an order log and its index.
+
+        Args:
+            log_path (str): Path to the log file.
+            index_path (str): Path to the index file; defaults to the log path with ".idx".
+        """
+        self.__log_path = log_path
+        self.__index_path = index_path if index_path else os.path.splitext(log_path)[0] + ".idx"
+        self.__lock_path = log_path + ".lock"
+        self.__schema = SCHEMAS.get("orders")
+        with file_lock(self.__lock_path):
+            self.__open()
+
+    # Internal helpers
+    def __open(self):
+        """
+        Opens the log file, its index and the tail; callers hold the log's file lock.
+        """
+        if not os.path.exists(self.__log_path) or os.path.getsize(self.__log_path) == 0:
+            with open(self.__log_path, "wb") as f:
+                f.write(LOG_HEADER.pack(LOG_MAGIC, LOG_FORMAT_VERSION, self.__schema.get_store_id()))
+        self.__file = open(self.__log_path, "r+b")
+        self.__inode = os.fstat(self.__file.fileno()).st_ino
+        self.__map = None
+        self.__mapped_size = 0
+        self.__index_file = None
+        self.__index_map = None
+        self.__indexed_orders = 0
+        self.__indexed_customers = 0
+        self.__indexed_size = LOG_HEADER.size
+        self.__scanned_size = LOG_HEADER.size
+        self.__tail_orders = {}
+        self.__tail_customers = {}
+        self.__tail_count = 0
+        self.__corrupt = []
+        self.__check_header()
+        self.__open_index()
+        self.__scanned_size = self.__indexed_size
+        self.__catch_up()
+
+    def __close_files(self):
+        self.__close_index()
+        if self.__map is not None:
+            self.__map.close()
+            self.__map = None
+        self.__file.close()
+
+    def __replaced(self) -> bool:
+        # The archive job and renames swap a new log in under the same path
+        try:
+            return os.stat(self.__log_path).st_ino != self.__inode
+        except FileNotFoundError:
+            return False
+
+    def __check_header(self):
+        self.__remap()
+        magic, format_version, store_id = LOG_HEADER.unpack_from(self.__map, 0)
+        if magic != LOG_MAGIC or format_version != LOG_FORMAT_VERSION or store_id != self.__schema.get_store_id():
+            raise SnapshotError(f"{self.__log_path} is not a version {LOG_FORMAT_VERSION} order log.")
+
+    def __remap(self):
+        size = os.fstat(self.__file.fileno()).st_size
+        if size != self.__mapped_size:
+            if self.__map is not None:
+                self.__map.close()
+            self.__map = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.__mapped_size = size
+
+    def __open_index(self):
+        if _read_trailer(self.__index_path) is None:
+            return
+        index_file = open(self.__index_path, "rb")
+        try:
+            index_map = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            index_file.close()
+            return
+        magic, format_version, covered, orders, customers = INDEX_HEADER.unpack_from(index_map, 0) if len(index_map) >= INDEX_HEADER.size else (b"", 0, 0, 0, 0)
+        expected = INDEX_HEADER.size + (orders + customers) * INDEX_ENTRY.size + TRAILER.size
+        if magic != INDEX_MAGIC or format_version != INDEX_FORMAT_VERSION or len(index_map) != expected or covered > self.__mapped_size:
+            # A stale or damaged index is simply rebuilt from the log
+            index_map.close()
+            index_file.close()
+            return
+        self.__index_file = index_file
+        self.__index_map = index_map
+        self.__indexed_size = covered
+        self.__indexed_orders = orders
+        self.__indexed_customers = customers
+
+    def __close_index(self):
+        if self.__index_map is not None:
+            self.__index_map.close()
+            self.__index_file.close()
+        self.__index_map = None
+        self.__index_file = None
+
+    def __catch_up(self):
+        """
+        Adds the records appended since the last scan, by any process, to the tail.
+
+        Callers hold the log's file lock, so every append is complete. If
+        the log was replaced, it is reopened and read from the new file.
+        """
+        if self.__replaced():
+            self.__close_files()
+            self.__open()
+            return
+        for offset, record in self.__scan(self.__scanned_size, self.__corrupt):
+            self.__add_to_tail(offset, record)
+        # Drop a record left torn by an interrupted append
+        self.__scanned_size = repair_torn_tail(self.__file, self.__scanned_size)
+        self.__remap()
+
+    def __refresh(self) -> bool:
+        """
+        Catches up with other processes' appends, if the log has grown or been replaced since the last scan.
+
+        Returns:
+            bool: Whether there was anything to catch up with.
+        """
+        try:
+            status = os.stat(self.__log_path)
+        except FileNotFoundError:
+            return False
+        if status.st_ino == self.__inode and status.st_size == self.__scanned_size:
+            return False
+        with file_lock(self.__lock_path):
+            self.__catch_up()
+        return True
+
+    def __scan(self, start: int, corrupt: list = None):
+        """
+        Yields (offset, record) for every intact record from start to the end of the log.
+
+        Records whose checksum fails are skipped (and their offsets added
+        to corrupt, if given); scanning stops at an incomplete record.
+        Scanning never changes the log.
+        """
+        self.__remap()
+        offset = start
+        while offset + RECORD_HEADER.size <= self.__mapped_size:
+            length, version, checksum = RECORD_HEADER.unpack_from(self.__map, offset)
+            start = offset + RECORD_HEADER.size
+            end = start + length
+            if end > self.__mapped_size:
+                break
+            if zlib.crc32(self.__map[start:end]) != checksum:
+                if corrupt is not None:
+                    corrupt.append(offset)
+            else:
+                yield offset, SCHEMAS.upgrade("orders", version, SCHEMAS.get("orders", version).unpack_inline(self.__map, start))
+            offset = end
+
+    def __decode(self, offset: int) -> dict:
+        if offset >= self.__mapped_size:
+            self.__remap()
+        length, version, checksum = RECORD_HEADER.unpack_from(self.__map, offset)
+        start = offset + RECORD_HEADER.size
+        if zlib.crc32(self.__map[start:start + length]) != checksum:
+            raise SnapshotError(f"Order record at offset {offset} of {self.__log_path} is corrupt.")
+        record = SCHEMAS.get("orders", version).unpack_inline(self.__map, start)
+        return SCHEMAS.upgrade("orders", version, record)
+
+    def __add_to_tail(self, offset: int, record: dict):
+        self.__tail_orders.setdefault(key_hash(record["order_id"]), []).append(offset)
+        self.__tail_customers.setdefault(key_hash(record["customer"]), []).append(offset)
+        self.__tail_count += 1
+
+    def __index_entry(self, table: int, position: int) -> tuple:
+        base = INDEX_HEADER.size + (self.__indexed_orders * INDEX_ENTRY.size if table else 0)
+        return INDEX_ENTRY.unpack_from(self.__index_map, base + position * INDEX_ENTRY.size)
+
+    def __indexed_offsets(self, table: int, hashed: int) -> list:
+        """
+        Bisects one index table for all record offsets stored under a key hash.
+        """
+        if self.__index_map is None:
+            return []
+        low, high = 0, self.__indexed_customers if table else self.__indexed_orders
+        end = high
+        while low < high:
+            middle = (low + high) // 2
+            if self.__index_entry(table, middle)[0] < hashed:
+                low = middle + 1
+            else:
+                high = middle
+        offsets = []
+        while low < end:
+            entry_hash, offset = self.__index_entry(table, low)
+            if entry_hash != hashed:
+                break
+            offsets.append(offset)
+            low += 1
+        return offsets
+
+    def __iter_index(self, table: int):
+        count = self.__indexed_customers if table else self.__indexed_orders
+        for position in range(count if self.__index_map is not None else 0):
+            yield self.__index_entry(table, position)
+
+    @staticmethod
+    def __values(record: dict) -> dict:
+        return {name: value for name, value in record.items() if name != "order_id"}
+
+    # Getters
+    def get_log_path(self) -> str:
+        return self.__log_path
+
+    def get_index_path(self) -> str:
+        return self.__index_path
+
+    def get_corrupt_offsets(self) -> list:
+        """
+        Returns the offsets of records skipped on open because their checksum failed.
+        """
+        return list(self.__corrupt)
+
+    # Dictionary-like access
+    def __len__(self):
+        self.__refresh()
+        return self.__indexed_orders + self.__tail_count
+
+    def __contains__(self, order_id):
+        return self.get(order_id) is not None
+
+    def __getitem__(self, order_id):
+        values = self.get(order_id)
+        if values is None:
+            raise KeyError(order_id)
+        return values
+
+    def __setitem__(self, order_id, values):
+        self.append(order_id, values)
+
+    def get(self, order_id: str, default=None):
+        """
+        Looks up one order by ID, reading only the matching record from the log.
+
+        Returns:
+            dict: The order fields (without the ID), or default if not found.
+        """
+        hashed = key_hash(order_id)
+        while True:
+            offsets = self.__tail_orders.get(hashed, []) + self.__indexed_offsets(0, hashed)
+            # Newest record wins if an order ID was ever written twice
+            for offset in sorted(offsets, reverse=True):
+                record = self.__decode(offset)
+                if record["order_id"] == order_id:
+                    return self.__values(record)
+            # Another process may have appended it since the last scan
+            if not self.__refresh():
+                return default
+
+    def customer_orders(self, customer: str):
+        """
+        Yields (order_id, order) pairs for one customer in the order they were placed.
+        """
+        self.__refresh()
+        hashed = key_hash(customer)
+        offsets = self.__indexed_offsets(1, hashed) + self.__tail_customers.get(hashed, [])
+        for offset in sorted(offsets):
+            record = self.__decode(offset)
+            if record["customer"] == customer:
+                yield record["order_id"], self.__values(record)
+
+    def items(self):
+        """
+        Streams every (order_id, order) pair from the log in the order they were placed.
+        """
+        for _, record in self.__scan(LOG_HEADER.size):
+            yield record["order_id"], self.__values(record)
+
+    def keys(self):
+        for order_id, _ in self.items():
+            yield order_id
+
+    def values(self):
+        for _, order in self.items():
+            yield order
+
+    def __iter__(self):
+        return self.keys()
+
+    # Behavioral Methods
+    def append(self, order_id: str, values: dict):
+        """
+        Appends one order to the end of the log.
+
+        Args:
+            order_id (str): Unique identifier of the order.
+            values (dict): The order fields (customer, ticket, quantity, ...).
+        """
+        record = dict(values)
+        record["order_id"] = order_id
+        with file_lock(self.__lock_path):
+            self.__catch_up()
+            self.__file.seek(0, os.SEEK_END)
+            offset = self.__file.tell()
+            self.__file.write(encode_log_record("orders", record))
+            self.__file.flush()
+            os.fsync(self.__file.fileno())
+            self.__scanned_size = self.__file.tell()
+            self.__add_to_tail(offset, record)
+        if self.__tail_count >= self.TAIL_LIMIT:
+            self.flush_index()
+
+    def append_batch(self, orders):
+        """
+        Appends many orders with a single write and a single fsync.
+
+        The tail is merged into the index once it reaches BATCH_TAIL_LIMIT
+        entries, so memory stays bounded however many batches are loaded.
+
+        Args:
+            orders (iterable[tuple]): (order_id, order) pairs to append.
+
+        Returns:
+            int: Number of orders appended.
+        """
+        records = []
+        for order_id, values in orders:
+            record = dict(values)
+            record["order_id"] = order_id
+            records.append(record)
+        buffer = bytearray()
+        added = []
+        with file_lock(self.__lock_path):
+            self.__catch_up()
+            self.__file.seek(0, os.SEEK_END)
+            offset = self.__file.tell()
+            for record in records:
+                added.append((offset + len(buffer), record))
+                buffer += encode_log_record("orders", record)
+            self.__file.write(buffer)
+            self.__file.flush()
+            os.fsync(self.__file.fileno())
+            self.__scanned_size = self.__file.tell()
+            for record_offset, record in added:
+                self.__add_to_tail(record_offset, record)
+        if self.__tail_count >= self.BATCH_TAIL_LIMIT:
+            self.flush_index()
+        return len(added)
+
+    def flush_index(self):
+        """
+        Merges the in-memory tail into the sorted index file.
+
+        Records other processes appended since the last scan are added to
+        the tail first, all under the log's file lock, so the index covers
+        exactly the records it holds.
+        """
+        with file_lock(self.__lock_path):
+            self.__catch_up()
+            tables = []
+            for table, tail in ((0, self.__tail_orders), (1, self.__tail_customers)):
+                tail_entries = sorted((hashed, offset) for hashed, offsets in tail.items() for offset in offsets)
+                tables.append((len(tail_entries), heapq.merge(self.__iter_index(table), tail_entries)))
+            orders = self.__indexed_orders + tables[0][0]
+            customers = self.__indexed_customers + tables[1][0]
+
+            # The old index is still mapped while merging, so the new one is built in memory first
+            payload = bytearray(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_FORMAT_VERSION, self.__scanned_size, orders, customers))
+            for _, entries in tables:
+                for entry in entries:
+                    payload += INDEX_ENTRY.pack(*entry)
+            self.__close_index()
+            atomic_write(self.__index_path, payload, generations=1)
+
+            self.__tail_orders = {}
+            self.__tail_customers = {}
+            self.__tail_count = 0
+            self.__open_index()
+
+    def load_order(self, order_id: str, customer):
+        """
+        Rebuilds an Order object for one logged order.
+
+        Args:
+            order_id (str): Identifier of the order.
+            customer (Customer): The customer who placed the order.
+
+        Returns:
+            Order: The reconstructed order, or None if the ID is unknown.
+        """
+        values = self.get(order_id)
+        if values is None:
+            return None
+        quantity = max(values["quantity"], 1)
+        unit_price = values["total_price"] / quantity
+        tickets = [Ticket(values["ticket"], values["ticket"], unit_price, "", 0, "", values["visit_date"]) for _ in range(quantity)]
+        return Order(customer, tickets, values["quantity"], values["total_price"], values["total_price"], "CARD", values["order_date"], order_id)
+
+    def close(self):
+        self.flush_index()
+        self.__close_files()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_order_log(log_path: str, snapshot_path: str = None, legacy_path: str = None) -> OrderLog:
+    """
+    Opens the order log, importing orders from an older snapshot or .pkl file on first use.
+
+    The imported orders are written to a temporary log that is renamed into
+    place only once it is complete, so the log's existence marks a finished
+    migration and a crash part way through just repeats it on the next start.
+
+    Args:
+        log_path (str): Path to the order log.
+        snapshot_path (str): Optional path of an orders snapshot to import.
+        legacy_path (str): Optional path of a legacy orders pickle to import.
+
+    Returns:
+        OrderLog: The opened order log.
+    """
+    if not os.path.exists(log_path):
+        if snapshot_path is not None:
+            orders = load_store(snapshot_path, "orders", legacy_path)
+        elif legacy_path and os.path.exists(legacy_path):
+            orders = read_legacy_pickle(legacy_path)
+        else:
+            orders = {}
+        if orders:
+            temp_log = log_path + ".migrating"
+            temp_index = temp_log + ".idx"
+            for path in (temp_log, temp_index):
+                if os.path.exists(path):
+                    os.remove(path)
+            try:
+                with OrderLog(temp_log, temp_index) as migrated:
+                    migrated.append_batch(orders.items())
+            finally:
+                if os.path.exists(temp_log + ".lock"):
+                    os.remove(temp_log + ".lock")
+            # The log goes last: until it is in place, the next start migrates again
+            os.replace(temp_index, os.path.splitext(log_path)[0] + ".idx")
+            os.replace(temp_log, log_path)
+    return OrderLog(log_path)
+
+
+def rename_orders(log_path: str, renames: dict, batch_size: int = 65536) -> int:
+    """
+    Rewrites an order log with some order IDs replaced.
+
+    The log is streamed into a new log, which replaces the old one (and its
+    index) only once it is complete, so a crash leaves either the old IDs or
+    the new ones. Renaming again after the swap finds nothing to rename.
+
+    The rewrite holds the log's file lock, so no other process can append
+    to the old log while it is copied; open logs reopen the new file on
+    their next lookup or append.
+
+    Args:
+        log_path (str): Path to the order log.
+        renames (dict): New order ID per old order ID.
+        batch_size (int): Orders written per append.
+
+    Returns:
+        int: Number of orders renamed.
+    """
+    with file_lock(log_path + ".lock"):
+        return _rename_orders(log_path, renames, batch_size)
+
+
+def _rename_orders(log_path: str, renames: dict, batch_size: int) -> int:
+    temp_log = log_path + ".new"
+    temp_index = temp_log + ".idx"
+    for path in (temp_log, temp_index):
+        if os.path.exists(path):
+            os.remove(path)
+    renamed = 0
+    batch = []
+    try:
+        with OrderLog(temp_log, temp_index) as new_log:
+            for order_id, order in read_order_log_range(log_path):
+                if order_id in renames:
+                    order_id = renames[order_id]
+                    renamed += 1
+                batch.append((order_id, order))
+                if len(batch) >= batch_size:
+                    new_log.append_batch(batch)
+                    new_log.flush_index()
+                    batch = []
+            new_log.append_batch(batch)
+    finally:
+        if os.path.exists(temp_log + ".lock"):
+            os.remove(temp_log + ".lock")
+    if not renamed:
+        os.remove(temp_log)
+        os.remove(temp_index)
+        return 0
+
+    # The old index must not outlive the old log, or its offsets would point into the new one
+    index_path = os.path.splitext(log_path)[0] + ".idx"
+    if os.path.exists(index_path):
+        os.remove(index_path)
+    os.replace(temp_log, log_path)
+    os.replace(temp_index, index_path)
+    return renamed
+
+
+def split_order_log(log_path: str, parts: int) -> list:
+    """
+    Splits an order log into contiguous byte ranges of roughly equal size.
+
+    Only record headers are read. Because orders are appended as they are
+    placed, each range also covers a contiguous span of order dates.
+
+    Args:
+        log_path (str): Path to the order log.
+        parts (int): Desired number of ranges.
+
+    Returns:
+        list[tuple]: (start, end) byte offsets, each aligned to record boundaries.
+    """
+    with open(log_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size <= LOG_HEADER.size:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as log_map:
+            target = max((size - LOG_HEADER.size) // max(parts, 1), 1)
+            ranges = []
+            start = offset = LOG_HEADER.size
+            while offset + RECORD_HEADER.size <= size:
+                length, _, _ = RECORD_HEADER.unpack_from(log_map, offset)
+                if offset + RECORD_HEADER.size + length > size:
+                    break
+                offset += RECORD_HEADER.size + length
+                if offset - start >= target and len(ranges) < parts - 1:
+                    ranges.append((start, offset))
+                    start = offset
+            if offset > start:
+                ranges.append((start, offset))
+    return ranges
+
+
+def encode_log_record(store: str, record: dict) -> bytes:
+    """
+    Encodes one record, with its length, schema version and checksum, for appending to a log.
+    """
+    schema = SCHEMAS.get(store)
+    payload = schema.pack_inline(record)
+    return RECORD_HEADER.pack(len(payload), schema.get_version(), zlib.crc32(payload)) + payload
+
+
+def read_log_range(log_path: str, store: str, start: int = LOG_HEADER.size, end: int = None, offsets: bool = False):
+    """
+    Streams (end offset, record) pairs from one byte range of an append-only log.
+
+    Opens the log read-only, so it is safe to call from worker processes
+    while another process keeps appending to the same file. A record whose
+    checksum fails is skipped, and reading stops at the first incomplete
+    record. By default the whole log is read.
+
+    Args:
+        offsets (bool): Whether to yield (start offset, end offset, record) instead.
+    """
+    if not os.path.exists(log_path) or os.path.getsize(log_path) <= LOG_HEADER.size:
+        return
+    with open(log_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as log_map:
+            magic, format_version, store_id = LOG_HEADER.unpack_from(log_map, 0)
+            if magic != LOG_MAGIC or format_version != LOG_FORMAT_VERSION or store_id != SCHEMAS.get(store).get_store_id():
+                raise SnapshotError(f"{log_path} is not a version {LOG_FORMAT_VERSION} {store} log.")
+            offset = start
+            end = len(log_map) if end is None else min(end, len(log_map))
+            while offset + RECORD_HEADER.size <= end:
+                length, version, checksum = RECORD_HEADER.unpack_from(log_map, offset)
+                payload_start = offset + RECORD_HEADER.size
+                if payload_start + length > end:
+                    break
+                record_start, offset = offset, payload_start + length
+                if zlib.crc32(log_map[payload_start:offset]) != checksum:
+                    continue
+                record = SCHEMAS.upgrade(store, version, SCHEMAS.get(store, version).unpack_inline(log_map, payload_start))
+                yield (record_start, offset, record) if offsets else (offset, record)
+
+
+def is_record_end(log_file, record_start: int, record_end: int) -> bool:
+    """
+    Returns whether an intact record starts at record_start and ends exactly at record_end.
+    """
+    log_file.seek(record_start)
+    header = log_file.read(RECORD_HEADER.size)
+    if len(header) < RECORD_HEADER.size:
+        return False
+    length, _, checksum = RECORD_HEADER.unpack(header)
+    if record_start + RECORD_HEADER.size + length != record_end:
+        return False
+    return zlib.crc32(log_file.read(length)) == checksum
+
+
+def repair_torn_tail(log_file, start: int = LOG_HEADER.size) -> int:
+    """
+    Truncates a record left incomplete at the end of a log by an interrupted append.
+
+    Record headers are followed from start, which must be a record
+    boundary. Only a record that runs past the end of the file directly
+    after an intact record (or at start) is torn; anything else, such as
+    a corrupt record in the middle of the log, is left in place. Callers
+    must hold the log's writer lock.
+
+    Args:
+        log_file: The log, opened "r+b".
+        start (int): Offset of a known record boundary.
+
+    Returns:
+        int: The size of the log afterwards.
+    """
+    size = os.fstat(log_file.fileno()).st_size
+    offset, previous = start, None
+    if size > start:
+        with mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ) as log_map:
+            while offset + RECORD_HEADER.size <= size:
+                length = RECORD_HEADER.unpack_from(log_map, offset)[0]
+                if offset + RECORD_HEADER.size + length > size:
+                    break
+                previous, offset = offset, offset + RECORD_HEADER.size + length
+    if offset < size and (previous is None or is_record_end(log_file, previous, offset)):
+        log_file.truncate(offset)
+        log_file.flush()
+        os.fsync(log_file.fileno())
+        return offset
+    return size
+
+
+def read_order_log_range(log_path: str, start: int = LOG_HEADER.size, end: int = None):
+    """
+    Streams (order_id, order) pairs from one byte range of an order log.
+    """
+    for _, record in read_log_range(log_path, "orders", start, end):
+        yield record.pop("order_id"), record
@@ -0,0 +1,512 @@
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import struct
+import threading
+import zlib
+from datetime import datetime
+import Storage
+
+ACCOUNT = "account"
+ORDER = "order"
+BATCH_SIZE = 500
+CONNECT_TIMEOUT = 2.0
+# bytes acknowledged by the central store, last sequence number, last pulled central version
+OUTBOX_STATE = struct.Struct("<QIQ")
+
+_CENTRAL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS accounts (
+    username TEXT PRIMARY KEY, password TEXT NOT NULL, role TEXT NOT NULL,
+    kiosk TEXT NOT NULL, sequence INTEGER NOT NULL, created TEXT NOT NULL, version INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS orders (
+    order_id TEXT PRIMARY KEY, park TEXT NOT NULL, customer TEXT NOT NULL, ticket TEXT NOT NULL,
+    quantity INTEGER NOT NULL, total_price REAL NOT NULL, order_date TEXT NOT NULL, visit_date TEXT NOT NULL,
+    kiosk TEXT NOT NULL, sequence INTEGER NOT NULL, created TEXT NOT NULL, version INTEGER NOT NULL, origin_id TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS kiosks (kiosk TEXT PRIMARY KEY, sequence INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS conflicts (
+    kind TEXT NOT NULL, key TEXT NOT NULL, kiosk TEXT NOT NULL, sequence INTEGER NOT NULL, resolution TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS accounts_version ON accounts (version);
+CREATE INDEX IF NOT EXISTS orders_version ON orders (version);
+"""
+_ORDER_FIELDS = ("customer", "ticket", "quantity", "total_price", "order_date", "visit_date")
+
+
+def load_sync_config(config_path: str = "sync.json") -> dict:
+    """
+    Reads the kiosk's sync settings from a JSON config file.
+
+    The file names the central store and, optionally, the kiosk, e.g.
+    {"central": "//server/share/central.db", "kiosk": "gate-2"}. Without a
+    config file the application runs stand-alone and nothing is queued.
+
+    Returns:
+        dict: The settings, or None if sync is not configured.
+    """
+    if not os.path.exists(config_path):
+        return None
+    with open(config_path, encoding="utf-8") as f:
+        config = json.load(f)
+    config.setdefault("kiosk", socket.gethostname())
+    config.setdefault("interval_ms", 10000)
+    return config
+
+
+def encode_batch(entries: list) -> bytes:
+    """
+    Compresses a batch of outbox entries for shipping to the central store.
+    """
+    return zlib.compress(json.dumps(entries, separators=(",", ":")).encode("utf-8"))
+
+
+def decode_batch(batch: bytes) -> list:
+    return json.loads(zlib.decompress(batch).decode("utf-8"))
+
+
+class Outbox:
+    """
+    Durable, append-only queue of the writes a kiosk made locally.
+
+    Every account and order created on the kiosk is appended, fsynced, to a
+    checksummed log before the sale completes, so nothing is lost while the
+    central store is unreachable. The sync engine reads the entries past the
+    acknowledged offset, and once every entry is acknowledged the log is
+    emptied. Sequence numbers keep increasing across compactions, so the
+    central store can recognise entries it has already applied.
+    """
+
+    def __init__(self, outbox_path: str = "outbox.log", kiosk: str = None, state_path: str = None):
+        """
+        Opens (or creates) an outbox.
+
+        Args:
+            outbox_path (str): Path to the outbox log.
+            kiosk (str): Unique name of this kiosk; defaults to the host name.
+            state_path (str): Path to the sync state; defaults to the outbox path with ".ack".
+        """
+        self.__outbox_path = outbox_path
+        self.__state_path = state_path if state_path else os.path.splitext(outbox_path)[0] + ".ack"
+        self.__kiosk = kiosk if kiosk else socket.gethostname()
+        if not os.path.exists(outbox_path) or os.path.getsize(outbox_path) < Storage.LOG_HEADER.size:
+            with open(outbox_path, "wb") as f:
+                f.write(Storage.LOG_HEADER.pack(Storage.LOG_MAGIC, Storage.LOG_FORMAT_VERSION, Storage.SCHEMAS.get("outbox").get_store_id()))
+        try:
+            self.__acked, self.__sequence, self.__pulled = OUTBOX_STATE.unpack(Storage.atomic_read(self.__state_path, generations=1))
+        except Storage.SnapshotError:
+            self.__acked, self.__sequence, self.__pulled = Storage.LOG_HEADER.size, 0, 0
+        for _, entry in Storage.read_log_range(outbox_path, "outbox"):
+            self.__sequence = max(self.__sequence, entry["sequence"])
+        with open(outbox_path, "r+b") as f:
+            # Drop a torn entry left by an interrupted append
+            size = Storage.repair_torn_tail(f)
+        # A crash between compaction and saving the state can leave the offset past the end
+        self.__acked = min(self.__acked, size)
+        self.__size = size
+        self.__file = open(outbox_path, "ab")
+        # The sync engine may acknowledge entries on another thread while sales are appended
+        self.__lock = threading.Lock()
+
+    # Internal helpers
+    def __save_state(self):
+        Storage.atomic_write(self.__state_path, OUTBOX_STATE.pack(self.__acked, self.__sequence, self.__pulled), generations=1)
+
+    # Getters
+    def get_outbox_path(self) -> str:
+        return self.__outbox_path
+
+    def get_kiosk(self) -> str:
+        return self.__kiosk
+
+    def get_pulled_version(self) -> int:
+        return self.__pulled
+
+    def pending_count(self) -> int:
+        return sum(1 for _ in self.pending())
+
+    # Behavioral Methods
+    def append(self, kind: str, key: str, record: dict, park: str = "") -> int:
+        """
+        Queues one locally made write.
+
+        Args:
+            kind (str): ACCOUNT or ORDER.
+            key (str): Username or order ID.
+            record (dict): The account or order fields.
+            park (str): Park of an order.
+
+        Returns:
+            int: The entry's sequence number.
+        """
+        with self.__lock:
+            self.__sequence += 1
+            entry = {
+                "sequence": self.__sequence,
+                "kind": kind,
+                "key": key,
+                "park": park,
+                "created": datetime.now().isoformat(timespec="microseconds"),
+                "payload": json.dumps(record, separators=(",", ":")),
+            }
+            data = Storage.encode_log_record("outbox", entry)
+            self.__file.write(data)
+            self.__file.flush()
+            os.fsync(self.__file.fileno())
+            self.__size += len(data)
+            return self.__sequence
+
+    def pending(self, limit: int = None):
+        """
+        Yields (end offset, entry) pairs not yet acknowledged, oldest first.
+        """
+        for count, (end, entry) in enumerate(Storage.read_log_range(self.__outbox_path, "outbox", self.__acked)):
+            if limit is not None and count >= limit:
+                return
+            entry["kiosk"] = self.__kiosk
+            entry["record"] = json.loads(entry.pop("payload"))
+            yield end, entry
+
+    def acknowledge(self, end: int):
+        """
+        Marks every entry up to an end offset as applied centrally, emptying the log once all are.
+        """
+        with self.__lock:
+            self.__acked = max(self.__acked, end)
+            if self.__acked >= self.__size:
+                self.__acked = self.__size = Storage.LOG_HEADER.size
+                self.__save_state()
+                self.__file.truncate(self.__size)
+            else:
+                self.__save_state()
+
+    def set_pulled_version(self, version: int):
+        with self.__lock:
+            self.__pulled = version
+            self.__save_state()
+
+    def close(self):
+        self.__file.close()
+
+
+class CentralStore:
+    """
+    The shared store every kiosk syncs with, kept in a SQLite file.
+
+    Batches are applied in one transaction each. A kiosk's entries are
+    applied at most once, tracked by its last applied sequence number.
+    Every row carries a version number, so kiosks can pull just the rows
+    changed since their last sync.
+
+    Conflicts are resolved by ranking the two writes by (created, kiosk,
+    sequence), which does not depend on the order batches arrive in:
+    - Accounts: the lower-ranked account keeps the username and the other
+      one is rejected and logged in the conflicts table.
+    - Orders: both are kept. The lower-ranked order keeps the ID and the
+      other one is renamed to "<order_id>-<kiosk>".
+    """
+
+    def __init__(self, database_path: str, timeout: float = CONNECT_TIMEOUT):
+        """
+        Opens (or creates) the central store.
+
+        Raises:
+            sqlite3.Error: If the database cannot be opened.
+        """
+        self.__connection = sqlite3.connect(database_path, timeout=timeout, isolation_level=None)
+        self.__connection.executescript(_CENTRAL_SCHEMA)
+
+    # Internal helpers
+    @staticmethod
+    def __rank(row) -> tuple:
+        return row["created"], row["kiosk"], row["sequence"]
+
+    def __next_version(self) -> int:
+        cursor = self.__connection.execute("SELECT MAX(version) FROM (SELECT MAX(version) AS version FROM accounts UNION ALL SELECT MAX(version) FROM orders)")
+        return (cursor.fetchone()[0] or 0) + 1
+
+    def __conflict(self, kind: str, key: str, entry: dict, resolution: str):
+        self.__connection.execute("INSERT INTO conflicts VALUES (?, ?, ?, ?, ?)", (kind, key, entry["kiosk"], entry["sequence"], resolution))
+
+    def __account_row(self, username: str):
+        row = self.__connection.execute("SELECT password, role, kiosk, sequence, created FROM accounts WHERE username = ?", (username,)).fetchone()
+        return None if row is None else dict(zip(("password", "role", "kiosk", "sequence", "created"), row))
+
+    def __apply_account(self, entry: dict, version: int, result: dict):
+        username = entry["key"]
+        record = entry["record"]
+        existing = self.__account_row(username)
+        if existing is not None:
+            if (existing["kiosk"], existing["sequence"]) == (entry["kiosk"], entry["sequence"]):
+                return
+            same = (existing["password"], existing["role"]) == (record["password"], record["role"])
+            if self.__rank(existing) <= self.__rank(entry):
+                if not same:
+                    self.__conflict(ACCOUNT, username, entry, "rejected")
+                    result["rejected"].append(username)
+                return
+            if not same:
+                self.__conflict(ACCOUNT, username, existing, "replaced")
+        self.__connection.execute(
+            "INSERT OR REPLACE INTO accounts VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (username, record["password"], record["role"], entry["kiosk"], entry["sequence"], entry["created"], version),
+        )
+
+    def __order_row(self, order_id: str):
+        row = self.__connection.execute(
+            "SELECT park, " + ", ".join(_ORDER_FIELDS) + ", kiosk, sequence, created, origin_id FROM orders WHERE order_id = ?", (order_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        fields = ("park",) + _ORDER_FIELDS + ("kiosk", "sequence", "created", "origin_id")
+        values = dict(zip(fields, row))
+        return {"key": values.pop("origin_id"), "park": values.pop("park"), "kiosk": values.pop("kiosk"), "sequence": values.pop("sequence"), "created": values.pop("created"), "record": values}
+
+    def __insert_order(self, order_id: str, entry: dict, version: int):
+        record = entry["record"]
+        self.__connection.execute(
+            "INSERT OR REPLACE INTO orders VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (order_id, entry["park"], *(record[field] for field in _ORDER_FIELDS),
+             entry["kiosk"], entry["sequence"], entry["created"], version, entry["key"]),
+        )
+
+    def __apply_order(self, order_id: str, entry: dict, version: int, result: dict):
+        existing = self.__order_row(order_id)
+        if existing is None:
+            self.__insert_order(order_id, entry, version)
+            return
+        if (existing["kiosk"], existing["sequence"]) == (entry["kiosk"], entry["sequence"]):
+            return
+        if self.__rank(existing) <= self.__rank(entry):
+            loser = entry
+        else:
+            loser = existing
+            self.__insert_order(order_id, entry, version)
+        renamed = f"{order_id}-{loser['kiosk']}"
+        self.__conflict(ORDER, order_id, loser, f"renamed to {renamed}")
+        result["renamed"][(loser["kiosk"], loser["key"])] = renamed
+        # The renamed order can collide in turn, so it goes through the same rules
+        self.__apply_order(renamed, loser, version, result)
+
+    # Behavioral Methods
+    def apply_batch(self, kiosk: str, batch: bytes) -> dict:
+        """
+        Applies a compressed batch of one kiosk's outbox entries.
+
+        Args:
+            kiosk (str): The kiosk that sent the batch.
+            batch (bytes): Entries encoded with encode_batch().
+
+        Returns:
+            dict: "applied" (number of entries not seen before), "rejected" (usernames whose
+                account lost a conflict) and "renamed" ({(kiosk, order_id): new_id}).
+        """
+        result = {"applied": 0, "rejected": [], "renamed": {}}
+        self.__connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.__connection.execute("SELECT sequence FROM kiosks WHERE kiosk = ?", (kiosk,)).fetchone()
+            last_sequence = row[0] if row else 0
+            version = self.__next_version()
+            for entry in decode_batch(batch):
+                if entry["sequence"] <= last_sequence:
+                    continue
+                entry["kiosk"] = kiosk
+                result["applied"] += 1
+                if entry["kind"] == ACCOUNT:
+                    self.__apply_account(entry, version, result)
+                else:
+                    self.__apply_order(entry["key"], entry, version, result)
+                last_sequence = entry["sequence"]
+            self.__connection.execute("INSERT OR REPLACE INTO kiosks VALUES (?, ?)", (kiosk, last_sequence))
+            self.__connection.execute("COMMIT")
+        except BaseException:
+            self.__connection.execute("ROLLBACK")
+            raise
+        return result
+
+    def changes_since(self, version: int) -> tuple:
+        """
+        Returns the accounts and orders changed after a central version.
+
+        Both tables are read in one transaction, so a batch committed between
+        the two reads cannot leave its orders behind a newest version that
+        already covers them.
+
+        Returns:
+            tuple: (newest version, list of (kind, key, record) tuples).
+        """
+        changes = []
+        newest = version
+        self.__connection.execute("BEGIN")
+        try:
+            for username, password, role, row_version in self.__connection.execute(
+                    "SELECT username, password, role, version FROM accounts WHERE version > ? ORDER BY version", (version,)):
+                changes.append((ACCOUNT, username, {"password": password, "role": role}))
+                newest = max(newest, row_version)
+            for row in self.__connection.execute(
+                    "SELECT order_id, park, " + ", ".join(_ORDER_FIELDS) + ", kiosk, origin_id, version FROM orders WHERE version > ? ORDER BY version", (version,)):
+                changes.append((ORDER, row[0], dict(zip(("park",) + _ORDER_FIELDS + ("kiosk", "origin_id"), row[1:-1]))))
+                newest = max(newest, row[-1])
+            self.__connection.execute("COMMIT")
+        except BaseException:
+            self.__connection.execute("ROLLBACK")
+            raise
+        return newest, changes
+
+    def get_account(self, username: str) -> dict:
+        return self.__account_row(username)
+
+    def get_order(self, order_id: str) -> dict:
+        row = self.__order_row(order_id)
+        return None if row is None else dict(row["record"], park=row["park"], kiosk=row["kiosk"])
+
+    def get_conflicts(self) -> list:
+        return self.__connection.execute("SELECT kind, key, kiosk, sequence, resolution FROM conflicts ORDER BY rowid").fetchall()
+
+    def close(self):
+        self.__connection.close()
+
+
+class SyncEngine:
+    """
+    Ships a kiosk's outbox to the central store and pulls back what changed.
+
+    Each sync pushes the pending entries in compressed batches of up to
+    BATCH_SIZE, acknowledging every batch the central store commits, and
+    then pulls only the accounts changed since the last pull. If the central
+    store cannot be reached the kiosk stays offline and keeps selling; its
+    writes wait in the outbox for the next attempt.
+
+    Orders of this kiosk that the central store renamed in a conflict are
+    saved next to the outbox, and stay pending until the kiosk confirms it
+    has renamed them in its own order log, so a restart loses none.
+    """
+
+    def __init__(self, outbox: Outbox, central_path: str, on_account=None, batch_size: int = BATCH_SIZE, renames_path: str = None):
+        """
+        Initializes a new SyncEngine.
+
+        Args:
+            outbox (Outbox): The kiosk's outbox.
+            central_path (str): Path to the central SQLite store.
+            on_account (callable): Called with (username, record) for every
+                account pulled from the central store.
+            batch_size (int): Maximum number of entries per batch.
+            renames_path (str): Path to the saved renames; defaults to the outbox path with ".renames".
+        """
+        self.__outbox = outbox
+        self.__central_path = central_path
+        self.__on_account = on_account
+        self.__batch_size = batch_size
+        self.__online = False
+        self.__renames_path = renames_path if renames_path else os.path.splitext(outbox.get_outbox_path())[0] + ".renames"
+        try:
+            state = json.loads(Storage.atomic_read(self.__renames_path, generations=1).decode("utf-8"))
+        except Storage.SnapshotError:
+            state = {"renamed": {}, "pending": []}
+        self.__renamed = state["renamed"]
+        self.__pending = set(state["pending"])
+        self.__lock = threading.Lock()
+
+    # Internal helpers
+    def __save_renames(self):
+        state = {"renamed": self.__renamed, "pending": sorted(self.__pending)}
+        Storage.atomic_write(self.__renames_path, json.dumps(state, separators=(",", ":")).encode("utf-8"), generations=1)
+
+    def __rename(self, renames: dict):
+        with self.__lock:
+            renames = {order_id: renamed for order_id, renamed in renames.items() if self.__renamed.get(order_id) != renamed}
+            if not renames:
+                return
+            self.__renamed.update(renames)
+            self.__pending.update(renames)
+            self.__save_renames()
+
+    # Getters
+    def is_online(self) -> bool:
+        return self.__online
+
+    def get_renamed(self) -> dict:
+        """
+        Returns {local order ID: central order ID} for this kiosk's orders renamed in conflicts.
+        """
+        with self.__lock:
+            return dict(self.__renamed)
+
+    def get_pending_renames(self) -> dict:
+        """
+        Returns the renames not yet confirmed as applied to the kiosk's order log.
+        """
+        with self.__lock:
+            return {order_id: self.__renamed[order_id] for order_id in self.__pending}
+
+    # Behavioral Methods
+    def confirm_renames(self, order_ids):
+        """
+        Marks renames as applied to the kiosk's order log.
+
+        Args:
+            order_ids (iterable[str]): Local order IDs that were renamed.
+        """
+        with self.__lock:
+            self.__pending.difference_update(order_ids)
+            self.__save_renames()
+
+    def sync(self) -> dict:
+        """
+        Runs one push and pull round.
+
+        It may run on a worker thread; on_account is then called on that thread.
+
+        Returns:
+            dict: "pushed", "pulled" and "rejected" counts and the orders
+                "renamed" in this round, or None if the central store is unreachable.
+        """
+        try:
+            central = CentralStore(self.__central_path)
+        except sqlite3.Error:
+            self.__online = False
+            return None
+        try:
+            summary = {"pushed": 0, "pulled": 0, "rejected": [], "renamed": {}}
+            while True:
+                batch = list(self.__outbox.pending(self.__batch_size))
+                if not batch:
+                    break
+                result = central.apply_batch(self.__outbox.get_kiosk(), encode_batch([entry for _, entry in batch]))
+                self.__outbox.acknowledge(batch[-1][0])
+                summary["pushed"] += len(batch)
+                summary["rejected"].extend(result["rejected"])
+                renames = {order_id: renamed for (kiosk, order_id), renamed in result["renamed"].items() if kiosk == self.__outbox.get_kiosk()}
+                self.__rename(renames)
+                summary["renamed"].update(renames)
+            version, changes = central.changes_since(self.__outbox.get_pulled_version())
+            for kind, key, record in changes:
+                if kind == ACCOUNT and self.__on_account is not None:
+                    self.__on_account(key, record)
+                    summary["pulled"] += 1
+                elif kind == ORDER and record["kiosk"] == self.__outbox.get_kiosk() and record["origin_id"] != key:
+                    # Another kiosk's earlier order took the ID after ours was pushed
+                    summary["renamed"][record["origin_id"]] = key
+                    self.__rename({record["origin_id"]: key})
+            self.__outbox.set_pulled_version(version)
+            self.__online = True
+            return summary
+        except sqlite3.Error:
+            self.__online = False
+            return None
+        finally:
+            central.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Push a kiosk's outbox to the central store.")
+    parser.add_argument("--outbox", default="outbox.log")
+    parser.add_argument("--config", default="sync.json")
+    args = parser.parse_args()
+    config = load_sync_config(args.config)
+    if config is None:
+        parser.error(f"{args.config} not found; sync is not configured.")
+    outbox = Outbox(args.outbox, config["kiosk"])
+    summary = SyncEngine(outbox, config["central"]).sync()
+    outbox.close()
+    print("Central store unreachable; writes stay queued." if summary is None else f"Pushed {summary['pushed']} entries, {len(summary['rejected'])} accounts rejected.")
@@ -43,6 +43,11 @@ customer1.redeem_loyalty_points(50)
 print("Loyalty Points after redemption:", customer1.get_loyalty_points())
 print("Purchase History:", customer1.display_order_history())
 
+try:
+    customer1.redeem_loyalty_points(1000)
+except ValueError as error:
+    print("Over-redemption rejected:", error)
+
 # Admin Class Test
 print("--- Admin Class Test ---")
 admin1 = Admin(
@@ -129,6 +134,593 @@ print("Amount Paid:", order1.get_amount_paid())
 # Accessing order summary
 print("Order Summary:\n", order1.get_order_summary())
 
+# Order Cache Test
+print("--- Order Cache Test ---")
+print("Cached summary reused:", order1.get_order_summary() is order1.get_order_summary())
+ticket1.set_price(100.0)  # Changing a contained ticket invalidates the cached total
+print("Total after ticket price change:", order1.calculate_total_price())
+order1.add_ticket(Ticket("Regular", "Park entry", 50.0, "1 day", 0.0, "None", "2024-12-01"))
+print("Total after adding a ticket:", order1.calculate_total_price())
+print("Summary shows new total:", "Total Price: $150.00" in order1.get_order_summary())
+replaced_ticket = order1.get_ticket_list()[1]
+order1.get_ticket_list()[1] = Ticket("Regular", "Park entry", 80.0, "1 day", 0.0, "None", "2024-12-01")  # Replaced in place, same length
+print("Total after replacing a ticket in place:", order1.calculate_total_price())
+replaced_ticket.set_price(1.0)  # The replaced ticket no longer affects the order
+print("Cached total kept after the old ticket changes:", order1.calculate_total_price())
+
+# Rendering Test
+print("--- Rendering Test ---")
+import Rendering
+
+print("Ticket fragment reused:", ticket1.describe_ticket() is ticket1.describe_ticket())
+batch = Rendering.render_orders([order1, order1])
+print("Batch render matches summaries:", batch == order1.get_order_summary() + "\n" + Rendering.SEPARATOR + order1.get_order_summary())
+print("Receipt:\n" + Rendering.render_receipts([("ORDER-1", {"customer": "customer1", "ticket": "Group Pass", "quantity": 1, "total_price": 200.0, "order_date": "2024-12-05"})]))
+
+# Storage Snapshot Test
+print("--- Storage Snapshot Test ---")
+import os
+import tempfile
+import Storage
+
+snapshot_dir = tempfile.mkdtemp()
+orders_path = os.path.join(snapshot_dir, "orders.snap")
+orders = {"ORDER-1": {"customer": "customer1", "ticket": "Multi-Day Pass", "quantity": 2, "total_price": 240.0, "order_date": "2024-12-05"}}
+Storage.write_snapshot(orders_path, "orders", orders)
+print("Orders round trip:", Storage.read_snapshot(orders_path) == orders)
+with Storage.SnapshotReader(orders_path) as reader:
+    # Reading one field straight from the memory-mapped record
+    print("First order total:", reader.get_field(0, "total_price"))
+sales = {"2024-12-05": {"Multi-Day Pass": 2, "Group Pass": 1}}
+Storage.write_snapshot(os.path.join(snapshot_dir, "sales.snap"), "sales", sales)
+print("Sales round trip:", Storage.read_snapshot(os.path.join(snapshot_dir, "sales.snap")) == sales)
+
+# Crash Recovery Test
+print("--- Crash Recovery Test ---")
+sales_path = os.path.join(snapshot_dir, "sales.snap")
+Storage.write_snapshot(sales_path, "sales", {"2024-12-06": {"Group Pass": 3}})
+with open(sales_path, "r+b") as f:
+    f.write(b"garbage")  # Simulate a torn write of the newest generation
+print("Recovered previous generation:", Storage.read_snapshot(sales_path) == sales)
+
+# Order Log Test
+print("--- Order Log Test ---")
+order_log = Storage.OrderLog(os.path.join(snapshot_dir, "orders.log"))
+order_log["ORDER-1"] = orders["ORDER-1"]
+order_log["ORDER-2"] = {"customer": "customer2", "ticket": "Group Pass", "quantity": 1, "total_price": 200.0, "order_date": "2024-12-06"}
+order_log.flush_index()
+order_log["ORDER-3"] = {"customer": "customer1", "ticket": "Single-Day Pass", "quantity": 3, "total_price": 150.0, "order_date": "2024-12-07"}
+print("Orders logged:", len(order_log))
+print("Lookup ORDER-2:", order_log["ORDER-2"])
+print("customer1 orders:", [order_id for order_id, _ in order_log.customer_orders("customer1")])
+print("Rebuilt order total:", order_log.load_order("ORDER-3", customer1).get_total_price())
+order_log.close()
+
+# A migration that crashed part way leaves only its temporary log, so the next start migrates again
+migrated_log_path = os.path.join(snapshot_dir, "migrated_orders.log")
+with open(migrated_log_path + ".migrating", "wb") as f:
+    f.write(b"TKOL")
+with Storage.open_order_log(migrated_log_path, orders_path) as migrated_log:
+    print("Orders migrated after a crash:", list(migrated_log.keys()))
+with Storage.open_order_log(migrated_log_path, orders_path) as migrated_log:
+    print("Not migrated twice:", len(migrated_log), "temporary log left:", os.path.exists(migrated_log_path + ".migrating"))
+
+# Two kiosk processes share one log; an index merged by one must not drop the other's orders
+shared_log_path = os.path.join(snapshot_dir, "shared_orders.log")
+kiosk_log_a, kiosk_log_b = Storage.OrderLog(shared_log_path), Storage.OrderLog(shared_log_path)
+kiosk_log_b.append("B-1", {"customer": "y", "ticket": "Group Pass", "quantity": 1, "total_price": 200.0, "order_date": "2024-12-06"})
+kiosk_log_a.append("A-1", {"customer": "x", "ticket": "Group Pass", "quantity": 1, "total_price": 200.0, "order_date": "2024-12-06"})
+print("Other process's order seen:", "B-1" in kiosk_log_a, [order_id for order_id, _ in kiosk_log_a.customer_orders("y")])
+kiosk_log_a.close()
+kiosk_log_b.close()
+with Storage.OrderLog(shared_log_path) as reopened_log:
+    print("Both orders indexed after the merge:", "B-1" in reopened_log, "A-1" in reopened_log, len(reopened_log))
+
+# A corrupt record mid-log is skipped, not truncated away with everything after it
+damaged_path = os.path.join(snapshot_dir, "damaged_orders.log")
+with Storage.OrderLog(damaged_path) as damaged_log:
+    for order_id in ("ORDER-1", "ORDER-2", "ORDER-3"):
+        damaged_log[order_id] = orders["ORDER-1"]
+second_record = Storage.LOG_HEADER.size + len(Storage.encode_log_record("orders", dict(orders["ORDER-1"], order_id="ORDER-1")))
+with open(damaged_path, "r+b") as f:
+    f.seek(second_record + Storage.RECORD_HEADER.size + 1)
+    damaged = f.read(1)
+    f.seek(-1, os.SEEK_CUR)
+    f.write(bytes([damaged[0] ^ 0xFF]))
+    f.seek(0, os.SEEK_END)
+    f.write(Storage.encode_log_record("orders", dict(orders["ORDER-1"], order_id="ORDER-4"))[:-5])
+os.remove(os.path.splitext(damaged_path)[0] + ".idx")
+with Storage.OrderLog(damaged_path) as damaged_log:
+    print("Orders kept:", list(damaged_log.keys()), "corrupt records at:", [offset == second_record for offset in damaged_log.get_corrupt_offsets()])
+    print("Torn tail dropped:", os.path.getsize(damaged_path) == second_record * 3 - Storage.LOG_HEADER.size * 2)
+
+# Report Test
+print("--- Report Test ---")
+import Reports
+
+prices = {"Single-Day Pass": 50.0, "Multi-Day Pass": 120.0, "Group Pass": 200.0}
+reference_report = Reports.build_report(Storage.read_order_log_range(order_log.get_log_path()), prices)
+print(reference_report.generate_report())
+if __name__ == "__main__":
+    # Worker processes re-import this script on platforms that spawn them
+    parallel_report = Reports.build_report_parallel(order_log.get_log_path(), prices, workers=2)
+    print("Parallel report matches reference:", parallel_report == reference_report)
+
+# Export Test
+print("--- Export Test ---")
+import Export
+
+csv_path = os.path.join(snapshot_dir, "orders.csv")
+print("Rows exported to CSV:", Export.export_store("orders", order_log.get_log_path(), csv_path, date_from="2024-12-06"))
+columnar_path = os.path.join(snapshot_dir, "orders.col")
+Export.export_store("orders", order_log.get_log_path(), columnar_path, "columnar")
+print("Columnar ticket column:", [row[0] for row in Export.read_columnar(columnar_path, ["ticket"])])
+
+# Bulk Import Test
+print("--- Bulk Import Test ---")
+import BulkImport
+
+importer = BulkImport.BulkImporter(
+    os.path.join(snapshot_dir, "imported_orders.log"),
+    os.path.join(snapshot_dir, "imported_sales.snap"),
+    os.path.join(snapshot_dir, "imported_accounts.snap"),
+    progress=BulkImport.ProgressReporter(output=lambda line: None),
+)
+importer.import_orders(enumerate([
+    {"order_id": "POS-1", "customer": "customer1", "ticket": "Group Pass", "quantity": 1, "total_price": 200.0, "order_date": "2023-07-01"},
+    {"order_id": "POS-1", "customer": "customer2", "ticket": "Group Pass", "quantity": 1, "total_price": 200.0, "order_date": "2023-07-01"},
+    {"order_id": "POS-2", "customer": "customer2", "ticket": "Single-Day Pass", "quantity": "two", "total_price": 100.0, "order_date": "2023-07-02"},
+], start=1))
+importer.import_accounts(enumerate([{"username": "legacy1", "password": "pw", "role": "Customer"}], start=1))
+importer.finish()
+print("Records imported:", importer.get_imported())
+print("Rejected lines:", [line_number for _, line_number, _ in importer.get_rejected()])
+print("Imported sales rollup:", Storage.read_snapshot(os.path.join(snapshot_dir, "imported_sales.snap")))
+
+# Malformed lines are rejected with their line numbers instead of aborting the import
+jsonl_path = os.path.join(snapshot_dir, "orders.jsonl")
+with open(jsonl_path, "w", encoding="utf-8") as f:
+    f.write('{"order_id": "POS-3", "customer": "customer1", "ticket": "Group Pass", "quantity": 1, "total_price": 200.0, "order_date": "2023-07-03"}\n')
+    f.write('{"order_id": "POS-4", "customer": \n')
+    f.write('["not", "an", "object"]\n')
+    f.write('{"order_id": "POS-5", "customer": "customer1", "ticket": "Group Pass", "quantity": 1, "total_price": 200.0, "order_date": 20230703}\n')
+# A crashed import leaves its batches in the log but the rollup unwritten
+crashed = BulkImport.BulkImporter(os.path.join(snapshot_dir, "imported_orders.log"), os.path.join(snapshot_dir, "imported_sales.snap"),
+                                  os.path.join(snapshot_dir, "imported_accounts.snap"), batch_size=1, progress=BulkImport.ProgressReporter(output=lambda line: None))
+crashed.import_orders(BulkImport.read_records(jsonl_path), jsonl_path)
+rerun = BulkImport.BulkImporter(os.path.join(snapshot_dir, "imported_orders.log"), os.path.join(snapshot_dir, "imported_sales.snap"),
+                                os.path.join(snapshot_dir, "imported_accounts.snap"), progress=BulkImport.ProgressReporter(output=lambda line: None))
+rerun.import_orders(BulkImport.read_records(jsonl_path), jsonl_path)
+rerun.finish()
+print("Rejected on re-run:", [(line_number, reason.split(":")[0]) for _, line_number, reason in rerun.get_rejected()])
+print("Rollup repaired after the crash:", Storage.read_snapshot(os.path.join(snapshot_dir, "imported_sales.snap")).get("2023-07-03"))
+# Orders archived since the first import are still duplicates
+import Archive
+
+reimport_dir = os.path.join(snapshot_dir, "reimport")
+os.makedirs(reimport_dir)
+for attempt in range(2):
+    reimporter = BulkImport.BulkImporter(os.path.join(reimport_dir, "orders.log"), os.path.join(reimport_dir, "sales.snap"),
+                                         os.path.join(reimport_dir, "accounts.snap"), progress=BulkImport.ProgressReporter(output=lambda line: None))
+    reimporter.import_orders(BulkImport.read_records(jsonl_path), jsonl_path)
+    reimporter.finish()
+    if attempt == 0:
+        Archive.archive_orders(os.path.join(reimport_dir, "orders.log"), os.path.join(reimport_dir, "archive"), "2024-01-01")
+print("Archived order rejected on re-import:", reimporter.get_rejected()[0][2], "rollup:", Storage.read_snapshot(os.path.join(reimport_dir, "sales.snap")))
+
+# Loyalty Ledger Test
+print("--- Loyalty Ledger Test ---")
+import Loyalty
+
+ledger_path = os.path.join(snapshot_dir, "loyalty.log")
+with Loyalty.LoyaltyLedger(ledger_path) as ledger:
+    print("Points earned on $240.00:", ledger.accrue("customer1", 240.0, "ORDER-1"))
+    ledger.accrue("customer2", 99.99, "ORDER-2")
+    ledger.redeem("customer1", 40)
+    try:
+        ledger.redeem("customer2", 500)
+    except ValueError as error:
+        print("Over-redemption rejected:", error)
+    print("Customers promoted:", ledger.apply_promotion(multiplier=1.5, bonus=10))
+with Loyalty.LoyaltyLedger(ledger_path) as ledger:
+    print("Balances after reopening:", ledger.get_balance("customer1"), ledger.get_balance("customer2"))
+    print("customer1 entries:", [entry["kind"] for entry in ledger.history("customer1")])
+
+# The nightly job appends while the GUI keeps its ledger open
+gui_ledger = Loyalty.LoyaltyLedger(ledger_path)
+with Loyalty.LoyaltyLedger(ledger_path) as nightly_job:
+    nightly_job.apply_promotion(bonus=5, reference="nightly")
+gui_ledger.accrue("customer2", 20.0, "ORDER-3")
+print("Balances seen by the GUI:", gui_ledger.get_balance("customer1"), gui_ledger.get_balance("customer2"))
+gui_ledger.close()
+with Loyalty.LoyaltyLedger(ledger_path) as ledger:
+    print("Balances after reopening:", ledger.get_balance("customer1"), ledger.get_balance("customer2"))
+
+# A corrupt entry mid-ledger is skipped, and only a torn entry at the end is dropped
+with open(ledger_path, "r+b") as f:
+    f.seek(Storage.LOG_HEADER.size + Storage.RECORD_HEADER.size + 1)
+    damaged = f.read(1)
+    f.seek(-1, os.SEEK_CUR)
+    f.write(bytes([damaged[0] ^ 0xFF]))
+    f.seek(0, os.SEEK_END)
+    f.write(Storage.encode_log_record("loyalty", {"customer": "customer2", "kind": "accrual", "points": 1.0, "reference": "", "entry_date": "2024-12-08"})[:-3])
+os.remove(os.path.splitext(ledger_path)[0] + ".bal")
+with Loyalty.LoyaltyLedger(ledger_path) as ledger:
+    print("After damage:", ledger.get_balance("customer1"), ledger.get_balance("customer2"), "customer2 entries:", len(list(ledger.history("customer2"))))
+
+
+
+# Reservation Calendar Test
+print("--- Reservation Calendar Test ---")
+import Reservations
+from datetime import date
+
+calendar = Reservations.ReservationCalendar(os.path.join(snapshot_dir, "reservations.bin"), {"Single-Day Pass": 3, "Multi-Day Pass": 2}, today=date(2024, 12, 1))
+print("Left after reserving 3:", calendar.reserve("Single-Day Pass", "2024-12-24", 3))
+try:
+    calendar.reserve("Single-Day Pass", "2024-12-24", 1)
+except Reservations.SoldOutError as error:
+    print("Sold out:", error)
+calendar.reserve("Multi-Day Pass", "2024-12-01", 2, span=Reservations.validity_days("3 Days"))
+print("Sold out dates:", calendar.sold_out_dates("Single-Day Pass"), calendar.sold_out_dates("Multi-Day Pass"))
+print("Days in one availability call:", len(calendar.availability("Single-Day Pass")))
+# Two kiosk processes share the calendar file; each checks capacity against the other's reservations
+kiosk_calendars = [Reservations.ReservationCalendar(os.path.join(snapshot_dir, "shared_reservations.bin"), {"Single-Day Pass": 3}, today=date(2024, 12, 1)) for _ in range(2)]
+kiosk_calendars[0].reserve("Single-Day Pass", "2024-12-24", 2)
+try:
+    kiosk_calendars[1].reserve("Single-Day Pass", "2024-12-24", 2)
+except Reservations.SoldOutError as error:
+    print("Overbooking across processes prevented:", error)
+kiosk_calendars[1].reserve("Single-Day Pass", "2024-12-24", 1)
+kiosk_calendars[0].refresh()
+print("First kiosk sees the second's sale:", kiosk_calendars[0].get_remaining("Single-Day Pass", "2024-12-24"))
+# A kiosk left running past midnight moves its window to the new day
+kiosk_clock = [date(2024, 12, 1)]
+night_calendar = Reservations.ReservationCalendar(os.path.join(snapshot_dir, "night_reservations.bin"), {"Single-Day Pass": 3}, days=3, clock=lambda: kiosk_clock[0])
+night_calendar.reserve("Single-Day Pass", "2024-12-02", 2)
+kiosk_clock[0] = date(2024, 12, 2)
+night_calendar.refresh()
+print("Window after midnight:", night_calendar.get_start_date(), "sale carried over:", night_calendar.get_remaining("Single-Day Pass", "2024-12-02"))
+try:
+    night_calendar.reserve("Single-Day Pass", "2024-12-01", 1)
+except ValueError as error:
+    print("Yesterday no longer bookable:", error)
+print("New last day bookable:", night_calendar.reserve("Single-Day Pass", "2024-12-04", 1))
+
+# Occupancy Test
+print("--- Occupancy Test ---")
+import threading
+import Occupancy
+
+occupancy = Occupancy.OccupancyCounter(bucket_seconds=60)
+park1.attach_occupancy(occupancy)
+base_time = 1733050800.0
+
+
+def gate_worker(worker):
+    for number in range(1000):
+        occupancy.enter(timestamp=base_time + number % 120)
+        occupancy.enter(ride1.get_name())
+    for number in range(400):
+        occupancy.exit(ride1.get_name())
+        occupancy.exit(timestamp=base_time + 120 + number % 60)
+
+
+workers = [threading.Thread(target=gate_worker, args=(worker,)) for worker in range(8)]
+for worker in workers:
+    worker.start()
+for worker in workers:
+    worker.join()
+print("Current visitors (500 + 8 * 600):", park1.get_current_visitors())
+print("Ride occupancy:", park1.get_ride_occupancy())
+print("History:", [(bucket["entries"], bucket["exits"], bucket["visitors"]) for bucket in occupancy.history(3, now=base_time + 179)])
+feed_path = os.path.join(snapshot_dir, "gate_events.csv")
+with open(feed_path, "w") as f:
+    f.write(f"{base_time},entry\n{base_time},entry,{ride1.get_name()}\n{base_time},exit")
+print("Feed events read:", Occupancy.GateFeed(feed_path, occupancy).poll(), park1.get_current_visitors())
+
+# Search Index Test
+print("--- Search Index Test ---")
+import Search
+
+search_index = Search.build_index({"jdoe": {"password": "pw", "role": "Customer"}}, [
+    ("ORDER-1", {"customer": "jdoe", "ticket": "Group Pass", "quantity": 2, "total_price": 400.0, "order_date": "2024-12-01"}),
+    ("ORDER-2", {"customer": "asmith", "ticket": "Single-Day Pass", "quantity": 1, "total_price": 50.0, "order_date": "2024-12-02"}),
+])
+Search.index_customer(search_index, customer1)
+print("Prefix 'jd':", search_index.search("jd"))
+print("Customer e-mail prefix:", search_index.search("customer1@ex", kind=Search.CUSTOMER))
+print("Phone digits:", search_index.search("".join(digit for digit in customer1.get_phone_number() if digit.isdigit())[:6]))
+print("Ticket and date:", search_index.search("pass 2024-12-0"))
+search_index.remove(Search.ORDER, "ORDER-2")
+print("After removing ORDER-2:", search_index.search("single"))
+
+# Park Sharding Test
+print("--- Park Sharding Test ---")
+import Parks
+from datetime import timedelta
+
+visit_day = (date.today() + timedelta(days=10)).isoformat()
+park_router = Parks.ParkRouter({"Wonderland": os.path.join(snapshot_dir, "wonderland"), "Seaside": os.path.join(snapshot_dir, "seaside")}, {"Single-Day Pass": 5, "Group Pass": 1})
+park_router.add_park("Wonderland", park1)
+for park_id, ticket, quantity in (("Wonderland", "Single-Day Pass", 2), ("Seaside", "Single-Day Pass", 4), ("Seaside", "Group Pass", 1)):
+    print("Order placed:", park_router.place_order(park_id, {"customer": "jdoe", "ticket": ticket, "quantity": quantity, "total_price": quantity * prices[ticket], "order_date": "2024-12-01", "visit_date": visit_day}))
+try:
+    park_router.place_order("Seaside", {"customer": "jdoe", "ticket": "Group Pass", "quantity": 1, "total_price": 200.0, "order_date": "2024-12-01", "visit_date": visit_day})
+except Reservations.SoldOutError as error:
+    print("Seaside sold out:", error)
+print("Wonderland Single-Day Passes left:", park_router.get_remaining("Wonderland", "Single-Day Pass", visit_day))
+print("Wonderland ride capacity:", park_router.ride_capacity("Wonderland"))
+print("Orders for jdoe across parks:", [order_id for order_id, _ in park_router.customer_orders("jdoe")])
+if __name__ == "__main__":
+    park_reports = park_router.build_reports(prices, workers=2)
+    print("Orders per park:", {park_id: report.get_order_count() for park_id, report in park_reports.items()})
+    print("Merged revenue:", park_router.build_report(prices, workers=2).get_total_revenue())
+# An imported order already holds the next number, so the counter skips it
+park_router.shard("Wonderland").record_order("ORDER-WONDERLAND-2", {"customer": "asmith", "ticket": "Single-Day Pass", "quantity": 1, "total_price": 50.0, "order_date": "2024-12-01", "visit_date": visit_day})
+print("Next Wonderland order:", park_router.place_order("Wonderland", {"customer": "jdoe", "ticket": "Single-Day Pass", "quantity": 1, "total_price": 50.0, "order_date": "2024-12-01", "visit_date": visit_day}))
+try:
+    park_router.place_order("Wonderland", {"customer": "jdoe", "ticket": "Single-Day Pass", "quantity": 1, "total_price": "free", "order_date": "2024-12-01", "visit_date": visit_day})
+except Exception as error:
+    print("Unrecorded order released its tickets:", type(error).__name__, park_router.get_remaining("Wonderland", "Single-Day Pass", visit_day))
+park_router.close()
+with open(os.path.join(snapshot_dir, "seaside", Parks.PARK_FILE), "w", encoding="utf-8") as f:
+    f.write('{"location": "Santa Cruz, CA", "operating_hours": "Mon-Sun 10am-8pm", "rides": [{"name": "Wave Rider", "ride_type": "Water", "capacity": 24}]}')
+park_router = Parks.ParkRouter({"Wonderland": os.path.join(snapshot_dir, "wonderland"), "Seaside": os.path.join(snapshot_dir, "seaside")}, {"Single-Day Pass": 5, "Group Pass": 1})
+park_router.load_parks()
+print("Seaside loaded:", park_router.get_park("Seaside").get_location(), park_router.ride_capacity("Seaside"),
+      park_router.get_schedule("Seaside").get_operating_hours().get_text(), "Wonderland without a park file:", park_router.ride_capacity("Wonderland"))
+print("Seaside counter after reopening:", park_router.shard("Seaside").next_order_id())
+park_router.close()
+
+# Ride Catalog Test
+print("--- Ride Catalog Test ---")
+import RideCatalog
+
+catalog_rides = [
+    ride1,
+    Ride("Carousel", "Family", "None", "None", "3 min", "30 riders", "Open"),
+    Ride("Kiddie Cars", "Family", "30 in", "4 ft", "90 sec", 12, "Open"),
+    Ride("Drop Tower", "Thrill", "132 cm", "6'6\"", "1:30", 16, "Open"),
+    Ride("Log Flume", "Water", "42 inches", "", "5 minutes", 24, "Maintenance"),
+]
+ride_catalog = RideCatalog.RideCatalog(catalog_rides)
+print("Heights parsed:", [(spec.get_min_height(), spec.get_max_height()) for spec in ride_catalog.get_specs()])
+print("Drop Tower hourly throughput:", ride_catalog.get_spec("Drop Tower").get_hourly_throughput())
+print("Open rides for a 52-inch guest:", [spec.get_name() for spec in ride_catalog.eligible_rides(52)])
+print("Rides for a 48-inch guest incl. closed:", [spec.get_name() for spec in ride_catalog.eligible_rides("48 inches", open_only=False)])
+print("Per guest:", [[spec.get_name() for spec in rides] for rides in ride_catalog.eligible_rides_bulk([40, "5 ft", 80])])
+print("Whole group of 40 and 60 inches:", [spec.get_name() for spec in ride_catalog.rides_for_group([40, 60])])
+
+
+# Order Archive Test
+print("--- Order Archive Test ---")
+import Archive
+
+archive_park = Parks.ParkShard("Archive Park", os.path.join(snapshot_dir, "archive_park"), {"Single-Day Pass": 5})
+recent_day = date.today().isoformat()
+for order_date in ("2024-01-05", "2024-01-20", "2024-02-03", recent_day):
+    archive_park.record_order(archive_park.next_order_id(), {"customer": "jdoe", "ticket": "Single-Day Pass", "quantity": 1, "total_price": 50.0, "order_date": order_date, "visit_date": order_date})
+before_report = Reports.build_report(archive_park.get_orders().items(), prices)
+print("Orders archived:", archive_park.archive(max_age_days=90))
+archived_orders = archive_park.get_orders()
+print("Segments:", [os.path.basename(path) for path in archived_orders.get_archive().get_segment_paths()])
+print("Hot orders:", len(archived_orders.get_order_log()), "Total orders:", len(archived_orders), "Next ID:", archive_park.next_order_id())
+print("Archived ORDER-1:", archived_orders.get("ORDER-1"))
+print("Hot ORDER-4 date is today:", archived_orders["ORDER-4"]["order_date"] == recent_day)
+print("Customer orders across tiers:", [order_id for order_id, _ in archived_orders.customer_orders("jdoe")])
+print("Report unchanged by archiving:", Reports.build_report(archived_orders.items(), prices) == before_report)
+archive_park.close()
+
+# A crash after writing segments but before swapping the log, then a re-run
+import shutil
+
+crash_dir = os.path.join(snapshot_dir, "archive_crash")
+os.makedirs(crash_dir, exist_ok=True)
+crash_log_path = os.path.join(crash_dir, "orders.log")
+crash_archive_dir = os.path.join(crash_dir, "archive")
+with Storage.OrderLog(crash_log_path) as crash_log:
+    for number, order_date in enumerate(("2024-01-05", "2024-02-03", recent_day), 1):
+        crash_log[f"ORDER-{number}"] = {"customer": "jdoe", "ticket": "Single-Day Pass", "quantity": 1, "total_price": 50.0, "order_date": order_date, "visit_date": order_date}
+for extension in (".log", ".idx"):
+    shutil.copyfile(os.path.join(crash_dir, "orders" + extension), os.path.join(crash_dir, "before" + extension))
+Archive.archive_orders(crash_log_path, crash_archive_dir, "2024-06-01")
+for extension in (".log", ".idx"):
+    os.replace(os.path.join(crash_dir, "before" + extension), os.path.join(crash_dir, "orders" + extension))
+print("Re-run moves:", Archive.archive_orders(crash_log_path, crash_archive_dir, "2024-06-01"), "segments:", sorted(os.listdir(crash_archive_dir)))
+crash_orders = Archive.TieredOrders(Storage.OrderLog(crash_log_path), Archive.OrderArchive(crash_archive_dir))
+print("Orders counted once:", len(crash_orders), [order_id for order_id, _ in crash_orders.items()])
+crash_orders.close()
+print("Rows exported with the archive:", Export.export_store("orders", crash_log_path, os.path.join(crash_dir, "orders.csv"), archive_dir=crash_archive_dir),
+      "from January:", Export.export_store("orders", crash_log_path, os.path.join(crash_dir, "january.csv"), date_to="2024-01-31", archive_dir=crash_archive_dir))
+
+# Another kiosk keeps the log open while it is archived; its later appends must reach the new log
+open_kiosk_log = Storage.OrderLog(crash_log_path)
+open_kiosk_log["ORDER-4"] = {"customer": "jdoe", "ticket": "Single-Day Pass", "quantity": 1, "total_price": 50.0, "order_date": "2024-03-01", "visit_date": "2024-03-01"}
+print("Archived while open:", Archive.archive_orders(crash_log_path, crash_archive_dir, "2024-06-01"))
+open_kiosk_log["ORDER-5"] = {"customer": "jdoe", "ticket": "Single-Day Pass", "quantity": 1, "total_price": 50.0, "order_date": recent_day, "visit_date": recent_day}
+print("Open log follows the swap:", "ORDER-4 archived:", "ORDER-4" not in open_kiosk_log, "ORDER-5 logged:", "ORDER-5" in open_kiosk_log)
+open_kiosk_log.close()
+with Storage.OrderLog(crash_log_path) as swapped_log:
+    print("Hot orders after the swap:", list(swapped_log.keys()))
+
+# Kiosk Sync Test
+print("--- Kiosk Sync Test ---")
+import Sync
+
+central_path = os.path.join(snapshot_dir, "central.db")
+kiosk_a = Sync.Outbox(os.path.join(snapshot_dir, "kiosk_a.log"), "kiosk-a")
+kiosk_b = Sync.Outbox(os.path.join(snapshot_dir, "kiosk_b.log"), "kiosk-b")
+offline_order = {"customer": "jdoe", "ticket": "Single-Day Pass", "quantity": 1, "total_price": 50.0, "order_date": "2024-12-01", "visit_date": "2024-12-01"}
+kiosk_b.append(Sync.ORDER, "ORDER-1", offline_order, "Main Park")
+kiosk_a.append(Sync.ORDER, "ORDER-1", dict(offline_order, quantity=2, total_price=100.0), "Main Park")
+kiosk_a.append(Sync.ACCOUNT, "walkup", {"password": "a", "role": "Customer"})
+kiosk_b.append(Sync.ACCOUNT, "walkup", {"password": "b", "role": "Customer"})
+print("Offline sync:", Sync.SyncEngine(kiosk_a, os.path.join(snapshot_dir, "missing", "central.db")).sync(), "queued:", kiosk_a.pending_count())
+kiosk_a_accounts = {}
+sync_a = Sync.SyncEngine(kiosk_a, central_path, on_account=kiosk_a_accounts.__setitem__)
+print("Kiosk A sync:", sync_a.sync(), "queued:", kiosk_a.pending_count())
+print("Kiosk B sync:", Sync.SyncEngine(kiosk_b, central_path).sync())
+sync_a.sync()
+central = Sync.CentralStore(central_path)
+print("ORDER-1 kept by:", central.get_order("ORDER-1")["kiosk"], "Kiosk A renamed:", sync_a.get_renamed())
+print("walkup password:", central.get_account("walkup")["password"], "Kiosk A sees:", kiosk_a_accounts["walkup"])
+print("Conflicts:", central.get_conflicts())
+central.close()
+restarted_a = Sync.SyncEngine(kiosk_a, central_path)
+kiosk_a_parks = Parks.ParkRouter({"Wonderland": os.path.join(snapshot_dir, "kiosk_a_park")}, {"Single-Day Pass": 5}, kiosk="kiosk-a")
+kiosk_a_parks.shard("Wonderland").record_order("ORDER-1", dict(offline_order, quantity=2, total_price=100.0))
+# Another kiosk process keeps the same log open while it is renamed
+other_kiosk_log = Storage.OrderLog(os.path.join(snapshot_dir, "kiosk_a_park", "orders.log"))
+print("Other kiosk sees ORDER-1:", "ORDER-1" in other_kiosk_log)
+print("Renames pending after restart:", restarted_a.get_pending_renames(), "renamed in the log:", kiosk_a_parks.rename_orders(restarted_a.get_pending_renames()))
+restarted_a.confirm_renames(restarted_a.get_pending_renames())
+print("Other kiosk follows the rename:", "ORDER-1-kiosk-a" in other_kiosk_log, "old ID gone:", "ORDER-1" not in other_kiosk_log)
+other_kiosk_log.close()
+print("Renamed order found:", kiosk_a_parks.find_order("ORDER-1-kiosk-a") is not None, "old ID gone:", kiosk_a_parks.find_order("ORDER-1") is None,
+      "pending:", Sync.SyncEngine(kiosk_a, central_path).get_pending_renames())
+print("Kiosk order ID:", kiosk_a_parks.place_order("Wonderland", dict(offline_order, visit_date=datetime.now().strftime("%Y-%m-%d"))))
+kiosk_a_parks.close()
+kiosk_a.close()
+kiosk_b.close()
+
+# Shared Price Table Test
+print("--- Shared Price Table Test ---")
+import Pricing
+
+price_table_path = os.path.join(snapshot_dir, "prices.tbl")
+admin_prices = Pricing.PriceTable(price_table_path)
+kiosk_prices = Pricing.PriceTable(price_table_path)
+print("Group Pass price:", kiosk_prices.get_price("Group Pass"), "generation:", kiosk_prices.get_generation())
+admin_prices.set_discount("Group Pass", 25)
+print("After admin discount:", kiosk_prices.get_price("Group Pass"), "generation:", kiosk_prices.get_generation())
+admin_prices.set_price("Single-Day Pass", 55.0)
+print("List prices:", kiosk_prices.get_list_prices())
+try:
+    admin_prices.set_discount("Group Pass", 150)
+except ValueError as error:
+    print("Rejected discount:", error)
+admin_prices.close()
+kiosk_prices.close()
+print("Discounts after reopening:", Pricing.PriceTable(price_table_path).get_discounts())
+# A writer killed between its two generation bumps leaves the generation odd
+kiosk_prices = Pricing.PriceTable(price_table_path)
+stale_generation = kiosk_prices.get_generation()
+with open(price_table_path, "r+b") as f:
+    f.seek(Pricing.GENERATION_OFFSET)
+    f.write(Pricing.GENERATION.pack(stale_generation + 3))
+print("Reader recovers from a dead writer:", kiosk_prices.get_generation() % 2 == 0, kiosk_prices.get_discount("Group Pass"))
+kiosk_prices.close()
+with open(price_table_path, "r+b") as f:
+    f.seek(Pricing.GENERATION_OFFSET)
+    f.write(Pricing.GENERATION.pack(stale_generation + 5))
+print("Generation even after reopening:", Pricing.PriceTable(price_table_path).get_generation() % 2 == 0)
+
+# Permission Engine Test
+print("--- Permission Engine Test ---")
+import Permissions
+
+access = Permissions.AccessControl()
+admin1_mask = access.compile_admin(admin1)
+print("Super admin may manage users:", access.allows(admin1_mask, "manage_users"))
+manager = Admin("manager1", "pw", "manager1@example.com", "30", "Active", 5, ["Export Data", "modify_discounts"], "Manager", "Sales", 2, False)
+manager_mask = access.compile_admin(manager)
+print("Manager permissions:", Permissions.format_permissions(manager_mask))
+print("Manager may export (clearance 2 < 3):", access.allows(manager_mask, "export_data"))
+manager.set_security_clearance_level(3)
+print("After clearance 3:", Permissions.format_permissions(access.compile_admin(manager)))
+print("Plain GUI admin:", Permissions.format_permissions(access.compile_account({"password": "pw", "role": "Admin"})))
+print("Self-registered admin:", Permissions.format_permissions(access.compile_account({"password": "pw", "role": Permissions.SELF_REGISTERED_ADMIN})))
+restricted_mask = access.compile_account({"password": "pw", "role": "Admin"}, {"permissions": "view_sales", "clearance": 5, "super_admin": 0})
+print("Restricted admin profile:", Permissions.format_permissions(restricted_mask))
+try:
+    access.check(restricted_mask, "modify_discounts")
+except Permissions.AccessDenied as error:
+    print("Restricted admin denied:", error)
+print("Customer mask:", access.compile_account({"password": "pw", "role": "Customer"}))
+try:
+    access.check(access.compile_account({"password": "pw", "role": "Customer"}), "view_sales")
+except Permissions.AccessDenied as error:
+    print("Denied:", error)
+print("Decision table entries:", access.get_decision_count())
+
+audit_log = Permissions.AuditLog(os.path.join(snapshot_dir, "audit.log"), batch_size=3)
+audit_log.record("manager1", "search_records", 4)
+audit_log.record("manager1", "view_sales")
+print("Pending:", audit_log.get_pending_count(), "accessed so far:", audit_log.get_accounts_accessed("manager1"))
+audit_log.record("manager1", "search_records", 2)
+print("After batch write:", audit_log.get_pending_count(), audit_log.get_accounts_accessed("manager1"))
+audit_log.record("manager1", "search_records", 1)
+audit_log.close()
+print("Replayed on reopen:", Permissions.AuditLog(os.path.join(snapshot_dir, "audit.log")).get_accounts_accessed("manager1"))
+
+# Park Schedule Test
+print("--- Park Schedule Test ---")
+import json
+import Schedule
+from datetime import timedelta
+
+hours = Schedule.OperatingHours("Mon-Fri 10am-6pm; Sat, Sun 8:00 AM - 1:00 AM; Tue closed", closures=["2025-12-25"])
+print("Monday 2025-12-22:", [f"{opening:%H:%M}-{closing:%H:%M}" for opening, closing in hours.hours_on("2025-12-22")])
+print("Open Tuesday:", hours.is_open_on("2025-12-23"), "open Christmas:", hours.is_open_on("2025-12-25"))
+print("Open Sunday 00:30 (Saturday's late hours):", hours.is_open(datetime(2025, 12, 28, 0, 30)))
+try:
+    hours.check_visit("2025-12-22", now=datetime(2025, 12, 22, 19, 0))
+except Schedule.ParkClosedError as error:
+    print("Rejected visit:", error)
+try:
+    Schedule.parse_operating_hours("whenever")
+except ValueError as error:
+    print("Rejected hours:", error)
+print("Park open at 10 PM:", park1.is_open(datetime(2025, 12, 22, 22, 0)), "at 11:30 PM:", park1.is_open(datetime(2025, 12, 22, 23, 30)))
+
+schedule_path = os.path.join(snapshot_dir, "schedule.json")
+with open(schedule_path, "w", encoding="utf-8") as f:
+    json.dump({
+        "operating_hours": "9:00 AM - 10:00 PM",
+        "events": [{"name": "Parade", "start": "2025-12-22T15:00", "end": "2025-12-22T16:00", "location": "Main Street"}],
+        "slots": [{"name": "Splash Zone", "start": "2025-12-22T09:00", "end": "2025-12-22T12:00"}],
+    }, f)
+park_schedule = Schedule.ParkSchedule.load(schedule_path)
+park_schedule.add_slot("Haunted House", datetime(2025, 12, 22, 14, 0), datetime(2025, 12, 22, 18, 0))
+try:
+    park_schedule.add_event("Fireworks", datetime(2025, 12, 22, 15, 30), datetime(2025, 12, 22, 16, 30), "Main Street")
+except Schedule.ScheduleConflict as error:
+    print("Conflict:", error)
+fireworks = park_schedule.add_event("Fireworks", datetime(2025, 12, 22, 21, 0), datetime(2025, 12, 22, 21, 30), "Main Street")
+print("Running at 3:30 PM:", park_schedule.running(datetime(2025, 12, 22, 15, 30)))
+print("Upcoming from 8:30 PM:", park_schedule.upcoming(datetime(2025, 12, 22, 20, 30), timedelta(hours=1)))
+park_schedule.remove(fireworks)
+print("After removing fireworks:", park_schedule.upcoming(datetime(2025, 12, 22, 20, 30)), "entries:", len(park_schedule))
+
+# Demand Forecast Test
+print("--- Demand Forecast Test ---")
+import Forecast
+from datetime import date
 
+history = {}
+for offset in range(56):
+    sales_day = date(2025, 11, 3) + timedelta(days=offset)
+    weekend = sales_day.weekday() >= 5
+    history[sales_day.isoformat()] = {"Single-Day Pass": 200 if weekend else 80, "Group Pass": 12 if weekend else 4}
+history["2025-12-25"] = {"Single-Day Pass": 240, "Group Pass": 8}
+demand = Forecast.DemandForecast.fit(history, "2025-12-29", operating_hours=Schedule.OperatingHours("Daily 9am-9pm; Tue closed"))
+print("Last closed day:", demand.get_last_closed())
+print("Single-Day Pass baselines:", [round(baseline) for baseline in demand.get_model("Single-Day Pass").get_baselines()])
+print("Holiday ratio:", round(demand.get_model("Single-Day Pass").get_holiday_ratio(), 2))
+for forecast_day, expected in demand.forecast("2025-12-29", 7):
+    print(f"  {forecast_day:%a %Y-%m-%d}:", {ticket: round(quantity) for ticket, quantity in expected.items()})
+demand.close_day("2025-12-29", {"Single-Day Pass": 180, "Group Pass": 4})
+print("Monday after a busy day:", round(demand.forecast("2026-01-05", 1)[0][1]["Single-Day Pass"]))
+try:
+    demand.close_day("2025-12-20", {})
+except ValueError as error:
+    print("Rejected:", error)
+print("Over capacity:", [(f"{day:%a}", ticket) for day, ticket, _, _ in Forecast.capacity_shortfalls(demand.forecast("2026-01-05", 7), {"Single-Day Pass": 150})])
+forecast_park = Park("Forecast Park", "Orlando, FL", "Daily 9am-9pm", 0)
+for catalog_ride in catalog_rides:
+    forecast_park.add_ride(catalog_ride)
+for day_plan in Forecast.staffing_plan(demand.forecast("2026-01-10", 2), forecast_park):
+    print(f"  {day_plan['date']:%a}: {day_plan['guests']} guests, {day_plan['staff']} staff, rides {day_plan['rides']}, load {day_plan['ride_utilization']:.0%}")
 
 print("\nAll tests completed successfully!")
\ No newline at end of file